@@ -5,10 +5,110 @@
 #include <Python.h>
 #include <stdbool.h>
 
-static PyObject* compress(PyObject* self, PyObject* args)
+#define HASH_BITS 16
+#define HASH_SIZE (1 << HASH_BITS)
+#define OUT_SIZE 0x10000
+
+// Output is abandoned once it reaches this size.  The slack leaves room for
+// one more packet (header + 8 copies) and the addendum bytes.
+#define OUT_LIMIT (OUT_SIZE - 0x20)
+
+static unsigned int hash3(const unsigned char* p)
+{
+  unsigned int key = (p[0] << 16) | (p[1] << 8) | p[2];
+  return (key * 2654435761u) >> (32 - HASH_BITS);
+}
+
+// Length of the match between source[start:] and source[src_pos:], up to
+// max_len bytes.  The match may run past src_pos (overlapping copy).
+static int match_len(const unsigned char* source, int start, int src_pos,
+		     int max_len)
+{
+  int cur_len = 0;
+
+  while(cur_len < max_len && source[start+cur_len] == source[src_pos+cur_len])
+    cur_len += 1;
+
+  return cur_len;
+}
+
+// Original brute force search over every start in the window.  Takes the
+// first start that reaches max_copy_length, otherwise the last start with
+// the longest match.  Kept as the reference for find_match_chain.
+static int find_match_brute(const unsigned char* source, int len_source,
+			    const int* prev, int src_pos, int lookback_st,
+			    int max_copy_length, int* best_len_st)
+{
+  int cur_len;
+  int best_len = 0;
+  int max_len = len_source - src_pos;
+
+  (void) prev;
+
+  if(max_len > max_copy_length)
+    max_len = max_copy_length;
+
+  *best_len_st = 0;
+  for(int start=lookback_st; start<src_pos; start++){
+    cur_len = match_len(source, start, src_pos, max_len);
+
+    // Update best match if needed
+    if(cur_len >= best_len){
+      best_len = cur_len;
+      *best_len_st = start;
+      if(cur_len == max_copy_length){
+	break;
+      }
+    }
+  }
+
+  return best_len;
+}
+
+// Same result as find_match_brute, but only visits the earlier positions
+// which share the next three bytes (via the prev hash chain).  Matches of
+// fewer than three bytes are never used, so nothing else can win.  The
+// chain is walked newest to oldest, so ties keep the newest start except
+// for full length matches, which keep the oldest.
+static int find_match_chain(const unsigned char* source, int len_source,
+			    const int* prev, int src_pos, int lookback_st,
+			    int max_copy_length, int* best_len_st)
+{
+  int cur_len;
+  int best_len = 0;
+  int max_len = len_source - src_pos;
+
+  if(max_len > max_copy_length)
+    max_len = max_copy_length;
+
+  *best_len_st = 0;
+  if(max_len < 3)
+    return 0;
+
+  for(int start=prev[src_pos]; start>=lookback_st; start=prev[start]){
+    cur_len = match_len(source, start, src_pos, max_len);
+
+    if(cur_len == max_copy_length){
+      best_len = cur_len;
+      *best_len_st = start;
+    }
+    else if(cur_len > best_len){
+      best_len = cur_len;
+      *best_len_st = start;
+    }
+  }
+
+  return best_len;
+}
+
+typedef int (*match_finder)(const unsigned char*, int, const int*, int, int,
+			    int, int*);
+
+// Compress source with both window widths and return the smaller result.
+// Returns NULL (with an exception set) on failure.
+static PyObject* compress_source(const unsigned char* source, int len_source,
+				 match_finder find_match)
 {
-  const char* source;
-  int len_source=0;
   int i=0;
   int lookback_range = 0;
   int max_copy_length = 0;
@@ -16,33 +116,41 @@ static PyObject* compress(PyObject* self, PyObject* args)
   int src_pos = 0;
   int out_pos = 0;
   bool done = false;
-  int best_size = 0x1000;
+  int best_size = OUT_LIMIT;
   int compr_stream = 0;
-  char compressed_data[2][0x10000];
+  unsigned char (*compressed_data)[OUT_SIZE] = NULL;
   int compressed_lengths[2];
   int mask = 0;
   int addendum_size = 0;
   int lookback = 0;
   int lookback_st = 0;
-  int lookback_end = 0;
-  int cur_len = 0;
   int best_len = 0;
   int best_len_st = 0;
   int ret_choice = 0;
-  PyObject* result;
-  PyObject* arg1;
-  Py_buffer buffer;
-
-  compressed_lengths[0] = compressed_lengths[1] = 0x10000;
-
-  if (!PyArg_ParseTuple(args, "y*", &buffer))
-    return NULL;
-
-  // if (!PyObject_GetBuffer(arg1, &buffer, PyBUF_SIMPLE))
-  //   return NULL;
+  int* head = NULL;
+  int* prev = NULL;
+  PyObject* result = NULL;
+
+  compressed_lengths[0] = compressed_lengths[1] = OUT_SIZE;
+
+  compressed_data = PyMem_Malloc(2*sizeof(*compressed_data));
+  head = PyMem_Malloc(HASH_SIZE*sizeof(int));
+  prev = PyMem_Malloc((len_source+1)*sizeof(int));
+  if(compressed_data == NULL || head == NULL || prev == NULL){
+    PyErr_NoMemory();
+    goto done;
+  }
 
-  source = buffer.buf;
-  len_source = buffer.len;
+  // prev[pos] is the last position before pos with the same hash of the
+  // next three bytes (or -1).  This does not depend on the window, so both
+  // passes share it.
+  for(int h=0; h<HASH_SIZE; h++)
+    head[h] = -1;
+  for(int pos=0; pos+2<len_source; pos++){
+    unsigned int h = hash3(&source[pos]);
+    prev[pos] = head[h];
+    head[h] = pos;
+  }
 
   for(i=0;i<2;i++){
     // i=0: use 0x07FF for the range, 0xF800 for the max copy length
@@ -54,7 +162,7 @@ static PyObject* compress(PyObject* self, PyObject* args)
     max_copy_length += 3;
 
     src_pos = 0;
-    
+
     // First two bytes are main body length
     // Next byte will be the first packet's header
     out_pos = 2;
@@ -69,12 +177,11 @@ static PyObject* compress(PyObject* self, PyObject* args)
       // compressed_data[][] was uninitialized.  This is no problem except that
       // we need to make sure that the header bytes start off as 0s.
       compressed_data[i][header_pos] = 0;
-      
+
       out_pos += 1;
 
-      // printf("out_pos: %04X\n", out_pos);
       for(int bit=0; bit<8; bit++){
-	
+
 	// While filling a packet we ran out of source.
 	if(src_pos == len_source){
 	  if(bit == 0){
@@ -97,13 +204,11 @@ static PyObject* compress(PyObject* self, PyObject* args)
 	      compressed_data[i][header_pos+3+j] = \
 		compressed_data[i][header_pos+j];
 	    }
-		
+
 	    // copy range + addendum length
 	    compressed_data[i][header_pos] = 0xC0*(1-i) | bit;
 
 	    // total compressed length (remember shift by 3)
-	    // compressed_data[i][header_pos+1:header_pos+3] =	\
-	    //   to_little_endian(out_pos+3, 2);
 	    compressed_data[i][header_pos+1] = (out_pos+3) % 0x100;
 	    compressed_data[i][header_pos+2] = (int)((out_pos+3) / 0x100);
 
@@ -112,8 +217,6 @@ static PyObject* compress(PyObject* self, PyObject* args)
 	    compressed_lengths[i] = out_pos+4;
 	  }
 
-	  // compressed_data[i][0:2] =				\
-	  //   to_little_endian(header_pos-2, 2)
 	  compressed_data[i][0] = (header_pos-2) % 0x100;
 	  compressed_data[i][1] = (int)((header_pos-2) / 0x100);
 
@@ -123,29 +226,9 @@ static PyObject* compress(PyObject* self, PyObject* args)
 
 	lookback_st = (src_pos - lookback_range) > 0? \
 	  (src_pos - lookback_range) : 0;
-	lookback_end = src_pos;
 
-	best_len = 0;
-	best_len_st = 0;
-
-	for(int start=lookback_st; start<lookback_end; start++){
-	  cur_len = 0;
-
-	  while((src_pos + cur_len < len_source) && \
-		(cur_len < max_copy_length) && \
-		source[start+cur_len] == source[src_pos+cur_len]){
-	    cur_len += 1;
-	  }
-
-	  // Update best match if needed
-	  if(cur_len >= best_len){
-	    best_len = cur_len;
-	    best_len_st = start;
-	    if(cur_len == max_copy_length){
-	      break;
-	    }
-	  } 
-	}
+	best_len = find_match(source, len_source, prev, src_pos, lookback_st,
+			      max_copy_length, &best_len_st);
 
 	if(best_len > 2){
 	  // We matched at least 3 bytes, so we'll use compression
@@ -154,20 +237,15 @@ static PyObject* compress(PyObject* self, PyObject* args)
 	  compressed_data[i][header_pos] |= (1 << bit);
 
 	  lookback = src_pos - best_len_st;
-	  // # print(f"\tlookback: {lookback:04X}")
 
 	  // length is encoded with a -3 because there are always at
 	  // least 3 bytes to copy.  The length is shifted to the most
 	  // significant bits.  The shift depends on i.
-	  // length = ((best_len-3) << (16-(5-i)));
-
 	  compr_stream = lookback | ((best_len-3) << (16-(5-i)));
 
-	  // compressed_data[i][out_pos:out_pos+2] =		\
-	  //   to_little_endian(compr_stream, 2)
 	  compressed_data[i][out_pos] = compr_stream % 0x100;
 	  compressed_data[i][out_pos+1] = (int)(compr_stream / 0x100);
-	  
+
 	  out_pos += 2;
 	  src_pos += best_len;
 	}
@@ -191,18 +269,268 @@ static PyObject* compress(PyObject* self, PyObject* args)
   else{
     ret_choice = 1;
   }
-  
+
+  if(compressed_lengths[ret_choice] >= OUT_SIZE){
+    PyErr_SetString(PyExc_ValueError,
+		    "Compressed data exceeds 0x10000 bytes.");
+    goto done;
+  }
+
   result = Py_BuildValue("y#",
 			 &compressed_data[ret_choice][0],
-			 compressed_lengths[ret_choice]);
+			 (Py_ssize_t) compressed_lengths[ret_choice]);
+
+ done:
+  PyMem_Free(compressed_data);
+  PyMem_Free(head);
+  PyMem_Free(prev);
+  return result;
+}
+
+static PyObject* compress_with(PyObject* args, match_finder find_match)
+{
+  Py_buffer buffer;
+  PyObject* result;
+
+  if (!PyArg_ParseTuple(args, "y*", &buffer))
+    return NULL;
+
+  if(buffer.len > 0x10000){
+    PyBuffer_Release(&buffer);
+    PyErr_SetString(PyExc_ValueError, "Source exceeds 0x10000 bytes.");
+    return NULL;
+  }
+
+  result = compress_source(buffer.buf, (int) buffer.len, find_match);
   PyBuffer_Release(&buffer);
   return result;
 }
 
+static PyObject* compress(PyObject* self, PyObject* args)
+{
+  return compress_with(args, find_match_chain);
+}
+
+static PyObject* compress_reference(PyObject* self, PyObject* args)
+{
+  return compress_with(args, find_match_brute);
+}
+
+
+
+// Read a little endian 16-bit value from buf.  Returns -1 (with an
+// IndexError set) if pos is out of range.
+static long read_u16(const unsigned char* buf, Py_ssize_t len, Py_ssize_t pos)
+{
+  if(pos < 0 || pos + 2 > len){
+    PyErr_Format(PyExc_IndexError,
+		 "Compressed data read out of range at %zd.", pos);
+    return -1;
+  }
+
+  return buf[pos] | (buf[pos+1] << 8);
+}
+
+// Follows ctdecompress.get_compressed_length_py.
+static Py_ssize_t compressed_length(const unsigned char* rom, Py_ssize_t len,
+				    Py_ssize_t addr)
+{
+  long main_length;
+  long compr_len;
+  Py_ssize_t add_byte_addr;
+
+  main_length = read_u16(rom, len, addr);
+  if(main_length < 0)
+    return -1;
+
+  // len main body + main body + addendum byte
+  compr_len = 2 + main_length + 1;
+  add_byte_addr = addr + compr_len - 1;
+
+  while(1){
+    if(add_byte_addr >= len){
+      PyErr_SetString(PyExc_IndexError,
+		      "Compressed data read out of range.");
+      return -1;
+    }
+
+    if((rom[add_byte_addr] & 0x3F) == 0)
+      break;
+
+    compr_len = read_u16(rom, len, add_byte_addr+1);
+    if(compr_len < 0)
+      return -1;
+    add_byte_addr = addr + compr_len;
+  }
+
+  return compr_len + 1;
+}
+
+static PyObject* get_compressed_length(PyObject* self, PyObject* args)
+{
+  Py_buffer buffer;
+  Py_ssize_t addr;
+  Py_ssize_t result;
+
+  if (!PyArg_ParseTuple(args, "y*n", &buffer, &addr))
+    return NULL;
+
+  result = compressed_length(buffer.buf, buffer.len, addr);
+  PyBuffer_Release(&buffer);
+
+  if(result < 0)
+    return NULL;
+
+  return PyLong_FromSsize_t(result);
+}
+
+// Follows ctdecompress.decompress_py, including its use of a zeroed 64K
+// work buffer where copies from before the start wrap around to the end.
+static PyObject* decompress(PyObject* self, PyObject* args)
+{
+  Py_buffer buffer;
+  Py_ssize_t start;
+  const unsigned char* rom;
+  Py_ssize_t len;
+  unsigned char* out_buffer = NULL;
+  Py_ssize_t out_pos = 0;
+  Py_ssize_t src_pos;
+  Py_ssize_t end_pos;
+  long main_len;
+  long value;
+  bool smallwidth;
+  unsigned char header;
+  int copy_size;
+  int copy_off;
+  PyObject* result = NULL;
+
+  if (!PyArg_ParseTuple(args, "y*n", &buffer, &start))
+    return NULL;
+
+  rom = buffer.buf;
+  len = buffer.len;
+
+  out_buffer = PyMem_Calloc(0x10000, 1);
+  if(out_buffer == NULL){
+    PyErr_NoMemory();
+    goto done;
+  }
+
+  // First two bytes are little endian size of compressed packet
+  main_len = read_u16(rom, len, start);
+  if(main_len < 0)
+    goto done;
+
+  src_pos = start+2;
+  end_pos = src_pos + main_len;
+
+  if(end_pos >= len)
+    goto out_of_range;
+
+  smallwidth = (rom[end_pos] & 0xC0) != 0;
+
+  while(1){
+    // First check if we've passed the main body
+    if(src_pos == end_pos){
+      if(src_pos >= len)
+	goto out_of_range;
+
+      if((rom[src_pos] & 0x3F) == 0){
+	// No addendum
+	result = PyByteArray_FromStringAndSize((const char*) out_buffer,
+					       out_pos);
+	goto done;
+      }
+
+      // Addendum, new end in next two bytes
+      value = read_u16(rom, len, src_pos+1);
+      if(value < 0)
+	goto done;
+      end_pos = start + value;
+      src_pos += 3;
+    }
+
+    if(src_pos >= len)
+      goto out_of_range;
+    header = rom[src_pos];
+    src_pos += 1;
+
+    for(int i=0; i<8; i++){
+      if(src_pos == end_pos){
+	// ran out of data mid packet (in addendum)
+	break;
+      }
+
+      if((header & (1 << i)) == 0){
+	// Uncompressed, copy next byte
+	if(src_pos >= len)
+	  goto out_of_range;
+	if(out_pos >= 0x10000)
+	  goto too_long;
+
+	out_buffer[out_pos] = rom[src_pos];
+	out_pos += 1;
+	src_pos += 1;
+      }
+      else{
+	// Compressed, determine copy size and offset
+	value = read_u16(rom, len, src_pos);
+	if(value < 0)
+	  goto done;
+
+	copy_size = rom[src_pos+1];
+	copy_off = value;
+
+	if(smallwidth){
+	  copy_size >>= 3;
+	  copy_off &= 0x07FF;
+	}
+	else{
+	  copy_size >>= 4;
+	  copy_off &= 0x0FFF;
+	}
+
+	copy_size += 3;
+	if(out_pos + copy_size > 0x10000)
+	  goto too_long;
+
+	for(int j=0; j<copy_size; j++){
+	  Py_ssize_t from = out_pos - copy_off + j;
+	  if(from < 0)
+	    from += 0x10000;
+	  out_buffer[out_pos + j] = out_buffer[from];
+	}
+
+	out_pos += copy_size;
+	src_pos += 2;
+      }
+    }
+  }
+
+ out_of_range:
+  PyErr_Format(PyExc_IndexError,
+	       "Compressed data read out of range at %zd.", src_pos);
+  goto done;
+
+ too_long:
+  PyErr_SetString(PyExc_ValueError,
+		  "Decompressed data exceeds 0x10000 bytes.");
+
+ done:
+  PyMem_Free(out_buffer);
+  PyBuffer_Release(&buffer);
+  return result;
+}
 
 
 static PyMethodDef CompressMethods[] = {
     {"compress", compress, METH_VARARGS, "compress an event."},
+    {"compress_reference", compress_reference, METH_VARARGS,
+     "compress an event with the original brute force search (slow)."},
+    {"decompress", decompress, METH_VARARGS,
+     "decompress(rom, start) -> bytearray of the packet at start."},
+    {"get_compressed_length", get_compressed_length, METH_VARARGS,
+     "get_compressed_length(rom, addr) -> length of the packet at addr."},
     {NULL, NULL, 0, NULL}
 };
 
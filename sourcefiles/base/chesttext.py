@@ -18,9 +18,12 @@ from ctstrings import CTNameString
 
 def write_desc_strings(ct_rom: ctrom.CTRom,
                        item_db: Optional[itemdata.ItemDB] = None,
-                       max_desc_len: int = 0x28) -> int:
+                       max_desc_len: int = 0x28,
+                       start: Optional[int] = None) -> int:
     '''
-    Write the description strings to rom
+    Write the description strings to rom.  If start is None, then free space
+    is found for the strings.  Otherwise the strings overwrite the ones
+    previously written at start.
     '''
 
     if item_db is None:
@@ -30,7 +33,8 @@ def write_desc_strings(ct_rom: ctrom.CTRom,
     desc_size = max_desc_len
     total_size = 0x100 * desc_size
 
-    start = ct_rom.rom_data.space_manager.get_free_addr(total_size)
+    if start is None:
+        start = ct_rom.rom_data.space_manager.get_free_addr(total_size)
 
     rom = ct_rom.rom_data
     rom.seek(start)
@@ -171,9 +175,11 @@ def ugly_hack_chest_str(ct_rom: ctrom.CTRom):
 
 
 def apply_chest_text_hack(ct_rom: ctrom.CTRom,
-                          item_db: Optional[itemdata.ItemDB]):
+                          item_db: Optional[itemdata.ItemDB]) -> int:
     '''
-    Make treasure chests display an item's description.
+    Make treasure chests display an item's description.  Returns the start
+    of the description strings so that they can be rewritten with
+    write_desc_strings if the item_db changes.
     '''
 
     max_desc_len = 0x28
@@ -182,6 +188,8 @@ def apply_chest_text_hack(ct_rom: ctrom.CTRom,
     add_get_desc_char(ct_rom, start, max_desc_len)
     ugly_hack_chest_str(ct_rom)
 
+    return start
+
 
 
 def main():
@@ -0,0 +1,217 @@
+'''
+Module for caching the rom-derived parts of the base RandoConfig on disk.
+
+Building the base config means copying the vanilla rom, applying
+base_patch.ips (and hard.ips), and parsing the enemy, item, tech, AI, attack,
+and shop data back out.  None of that depends on the seed, so the result is
+pickled under pickles/ and reused.  The cache key is made from:
+  - the md5 of the input rom,
+  - the md5 of every file in patches/,
+  - the game mode and difficulties that select which patches are read, and
+  - the md5 of the randomizer's code (see get_code_digest), so that changes
+    to the code which builds or defines the cached object are picked up.
+When any part of the key changes, the entry is rebuilt and overwritten.
+
+Dry runs have no rom to hash, so they use get to find an entry built from
+any rom with the current patches.
+
+Every call to get_or_build (or get) returns a freshly unpickled object, so
+callers are free to modify what they get back.
+'''
+from __future__ import annotations
+
+import hashlib
+import os
+from pathlib import Path
+import pickle
+import tempfile
+import typing
+from typing import Callable, Optional
+
+
+_source_path: Path = Path(__file__).parent
+_patches_path: Path = _source_path / 'patches'
+_pickles_path: Path = _source_path / 'pickles'
+
+# Directories of _source_path with code that is never used to build a base
+# config.  Editing them does not invalidate the cache.
+_NON_CONFIG_CODE_DIRS = ('tests', 'benchmarks', 'editorui')
+
+T = typing.TypeVar('T')
+
+# (path, size, mtime_ns) -> md5 so that unchanged patch files are only read
+# once per process.
+_file_digests: dict[tuple[str, int, int], str] = {}
+
+
+def get_file_digest(path: Path) -> str:
+    '''Get the md5 hex digest of the file at path.'''
+    stat = path.stat()
+    memo_key = (str(path), stat.st_size, stat.st_mtime_ns)
+    digest = _file_digests.get(memo_key)
+    if digest is None:
+        digest = hashlib.md5(path.read_bytes()).hexdigest()
+        _file_digests[memo_key] = digest
+
+    return digest
+
+
+def get_patches_digest(patches_path: Path = _patches_path) -> str:
+    '''Get a single md5 hex digest covering every file in patches_path.'''
+    hasher = hashlib.md5()
+    for path in sorted(patches_path.iterdir()):
+        if path.is_file():
+            hasher.update(path.name.encode())
+            hasher.update(get_file_digest(path).encode())
+
+    return hasher.hexdigest()
+
+
+# source path -> digest.  Loaded code does not change while running, so the
+# code is only hashed once per process.
+_code_digests: dict[Path, str] = {}
+
+
+def get_code_digest(source_path: Path = _source_path) -> str:
+    '''
+    Get a single md5 hex digest covering every .py file in source_path and
+    its subdirectories, except those in _NON_CONFIG_CODE_DIRS.
+    '''
+    digest = _code_digests.get(source_path)
+    if digest is not None:
+        return digest
+
+    hasher = hashlib.md5()
+    for path in sorted(source_path.rglob('*.py')):
+        rel_path = path.relative_to(source_path)
+        if rel_path.parts[0] in _NON_CONFIG_CODE_DIRS:
+            continue
+        hasher.update(rel_path.as_posix().encode())
+        hasher.update(get_file_digest(path).encode())
+
+    digest = hasher.hexdigest()
+    _code_digests[source_path] = digest
+    return digest
+
+
+def _key_matches(stored_key: tuple, key: tuple) -> bool:
+    '''Whether stored_key matches key, where None in key matches anything.'''
+    return len(stored_key) == len(key) and all(
+        part is None or part == stored_part
+        for stored_part, part in zip(stored_key, key)
+    )
+
+
+class BaseConfigCache:
+    '''
+    Two level (memory and disk) cache of pickled objects.
+
+    Each entry has a name, which determines the file it is stored in, and a
+    key.  A stored entry is only used if its key matches the requested key
+    and it was stored by the same code.
+    '''
+    def __init__(self, cache_path: Optional[Path] = _pickles_path,
+                 use_disk: bool = True,
+                 source_path: Path = _source_path):
+        '''
+        Args:
+            cache_path: Optional[Path] = pickles/
+                Directory to store cache files in.
+            use_disk: bool = True
+                If False, entries are only kept in memory.
+            source_path: Path = sourcefiles/
+                Directory of the code which builds the cached objects.  See
+                get_code_digest.
+        '''
+        self.cache_path = cache_path
+        self.use_disk = use_disk and cache_path is not None
+        self.source_path = source_path
+        self._entries: dict[str, tuple[tuple, bytes]] = {}
+
+    def _get_full_key(self, key: tuple) -> tuple:
+        '''Get key with the digest of the code prepended.'''
+        return (get_code_digest(self.source_path),) + key
+
+    def _get_file_path(self, name: str) -> Path:
+        if self.cache_path is None:
+            raise ValueError('No cache path set.')
+        return self.cache_path / f'base_config_{name}.pickle'
+
+    def _read_entry(self, name: str) -> Optional[tuple[tuple, bytes]]:
+        '''Get the key and pickled data stored on disk for name.'''
+        try:
+            with self._get_file_path(name).open('rb') as infile:
+                stored_key, data = pickle.load(infile)
+        except (OSError, EOFError, pickle.UnpicklingError, ValueError):
+            return None
+
+        return stored_key, data
+
+    def _write_entry(self, name: str, key: tuple, data: bytes):
+        '''
+        Write an entry to disk.  The file is written to a temporary and then
+        moved into place so that concurrent generators never read a partial
+        file.  Failing to write (e.g. read-only install) is not an error.
+        '''
+        path = self._get_file_path(name)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(dir=path.parent,
+                                            suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as outfile:
+                    pickle.dump((key, data), outfile)
+                os.replace(tmp_name, path)
+            except BaseException:
+                os.unlink(tmp_name)
+                raise
+        except OSError:
+            pass
+
+    def get_or_build(self, name: str, key: tuple,
+                     builder: Callable[[], T]) -> T:
+        '''
+        Get a fresh copy of the object stored under name with the given key.
+        If there is no such object, call builder() to make it and store it.
+        '''
+        key = self._get_full_key(key)
+        data: Optional[bytes] = None
+
+        entry = self._entries.get(name)
+        if entry is not None and entry[0] == key:
+            data = entry[1]
+
+        if data is None and self.use_disk:
+            stored = self._read_entry(name)
+            if stored is not None and stored[0] == key:
+                data = stored[1]
+
+        if data is None:
+            data = pickle.dumps(builder(), protocol=pickle.HIGHEST_PROTOCOL)
+            if self.use_disk:
+                self._write_entry(name, key, data)
+
+        self._entries[name] = (key, data)
+        return pickle.loads(data)
+
+    def get(self, name: str, key: tuple) -> Optional[typing.Any]:
+        '''
+        Get a fresh copy of the object stored under name with the given key,
+        or None if there is no such object.  A None in the key matches any
+        value.  For example, a base config can be found without knowing
+        which rom it was read from.
+        '''
+        key = self._get_full_key(key)
+
+        entry = self._entries.get(name)
+        if entry is None or not _key_matches(entry[0], key):
+            entry = self._read_entry(name) if self.use_disk else None
+            if entry is None or not _key_matches(entry[0], key):
+                return None
+            self._entries[name] = entry
+
+        return pickle.loads(entry[1])
+
+    def clear(self):
+        '''Forget all in-memory entries.  Disk entries are left alone.'''
+        self._entries.clear()
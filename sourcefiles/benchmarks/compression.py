@@ -0,0 +1,113 @@
+'''
+Microbenchmark for the event script compressor.
+
+Every location script in a vanilla rom is decompressed and then compressed
+again with ctcompress.compress and with ctcompress.compress_reference (the
+original brute force match search).  Throughput is reported in MB/s of
+uncompressed script, and the ratio is compressed size over uncompressed size
+summed across all scripts.
+
+Usage (from sourcefiles/):
+    python -m benchmarks.compression path/to/ct.sfc [--repeat N]
+'''
+from __future__ import annotations
+
+import argparse
+import dataclasses
+from pathlib import Path
+import time
+from typing import Callable, Optional
+
+import ctcompress
+import ctdecompress
+import ctenums
+import ctevent
+
+
+@dataclasses.dataclass
+class CompressionResult:
+    name: str
+    seconds: float
+    source_bytes: int
+    compressed_bytes: int
+
+    @property
+    def mb_per_sec(self) -> float:
+        return self.source_bytes / self.seconds / 1e6
+
+    @property
+    def ratio(self) -> float:
+        return self.compressed_bytes / self.source_bytes
+
+    def __str__(self):
+        return (f'{self.name:>10}: {self.mb_per_sec:8.3f} MB/s, '
+                f'ratio {self.ratio:.4f} '
+                f'({self.compressed_bytes}/{self.source_bytes} bytes)')
+
+
+def read_rom(rom_path: Path) -> bytes:
+    rom = rom_path.read_bytes()
+    if len(rom) % 0x400000 == 0x200:  # Copier header
+        rom = rom[0x200:]
+
+    return rom
+
+
+def get_vanilla_scripts(rom: bytes) -> list[bytes]:
+    '''Get the decompressed script of every location (without repeats).'''
+    ptrs = {ctevent.get_loc_event_ptr(rom, loc_id)
+            for loc_id in ctenums.LocID}
+    return [bytes(ctdecompress.decompress(rom, ptr)) for ptr in sorted(ptrs)]
+
+
+def time_compressor(name: str,
+                    compress: Callable[[bytes], bytes],
+                    scripts: list[bytes],
+                    repeat: int = 1) -> CompressionResult:
+    compressed_bytes = sum(len(compress(script)) for script in scripts)
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for script in scripts:
+            compress(script)
+    seconds = time.perf_counter() - start
+
+    source_bytes = repeat*sum(len(script) for script in scripts)
+    return CompressionResult(name, seconds, source_bytes,
+                             repeat*compressed_bytes)
+
+
+def run(rom: bytes, repeat: int = 1) -> list[CompressionResult]:
+    scripts = get_vanilla_scripts(rom)
+
+    mismatches = [
+        ind for ind, script in enumerate(scripts)
+        if ctcompress.compress(script) !=
+        ctcompress.compress_reference(script)
+    ]
+    if mismatches:
+        print(f'Warning: compress and compress_reference differ on '
+              f'{len(mismatches)} of {len(scripts)} scripts.')
+
+    return [
+        time_compressor('compress', ctcompress.compress, scripts, repeat),
+        time_compressor('reference', ctcompress.compress_reference,
+                        scripts, repeat),
+    ]
+
+
+def main(argv: Optional[list[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('rom', type=Path, help='path to a vanilla ct rom')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='number of times to compress every script')
+    args = parser.parse_args(argv)
+
+    results = run(read_rom(args.rom), args.repeat)
+    for result in results:
+        print(result)
+    print(f'Speedup: {results[0].mb_per_sec/results[1].mb_per_sec:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,274 @@
+'''
+Benchmark seed generation across flag presets and game modes.
+
+Each case is one of the rset.Settings presets, or the race presets with one
+of the GameModes.  A fixed list of seeds is generated for every case and
+the report gives seeds/sec, p50/p95 latency, the peak RSS of the process,
+and the mean free bytes left in the output rom.
+
+With a rom, every seed goes through set_random_config and generate_rom on a
+single Randomizer (as a seedbatch worker would).  Without one (--synthetic)
+only the parts of generation which do not need a rom are run: treasure and
+key item placement on a default config.  Free bytes are not measured then.
+
+Peak RSS is the high water mark of the whole process after the case ran,
+so it only grows from case to case.
+
+Usage (from sourcefiles/):
+    python -m benchmarks.generation path/to/ct.sfc [--seeds N]
+    python -m benchmarks.generation --synthetic [--seeds N]
+    ... --save-baseline base.json
+    ... --baseline base.json [--tolerance 0.1]
+With --baseline the exit status is 1 if any case regressed.
+'''
+from __future__ import annotations
+
+import argparse
+import copy
+import dataclasses
+import json
+from pathlib import Path
+import random
+import statistics
+import sys
+import time
+from typing import Any, Callable, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+import logicwriters
+import randoconfig as cfg
+import randomizer
+import randosettings as rset
+from treasures import treasurewriter
+
+from benchmarks.compression import read_rom
+
+
+PRESETS: dict[str, Callable[[], rset.Settings]] = {
+    'race': rset.Settings.get_race_presets,
+    'new_player': rset.Settings.get_new_player_presets,
+    'lost_worlds': rset.Settings.get_lost_worlds_presets,
+    'hard': rset.Settings.get_hard_presets,
+    'tourney_early': rset.Settings.get_tourney_early_preset,
+    'tourney_top8': rset.Settings.get_tourney_top8_preset,
+}
+
+
+def get_cases() -> dict[str, rset.Settings]:
+    '''Get the settings for every benchmark case keyed by case name.'''
+    cases = {name: get_preset() for name, get_preset in PRESETS.items()}
+    for mode in rset.GameMode:
+        settings = rset.Settings.get_race_presets()
+        settings.game_mode = mode
+        cases[f'mode_{mode.name.lower()}'] = settings
+
+    return cases
+
+
+def get_peak_rss() -> Optional[int]:
+    '''Get the peak resident set size of this process in bytes.'''
+    if resource is None:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return peak if sys.platform == 'darwin' else peak*1024
+
+
+@dataclasses.dataclass
+class CaseResult:
+    name: str
+    latencies: list[float]
+    failures: int = 0
+    peak_rss: Optional[int] = None
+    free_bytes: Optional[float] = None
+
+    @property
+    def seeds_per_sec(self) -> float:
+        total = sum(self.latencies)
+        return len(self.latencies)/total if total else 0.0
+
+    def get_percentile(self, percent: int) -> float:
+        if len(self.latencies) < 2:
+            return self.latencies[0] if self.latencies else 0.0
+        return statistics.quantiles(self.latencies, n=100,
+                                    method='inclusive')[percent-1]
+
+    def to_jot_json(self) -> dict[str, Any]:
+        return {
+            'seeds': len(self.latencies),
+            'failures': self.failures,
+            'seeds_per_sec': round(self.seeds_per_sec, 4),
+            'p50': round(self.get_percentile(50), 6),
+            'p95': round(self.get_percentile(95), 6),
+            'peak_rss': self.peak_rss,
+            'free_bytes': self.free_bytes
+        }
+
+    def __str__(self):
+        rss = '?' if self.peak_rss is None else f'{self.peak_rss/2**20:.0f}'
+        free = '-' if self.free_bytes is None else f'{self.free_bytes:.0f}'
+        return (f'{self.name:>22}: {self.seeds_per_sec:8.3f} seeds/s, '
+                f'p50 {self.get_percentile(50):.3f}s, '
+                f'p95 {self.get_percentile(95):.3f}s, '
+                f'rss {rss} MiB, free {free} bytes, '
+                f'{self.failures} failed')
+
+
+def generate_synthetic(settings: rset.Settings) -> None:
+    '''The rom-independent part of generation.'''
+    rand = random.Random(settings.seed)
+    config = cfg.RandoConfig()
+    randomizer.Randomizer.fill_default_config_entries(config)
+    treasurewriter.write_treasures_to_config(settings, config, rand)
+    logicwriters.commitKeyItems(settings, config, rand)
+
+
+def get_free_bytes(rando: randomizer.Randomizer) -> int:
+    if rando.out_rom is None:
+        raise ValueError('No output rom.')
+    space_manager = rando.out_rom.rom_data.space_manager
+    return space_manager.get_usage_report()['total_free']
+
+
+def run_case(name: str, settings: rset.Settings, seeds: list[str],
+             rando: Optional[randomizer.Randomizer] = None) -> CaseResult:
+    '''Time generating each seed with settings.'''
+    result = CaseResult(name, [])
+    free_bytes = []
+    for seed in seeds:
+        seed_settings = copy.deepcopy(settings)
+        seed_settings.seed = seed
+        start = time.perf_counter()
+        try:
+            if rando is None:
+                seed_settings.fix_flag_conflicts()
+                generate_synthetic(seed_settings)
+            else:
+                rando.settings = seed_settings
+                rando.set_random_config()
+                rando.generate_rom()
+                free_bytes.append(get_free_bytes(rando))
+        except Exception:  # Count it and keep benchmarking.
+            result.failures += 1
+            continue
+        result.latencies.append(time.perf_counter() - start)
+
+    result.peak_rss = get_peak_rss()
+    if free_bytes:
+        result.free_bytes = statistics.mean(free_bytes)
+
+    return result
+
+
+def run(rom: Optional[bytes], num_seeds: int = 10,
+        case_names: Optional[list[str]] = None) -> list[CaseResult]:
+    '''
+    Run each case (default all of get_cases()).  If rom is None, run the
+    synthetic benchmark.
+    '''
+    cases = get_cases()
+    if case_names is not None:
+        cases = {name: cases[name] for name in case_names}
+
+    rando = None if rom is None else \
+        randomizer.Randomizer(rom, is_vanilla=False)
+    seeds = [f'bench{ind}' for ind in range(num_seeds)]
+
+    return [run_case(name, settings, seeds, rando)
+            for name, settings in cases.items()]
+
+
+def get_report(results: list[CaseResult], synthetic: bool) -> dict[str, Any]:
+    return {
+        'synthetic': synthetic,
+        'cases': {result.name: result.to_jot_json() for result in results}
+    }
+
+
+def compare_to_baseline(report: dict[str, Any], baseline: dict[str, Any],
+                        tolerance: float = 0.1) -> list[str]:
+    '''
+    Get a description of each regression of report relative to baseline.
+    A case regresses if its seeds/sec drops or its p95 latency rises by more
+    than tolerance (a fraction), if it fails more seeds, or if it leaves
+    fewer free bytes.
+    '''
+    if report['synthetic'] != baseline.get('synthetic'):
+        return ['Baseline was made with a different rom mode.']
+
+    regressions = []
+    for name, case in report['cases'].items():
+        base = baseline['cases'].get(name)
+        if base is None:
+            continue
+
+        if case['seeds_per_sec'] < base['seeds_per_sec']*(1-tolerance):
+            regressions.append(
+                f"{name}: seeds/sec {case['seeds_per_sec']} < "
+                f"{base['seeds_per_sec']}"
+            )
+        if case['p95'] > base['p95']*(1+tolerance):
+            regressions.append(f"{name}: p95 {case['p95']} > {base['p95']}")
+        if case['failures'] > base['failures']:
+            regressions.append(
+                f"{name}: failures {case['failures']} > {base['failures']}"
+            )
+        if case['free_bytes'] is not None and \
+           base['free_bytes'] is not None and \
+           case['free_bytes'] < base['free_bytes']:
+            regressions.append(
+                f"{name}: free bytes {case['free_bytes']} < "
+                f"{base['free_bytes']}"
+            )
+
+    return regressions
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('rom', type=Path, nargs='?',
+                        help='path to a vanilla ct rom')
+    parser.add_argument('--synthetic', action='store_true',
+                        help='benchmark only the parts which need no rom')
+    parser.add_argument('--seeds', type=int, default=10,
+                        help='number of seeds to generate per case')
+    parser.add_argument('--cases', nargs='+', choices=sorted(get_cases()),
+                        help='cases to run (default all)')
+    parser.add_argument('--save-baseline', type=Path,
+                        help='write the results as a baseline json')
+    parser.add_argument('--baseline', type=Path,
+                        help='compare the results to a baseline json')
+    parser.add_argument('--tolerance', type=float, default=0.1,
+                        help='allowed fractional slowdown (default 0.1)')
+    args = parser.parse_args(argv)
+
+    if (args.rom is None) != args.synthetic:
+        parser.error('Give exactly one of a rom path or --synthetic.')
+
+    rom = None if args.synthetic else read_rom(args.rom)
+    results = run(rom, args.seeds, args.cases)
+    for result in results:
+        print(result)
+
+    report = get_report(results, args.synthetic)
+    if args.save_baseline is not None:
+        args.save_baseline.write_text(json.dumps(report, indent=2))
+
+    if args.baseline is not None:
+        baseline = json.loads(args.baseline.read_text())
+        regressions = compare_to_baseline(report, baseline, args.tolerance)
+        for regression in regressions:
+            print(f'Regression: {regression}')
+        if regressions:
+            return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -81,6 +81,7 @@ def write_fragments_to_config(
         num_fragments: int,
         settings: rset.Settings,
         config: cfg.RandoConfig,
+        rand: random.Random
         ):
     item_db = config.item_db
 
@@ -160,7 +161,7 @@ def write_fragments_to_config(
     #     print(x.getName())
 
     # print('****')
-    fragment_locs = random.sample(avail_locs, num_fragments)
+    fragment_locs = rand.sample(avail_locs, num_fragments)
 
     for x in fragment_locs:
         # print(f'Putting fragment in {x.getName()}')
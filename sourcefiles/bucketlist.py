@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import dataclasses
+import random
 import typing
 
 import bossrandotypes as rotypes
@@ -106,7 +107,8 @@ _boss_names: dict[rotypes.BossID, str] = {
 
 
 def add_objectives_to_config(settings: rset.Settings,
-                             config: cfg.RandoConfig):
+                             config: cfg.RandoConfig,
+                             rand: random.Random):
 
     if rset.GameFlags.BUCKET_LIST not in settings.gameflags:
         return
@@ -190,7 +192,7 @@ def add_objectives_to_config(settings: rset.Settings,
             if dist.get_total_weight() == 0:
                 raise ImpossibleHintException
 
-        chosen_key = dist.get_random_item()
+        chosen_key = dist.get_random_item(rand)
 
         objective = get_obj_from_key(chosen_key, settings, config,
                                      objective_pool[ind])
@@ -208,7 +210,7 @@ def add_objectives_to_config(settings: rset.Settings,
         if isinstance(objective, oty.CollectNFragmentsObjective):
             bucketfragment.write_fragments_to_config(
                 objective.fragments_needed+objective.extra_fragments,
-                settings, config
+                settings, config, rand
             )
 
     config.objectives = objectives
@@ -19,18 +19,20 @@ import randoconfig as cfg
 import randosettings as rset
 
 
-def write_config(settings: rset.Settings, config: cfg.RandoConfig):
-    write_pcs_to_config(settings, config)
+def write_config(settings: rset.Settings, config: cfg.RandoConfig,
+                 rand: random.Random):
+    write_pcs_to_config(settings, config, rand)
     write_items_to_config(settings, config)
 
 
 # This needs to be called BEFORE assigning key items
-def write_pcs_to_config(settings: rset.Settings, config: cfg.RandoConfig):
+def write_pcs_to_config(settings: rset.Settings, config: cfg.RandoConfig,
+                        rand: random.Random):
     # First, choose the locations for each character
     recruit_spots = config.char_assign_dict.keys()
 
     chars = [CharID(i) for i in range(7)]
-    random.shuffle(chars)
+    rand.shuffle(chars)
 
     loc_assign_dict = dict(zip(recruit_spots, chars))
 
@@ -39,7 +41,7 @@ def write_pcs_to_config(settings: rset.Settings, config: cfg.RandoConfig):
     loc = (rset.GameMode.LEGACY_OF_CYRUS == settings.game_mode)
 
     if loc:
-        loc_assign_dict = legacyofcyrus.get_character_assignment()
+        loc_assign_dict = legacyofcyrus.get_character_assignment(rand)
 
     # Scale starting stats depending on the location assignment
     for recruit_spot in config.char_assign_dict.keys():
@@ -71,11 +73,11 @@ def write_pcs_to_config(settings: rset.Settings, config: cfg.RandoConfig):
         if rset.GameFlags.DUPLICATE_CHARS in settings.gameflags:
             for pc_id in CharID:
                 avail_choices = settings.char_settings.choices[int(pc_id)]
-                choices[pc_id] = CharID(random.choice(avail_choices))
+                choices[pc_id] = CharID(rand.choice(avail_choices))
         # unique chars (default for char rando)
         else:
             all_choices = [p for p in permutations(range(0, 7), r=7)]
-            shuffle = random.sample(all_choices, k=len(all_choices))
+            shuffle = rand.sample(all_choices, k=len(all_choices))
             try:
                 permutation = next(
                     p for p in shuffle
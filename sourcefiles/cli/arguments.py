@@ -514,6 +514,62 @@ class RandomizerCLIOptionsAG(ArgumentGroup):
             default=None,
             action='store_true',
         )
+        yield Argument(
+            '--free-space-report',
+            help='write a json summary of free space use by bank and of '
+                 'every allocation made during generation.',
+            default=None,
+            action='store_true',
+        )
+        yield Argument(
+            '--patch',
+            help='also write the seed as a patch against the input rom.',
+            nargs='+',
+            choices=['ips', 'bps'],
+            default=None,
+        )
+        yield Argument(
+            '--no-rom',
+            help='do not write the randomized rom (use with --patch).',
+            default=None,
+            action='store_true',
+        )
+        yield Argument(
+            '--fast-seed-hash',
+            help='compute the seed hash from the settings and a summary of '
+                 'the rom instead of the whole rom.',
+            default=None,
+            action='store_true',
+        )
+        yield Argument(
+            '--profile',
+            help='write json timings and allocations for each generation '
+                 'stage next to the spoiler log.',
+            default=None,
+            action='store_true',
+        )
+        yield Argument(
+            '--dry-run',
+            help='only generate the config and write json spoilers (and '
+                 'spoilers if asked).  The rom is only read if its base '
+                 'data has not been cached yet.',
+            default=None,
+            action='store_true',
+        )
+        yield Argument(
+            '--batch',
+            help='generate this many seeds with the given settings.  The '
+                 'seed option (if given) is used as a prefix for each seed.',
+            default=None,
+            type=int,
+        )
+        yield Argument(
+            '--workers',
+            help='number of processes to use with --batch '
+                 '(default one per cpu)',
+            default=None,
+            type=int,
+        )
 
 
 # list of argument groups related to generation of seeds
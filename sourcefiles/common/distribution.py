@@ -75,20 +75,25 @@ class Distribution(typing.Generic[T]):
         '''
         return self.__total_weight
 
-    def get_random_item(self) -> T:
+    def get_random_item(
+            self,
+            rand: typing.Optional[random.Random] = None
+    ) -> T:
         '''
         Get a random item from the distributuion.
         First choose a weight-object pair based on weights.  Then (uniformly)
-        choose an element of that object.
+        choose an element of that object.  Draws from rand if given and from
+        the global random module otherwise.
         '''
-        target = random.randrange(0, self.__total_weight)
+        rng = random if rand is None else rand
+        target = rng.randrange(0, self.__total_weight)
 
         cum_weight = 0
         for weight, obj in self.weight_object_pairs:
             cum_weight += weight
 
             if cum_weight > target:
-                return random.choice(obj)
+                return rng.choice(obj)
 
         raise ValueError('No choice made.')
 
@@ -12,8 +12,19 @@ except ImportError:
     def compress(source: bytearray) -> bytearray:
         return compress_py_2(source)
 
+# Older builds of ctcompress only have compress, so check for the
+# decompression functions separately.
+try:
+    from ctcompress import decompress, get_compressed_length
+except ImportError:
+    def decompress(rom, start):
+        return decompress_py(rom, start)
+
+    def get_compressed_length(rom: ByteString, addr: int):
+        return get_compressed_length_py(rom, addr)
+
 
-def decompress(rom, start):
+def decompress_py(rom, start):
     out_buffer = bytearray([0 for i in range(0, 0x10000)])
 
     # First two bytes are little endian size of compressed packet
@@ -95,7 +106,7 @@ def decompress(rom, start):
 
 
 # Find the length of a compressed packet
-def get_compressed_length(rom: ByteString, addr: int):
+def get_compressed_length_py(rom: ByteString, addr: int):
 
     # First two bytes determine length of main body
     main_length = get_value_from_bytes(rom[addr:addr+2])
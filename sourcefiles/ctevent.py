@@ -1,7 +1,11 @@
 from __future__ import annotations
+import bisect
+import copy
 import enum
+import hashlib
+from io import BytesIO
 from pathlib import Path
-from typing import ByteString, Optional, Union, Tuple
+from typing import ByteString, Iterable, Optional, Union, Tuple
 
 from ctdecompress import compress, decompress, get_compressed_length, \
     get_compressed_packet
@@ -9,9 +13,10 @@ from ctenums import LocID
 from byteops import get_value_from_bytes, to_little_endian, to_file_ptr, \
     to_rom_ptr
 import ctstrings
-from eventcommand import EventCommand as EC, get_command
+from eventcommand import EventCommand as EC, get_command, \
+    get_command_length
 from eventfunction import EventFunction as EF
-from freespace import FSRom, FSWriteType
+from freespace import FreeSpaceError, FSRom, FSWriteType
 
 
 class FunctionID(enum.IntEnum):
@@ -68,9 +73,7 @@ def get_loc_event_ptr(rom: ByteString, loc_id: int) -> int:
 
     loc_data_st = 0x360000
     event_ind_st = loc_data_st + 14*loc_id + 8
-    print(hex(event_ind_st))
     loc_script_ind = get_value_from_bytes(rom[event_ind_st:event_ind_st+2])
-    print(hex(loc_script_ind))
 
     event_ptr_st = 0x3CF9F0
 
@@ -84,6 +87,23 @@ def get_loc_event_ptr(rom: ByteString, loc_id: int) -> int:
     return event_ptr
 
 
+def get_ct_string_end(rom: ByteString, start_ptr: int) -> int:
+    '''
+    Get the address after the terminating 0 of the string at start_ptr.
+    The search goes a chunk at a time because memoryviews (e.g. from an
+    FSRom's getbuffer()) do not support .index.
+    '''
+    chunk_size = 0x100
+    chunk_st = start_ptr
+    while chunk_st < len(rom):
+        end_ptr = bytes(rom[chunk_st:chunk_st+chunk_size]).find(0)
+        if end_ptr != -1:
+            return chunk_st + end_ptr + 1
+        chunk_st += chunk_size
+
+    raise ValueError('Error, failed to find string end.')
+
+
 def get_location_script(rom, loc_id):
     # Location data begins at 0x360000.
     # Each record is 14 bytes.  Bytes 8 and 9 (0-indexed) hold an index into
@@ -99,6 +119,183 @@ def get_location_script(rom, loc_id):
     return get_compressed_script(rom, loc_script_ind)
 
 
+class _ScriptData(bytearray):
+    '''
+    A bytearray which counts the changes made to it.  An Event uses the count
+    to tell whether its command index is still valid.
+
+    Writes to argument bytes which can not change the layout of commands
+    (jump distances, object numbers, function pointers) go through
+    write_arg, which is not counted.
+    '''
+    version = 0
+
+    def write_arg(self, pos: int, value: int):
+        bytearray.__setitem__(self, pos, value)
+
+    def write_arg_bytes(self, pos: int, value: ByteString):
+        bytearray.__setitem__(self, slice(pos, pos+len(value)), value)
+
+    def __setitem__(self, key, value):
+        bytearray.__setitem__(self, key, value)
+        self.version += 1
+
+    def __delitem__(self, key):
+        bytearray.__delitem__(self, key)
+        self.version += 1
+
+    def __iadd__(self, other):
+        bytearray.__iadd__(self, other)
+        self.version += 1
+        return self
+
+    def __imul__(self, other):
+        bytearray.__imul__(self, other)
+        self.version += 1
+        return self
+
+    def append(self, item):
+        bytearray.append(self, item)
+        self.version += 1
+
+    def extend(self, iterable):
+        bytearray.extend(self, iterable)
+        self.version += 1
+
+    def insert(self, index, item):
+        bytearray.insert(self, index, item)
+        self.version += 1
+
+    def pop(self, index=-1):
+        self.version += 1
+        return bytearray.pop(self, index)
+
+    def remove(self, value):
+        bytearray.remove(self, value)
+        self.version += 1
+
+    def clear(self):
+        bytearray.clear(self)
+        self.version += 1
+
+    def reverse(self):
+        bytearray.reverse(self)
+        self.version += 1
+
+
+def _decode_command_offsets(buf: ByteString, start: int,
+                            end: int) -> list[int]:
+    '''
+    Get the offsets of the commands in buf[start:end].  Raises ValueError if
+    the last command does not end exactly at end.
+    '''
+    offsets = []
+    pos = start
+    while pos < end:
+        offsets.append(pos)
+        pos += get_command_length(buf, pos)
+
+    if pos != end:
+        raise ValueError('Commands do not end at the end of the buffer.')
+
+    return offsets
+
+
+class _CommandIndex:
+    '''
+    The offset and opcode of every command in an Event's data from the start
+    of object 0 to the end of the data.
+
+    Decoding from any command offset gives the same commands as a scan from
+    the start, so a search which begins on an indexed offset can be answered
+    with bisects instead of decoding everything in between.
+    '''
+
+    def __init__(self, data: _ScriptData, start: int):
+        self.version = data.version
+        self.offsets = _decode_command_offsets(data, start, len(data))
+        self.end = len(data)
+
+        self.op_offsets: dict[int, list[int]] = {}
+        for offset in self.offsets:
+            self.op_offsets.setdefault(data[offset], []).append(offset)
+
+    def __contains__(self, pos: int) -> bool:
+        ind = bisect.bisect_left(self.offsets, pos)
+        return ind < len(self.offsets) and self.offsets[ind] == pos
+
+    def get_offsets(self, cmd_id: int, start: int, end: int) -> list[int]:
+        '''Get the offsets in [start, end) of commands with id cmd_id.'''
+        offsets = self.op_offsets.get(cmd_id, [])
+        return offsets[bisect.bisect_left(offsets, start):
+                       bisect.bisect_left(offsets, end)]
+
+    def find(self, cmd_ids: Iterable[int], start: int,
+             end: int) -> Optional[int]:
+        '''Get the first offset in [start, end) of any of cmd_ids.'''
+        best = None
+        for cmd_id in set(cmd_ids):
+            offsets = self.op_offsets.get(cmd_id)
+            if not offsets:
+                continue
+
+            ind = bisect.bisect_left(offsets, start)
+            if ind < len(offsets) and offsets[ind] < end and \
+               (best is None or offsets[ind] < best):
+                best = offsets[ind]
+
+        return best
+
+    def get_span(self, pos: int, num_commands: int) -> Optional[int]:
+        '''
+        Get the number of bytes in the num_commands commands starting at pos,
+        or None if there are not that many.
+        '''
+        ind = bisect.bisect_left(self.offsets, pos)
+        if ind + num_commands > len(self.offsets):
+            return None
+
+        if ind + num_commands == len(self.offsets):
+            return self.end - pos
+
+        return self.offsets[ind + num_commands] - pos
+
+    def insert(self, data: _ScriptData, pos: int, size: int):
+        '''
+        Update the index for size bytes of commands having been inserted at
+        pos, which must be a command offset (or the end).
+        '''
+        new_offsets = _decode_command_offsets(data, pos, pos+size)
+        ind = bisect.bisect_left(self.offsets, pos)
+        self.offsets[ind:] = \
+            new_offsets + [offset+size for offset in self.offsets[ind:]]
+        self.end += size
+
+        for offsets in self.op_offsets.values():
+            ind = bisect.bisect_left(offsets, pos)
+            offsets[ind:] = [offset+size for offset in offsets[ind:]]
+
+        for offset in new_offsets:
+            offsets = self.op_offsets.setdefault(data[offset], [])
+            bisect.insort(offsets, offset)
+
+        self.version = data.version
+
+    def delete(self, data: _ScriptData, pos: int, size: int):
+        '''
+        Update the index for the commands in [pos, pos+size) having been
+        deleted.
+        '''
+        end = pos + size
+        for offsets in (self.offsets, *self.op_offsets.values()):
+            st_ind = bisect.bisect_left(offsets, pos)
+            end_ind = bisect.bisect_left(offsets, end)
+            offsets[st_ind:] = [offset-size for offset in offsets[end_ind:]]
+        self.end -= size
+
+        self.version = data.version
+
+
 # The strategy is to handle the event very similarly to how the game does.
 # The event is just one big list of commands with pointers giving the starts
 # of relevant entities (objects, functions).
@@ -117,16 +314,98 @@ class Event:
         self.modified_strings = False
         self.strings = []
 
+    @property
+    def data(self) -> bytearray:
+        return self._data
+
+    @data.setter
+    def data(self, value: ByteString):
+        if value is getattr(self, '_data', None):
+            return
+
+        if not isinstance(value, _ScriptData):
+            value = _ScriptData(value)
+
+        self._data = value
+        self._cmd_index: Optional[_CommandIndex] = None
+
+    @property
+    def strings(self) -> list[bytearray]:
+        if self._string_source is not None:
+            self.load_strings()
+        return self._strings
+
+    @strings.setter
+    def strings(self, value: list[bytearray]):
+        self._strings = value
+        self._string_source = None
+        self._string_addrs: list[int] = []
+
+    @property
+    def strings_loaded(self) -> bool:
+        '''
+        Whether the strings have been read.  Strings are read lazily when the
+        Event is made by from_rom with a string_source, as
+        ScriptManager(lazy_strings=True) does.
+        '''
+        return self._string_source is None
+
+    def __deepcopy__(self, memo):
+        # Copying the string source would copy a whole rom.  Unless the
+        # source is being replaced (see ScriptManager.copy), read the
+        # strings first.
+        if self._string_source is not None and \
+           id(self._string_source) not in memo:
+            self.load_strings()
+
+        new_event = Event.__new__(Event)
+        memo[id(self)] = new_event
+        for key, value in self.__dict__.items():
+            new_event.__dict__[key] = copy.deepcopy(value, memo)
+
+        return new_event
+
+    def load_strings(self):
+        '''Read any strings which are still on the string source.'''
+        source = self._string_source
+        if source is None:
+            return
+
+        with source.getbuffer() as rom:
+            strings = [Event.__get_ct_string(rom, addr)
+                       for addr in self._string_addrs]
+
+        self.strings = strings
+
+    def _get_command_index(self) -> Optional[_CommandIndex]:
+        '''
+        Get the command index for this script's data, building it if there
+        have been changes to the data that were not made through
+        insert_commands or delete_commands.  Returns None if the data does
+        not decode cleanly from the start of object 0.
+        '''
+        index = self._cmd_index
+        if index is not None and index.version == self._data.version:
+            return index
+
+        try:
+            index = _CommandIndex(self._data, self.get_object_start(0))
+        except (IndexError, ValueError):
+            index = None
+
+        self._cmd_index = index
+        return index
+
     def get_bytearray(self) -> bytearray:
         return bytearray([self.num_objects]) + self.data
 
     @staticmethod
-    def from_rom_location(rom: ByteString, loc_id: int) -> Event:
+    def from_rom_location(rom: ByteString, loc_id: int,
+                          string_source: Optional[BytesIO] = None) -> Event:
         ''' Read an event from the specified game location. '''
 
         ptr = get_loc_event_ptr(rom, loc_id)
-        print(hex(ptr))
-        return Event.from_rom(rom, ptr)
+        return Event.from_rom(rom, ptr, string_source)
 
     @staticmethod
     def from_flux(filename: str):
@@ -209,7 +488,15 @@ class Event:
         return ret_script
 
     @classmethod
-    def from_rom(cls, rom: ByteString, ptr: int) -> Event:
+    def from_rom(cls, rom: ByteString, ptr: int,
+                 string_source: Optional[BytesIO] = None) -> Event:
+        '''
+        Read the event at ptr.  If string_source is given, it must be a
+        BytesIO (e.g. FSRom) with the same contents as rom, and reading the
+        strings is put off until they are first used.  The caller is
+        responsible for not changing the string data in string_source
+        until then.
+        '''
         ret_event = Event()
 
         event = decompress(rom, ptr)
@@ -228,7 +515,7 @@ class Event:
         # ret_event.script_st = get_value_from_bytes(event[0:2])
 
         # Build the strings up.
-        ret_event.__init_strings(rom)
+        ret_event.__init_strings(rom, string_source)
 
         return ret_event
 
@@ -349,90 +636,113 @@ class Event:
 
         return string_index
 
-    # Using the FS object's getbuffer() gives a memoryview which doesn't
-    # support bytearray's .index method.  This is a stupid short method to
-    # extract a string starting at a given address.
     @classmethod
     def __get_ct_string(cls, rom: ByteString, start_ptr: int) -> bytearray:
-        end_ptr = start_ptr
-
-        while rom[end_ptr] != 0 and end_ptr < len(rom):
-            end_ptr += 1
-
-        if end_ptr == len(rom):
-            raise ValueError('Error, failed to find string end.')
+        return bytearray(rom[start_ptr:get_ct_string_end(rom, start_ptr)])
 
-        return bytearray(rom[start_ptr:end_ptr+1])
+    @classmethod
+    def get_string_indices(
+            cls, rom: ByteString, ptr: int
+    ) -> tuple[Optional[int], list[int]]:
+        '''
+        Get the string index and the sorted string indices used by the script
+        at ptr without reading (or renumbering) any strings.
+        '''
+        event = decompress(rom, ptr)
+        script = cls()
+        script.data = event[1:]
+        script.num_objects = event[0]
 
-    # This is only called during initialization of a script
-    # We need access to the whole rom to look up the strings used by the script
-    def __init_strings(self, rom: ByteString):
-
-        # First find the location where string pointers are stored by finding
-        # the "string index" command in the script.
-        pos = self.get_object_start(0)
+        str_pos, str_addrs = script.__find_string_commands()
+        return str_pos, sorted(set(script.data[addr] for addr in str_addrs))
 
+    def __find_string_commands(self) -> tuple[Optional[int], list[int]]:
+        '''
+        In one pass, find the string index (from the last 0xB8 command) and
+        the position of each string command's index argument.
+        '''
         str_pos = None
-        while pos < len(self.data):
-            cmd = get_command(self.data, pos)
-
-            if cmd.command == 0xB8:
-                str_pos = cmd.args[0]
-                # print(cmd)
+        str_addrs = []
 
-                # The string index should only be set once
-                # break
+        index = self._get_command_index()
+        if index is not None:
+            offsets = index.op_offsets.get(0xB8)
+            if offsets:
+                pos = offsets[-1]
+                str_pos = int.from_bytes(self.data[pos+1:pos+4], 'little')
 
-            pos += len(cmd)
+            for cmd_id in EC.str_commands:
+                str_addrs.extend(
+                    pos+1 for pos in index.op_offsets.get(cmd_id, [])
+                )
 
-        self.modified_strings = False
-        # indices that are used
-        str_indices = set()
-
-        # addresses in the script data where an index is located
-        # store these to go back and update the indices if we have to
-        str_addrs = []
+            return str_pos, str_addrs
 
+        str_cmds = set(EC.str_commands)
         pos = self.get_object_start(0)
         while pos < len(self.data):
-            cmd = get_command(self.data, pos)
-
-            if cmd.command in EC.str_commands:
+            cmd_id = self.data[pos]
+            if cmd_id == 0xB8:
+                str_pos = int.from_bytes(self.data[pos+1:pos+4], 'little')
+            elif cmd_id in str_cmds:
                 # string index argument is 0th arg
-                str_indices.add(cmd.args[0])
                 str_addrs.append(pos+1)
 
-            pos += len(cmd)
+            pos += get_command_length(self.data, pos)
+
+        return str_pos, str_addrs
+
+    # This is only called during initialization of a script
+    # We need access to the whole rom to look up the strings used by the script
+    def __init_strings(self, rom: ByteString,
+                       string_source: Optional[BytesIO] = None):
+
+        # Find the location where string pointers are stored (from the
+        # "string index" command) and the addresses in the script data where
+        # a string index is located.  Store the addresses to go back and
+        # update the indices if we have to.
+        str_pos, str_addrs = self.__find_string_commands()
 
-        # turn str_indices into a sorted list
-        str_indices_list = sorted(list(str_indices))
+        self.modified_strings = False
+
+        # turn the used indices into a sorted list
+        str_indices_list = sorted(set(self.data[addr] for addr in str_addrs))
         self.strings = []
 
-        if str_indices:
+        if str_indices_list:
             if str_pos is None:
                 raise ValueError('Strings present but no string index set.')
 
             bank = (str_pos >> 16) << 16
             bank = to_file_ptr(bank)
 
+            str_starts = []
             for index in str_indices_list:
                 # string ptrs are 2 byte ptrs local to the string_pos bank
                 ptr_st = to_file_ptr(str_pos+2*index)
-                str_st = get_value_from_bytes(rom[ptr_st:ptr_st+2])+bank
-
-                self.strings.append(Event.__get_ct_string(rom, str_st))
+                str_starts.append(
+                    get_value_from_bytes(rom[ptr_st:ptr_st+2])+bank
+                )
 
-                # print(' '.join(f"{x:02X}" for x in self.strings[-1]))
-                # input()
+            if string_source is None:
+                self.strings = [Event.__get_ct_string(rom, str_st)
+                                for str_st in str_starts]
+            else:
+                self._string_source = string_source
+                self._string_addrs = str_starts
 
             # Go back to the script and update the indices if any changed
+            new_indices = {
+                index: new_index
+                for new_index, index in enumerate(str_indices_list)
+            }
 
             for addr in str_addrs:
-                new_ind = str_indices_list.index(self.data[addr])
+                new_ind = new_indices[self.data[addr]]
 
                 if new_ind != self.data[addr]:
                     self.modified_strings = True
-                    self.data[addr] = new_ind
+                    self.data.write_arg(addr, new_ind)
 
         # end if there are any strings
 
@@ -543,9 +853,9 @@ class Event:
                         # print(f"[{pos:04X}] " + str(cmd))
                         # input()
                         if is_deletion:
-                            self.data[pos+1] -= 2
+                            self.data.write_arg(pos+1, self.data[pos+1]-2)
                         else:
-                            self.data[pos+1] += 2
+                            self.data.write_arg(pos+1, self.data[pos+1]+2)
                     pos += len(cmd)
 
     def __remove_shift_object_calls(self, obj_id):
@@ -576,7 +886,7 @@ class Event:
                         # print('shifting')
                         # print(f"[{pos:04X}] " + str(cmd))
                         # input()
-                        self.data[pos+1] -= 2
+                        self.data.write_arg(pos+1, self.data[pos+1]-2)
                     pos += len(cmd)
 
     def remove_object_calls(self, obj_id):
@@ -747,7 +1057,7 @@ class Event:
 
     def _set_function_start(self, obj_id, func_id, new_start):
         ptr_st = obj_id*32 + func_id*2
-        self.data[ptr_st:ptr_st+2] = int.to_bytes(new_start, 2, 'little')
+        self.data.write_arg_bytes(ptr_st, int.to_bytes(new_start, 2, 'little'))
 
     def set_function(self, obj_id: int, func_id: int,
                      ev_func: EF):
@@ -979,7 +1289,7 @@ class Event:
                 self.insert_commands(cmd.to_bytearray(), start)
         else:
             str_ind_bytes = to_little_endian(rom_ptr, 3)
-            self.data[pos+1:pos+4] = str_ind_bytes
+            self.data.write_arg_bytes(pos+1, str_ind_bytes)
 
     def find_command_opt(
             self, cmd_ids: list[int],
@@ -999,14 +1309,20 @@ class Event:
 
         # print(f"{start_pos:04X}, {end_pos:04X}")
 
-        pos = start_pos
-        while pos < end_pos:
-            cmd = get_command(self.data, pos)
+        index = self._get_command_index()
+        if index is not None and start_pos in index:
+            found_pos = index.find(cmd_ids, start_pos, end_pos)
+            if found_pos is not None:
+                return (found_pos, get_command(self.data, found_pos))
+        else:
+            pos = start_pos
+            while pos < end_pos:
+                cmd = get_command(self.data, pos)
 
-            if cmd.command in cmd_ids:
-                return (pos, cmd)
+                if cmd.command in cmd_ids:
+                    return (pos, cmd)
 
-            pos += len(cmd)
+                pos += len(cmd)
 
         # returning colorcrash so mypy doesn't want Optional[Event]
         return (None, EC.get_blank_command(1))
@@ -1045,8 +1361,17 @@ class Event:
 
         jump_cmds = EC.fwd_jump_commands + EC.back_jump_commands
 
-        pos = start_pos
-        while pos < end_pos:
+        # Only commands with the same id can match, so when the index is
+        # usable only those need to be decoded.
+        index = self._get_command_index()
+        if index is not None and start_pos in index:
+            positions: Iterable[int] = index.get_offsets(
+                find_cmd.command, start_pos, end_pos
+            )
+        else:
+            positions = self.__iter_command_offsets(start_pos, end_pos)
+
+        for pos in positions:
             cmd = get_command(self.data, pos)
 
             if cmd == find_cmd:
@@ -1058,10 +1383,14 @@ class Event:
             ):
                 return pos
 
-            pos += len(cmd)
-
         return None
 
+    def __iter_command_offsets(self, start_pos: int, end_pos: int):
+        pos = start_pos
+        while pos < end_pos:
+            yield pos
+            pos += get_command_length(self.data, pos)
+
     def find_exact_command(
             self, find_cmd: EC,
             start_pos: Optional[int] = None,
@@ -1130,7 +1459,8 @@ class Event:
 
             if can_shift_aft and start < before_pos:
                 arg_offset = len(cmd) - cmd.arg_lens[-1]
-                self.data[pos+arg_offset] += shift
+                self.data.write_arg(pos+arg_offset,
+                                    self.data[pos+arg_offset] + shift)
             else:
                 pass
                 # print('not shifting')
@@ -1155,7 +1485,8 @@ class Event:
             ptr_loc = get_value_from_bytes(self.data[ptr:ptr+2])
 
             if ptr_loc > start_thresh:
-                self.data[ptr:ptr+2] = to_little_endian(ptr_loc+shift, 2)
+                self.data.write_arg_bytes(ptr,
+                                          to_little_endian(ptr_loc+shift, 2))
 
     def __shift_calls_back(self, deleted_obj: int):
         pos: Optional[int] = self.get_function_start(0, 0)
@@ -1169,7 +1500,7 @@ class Event:
             if cmd.args[0] > 2*deleted_obj:
                 # print(f"shifted [{pos:04X}] " + str(cmd))
                 # input()
-                self.data[pos+1] -= 2
+                self.data.write_arg(pos+1, self.data[pos+1]-2)
 
             pos += len(cmd)
 
@@ -1185,7 +1516,7 @@ class Event:
             if cmd.args[0] > 2*inserted_obj:
                 # print(f"shifted [{pos:04X}] " + str(cmd))
                 # input()
-                self.data[pos+1] += 2
+                self.data.write_arg(pos+1, self.data[pos+1]+2)
 
             pos += len(cmd)
 
@@ -1216,17 +1547,26 @@ class Event:
     # This is for short removals
     def delete_commands(self, del_pos: int, num_commands: int = 1):
 
-        pos = del_pos
-        cmd_len = 0
-
-        for _ in range(num_commands):
-            if pos >= len(self.data):
+        index = self._get_command_index()
+        if index is not None and del_pos in index:
+            span = index.get_span(del_pos, num_commands)
+            if span is None:
                 print("Error: Deleting out of script's range.")
                 raise ValueError
+            cmd_len = span
+        else:
+            index = None
+            pos = del_pos
+            cmd_len = 0
 
-            cmd = get_command(self.data, pos)
-            cmd_len += len(cmd)
-            pos += len(cmd)
+            for _ in range(num_commands):
+                if pos >= len(self.data):
+                    print("Error: Deleting out of script's range.")
+                    raise ValueError
+
+                cmd = get_command(self.data, pos)
+                cmd_len += len(cmd)
+                pos += len(cmd)
 
         pos = del_pos
 
@@ -1238,6 +1578,8 @@ class Event:
                             shift=-cmd_len)
 
         del self.data[del_pos:del_pos+cmd_len]
+        if index is not None:
+            index.delete(self._data, del_pos, cmd_len)
 
     def delete_commands_range(self, del_start_pos: int, del_end_pos: int):
         print("Deleting {:02X}-{:02X}".format(del_start_pos, del_end_pos))
@@ -1319,8 +1661,20 @@ class Event:
         self.__shift_jumps(ins_position, ins_position, len(new_commands))
         self.__shift_starts(ins_position, len(new_commands))
 
+        index = self._get_command_index()
+        can_update = index is not None and (
+            ins_position in index or ins_position == index.end
+        )
+
         self.data[ins_position:ins_position] = new_commands
 
+        if can_update and index is not None:
+            try:
+                index.insert(self._data, ins_position, len(new_commands))
+            except (IndexError, ValueError):
+                # The inserted bytes are not whole commands.
+                self._cmd_index = None
+
 
     @staticmethod
     def _get_flux_path(filename: Union[Path, str]) -> Path:
@@ -1341,30 +1695,192 @@ def get_compressed_event_length(rom: ByteString, loc_id: int) -> int:
     return get_compressed_length(rom, ptr)
 
 
+class StringPool:
+    '''
+    The strings a ScriptManager has written for its scripts.
+
+    String pointers are local to the bank of a script's pointer table, so a
+    script can point at an identical string already in the pool as long as
+    the string is in the same bank as the script's pointer table.
+    '''
+    def __init__(self):
+        # payload -> {bank: address of the payload in that bank}
+        self.addr_dict: dict[bytes, dict[int, int]] = {}
+        self.bytes_deduplicated = 0
+        self.bytes_reclaimed = 0
+
+    def copy(self) -> StringPool:
+        new_pool = StringPool()
+        new_pool.addr_dict = {
+            payload: dict(bank_addrs)
+            for payload, bank_addrs in self.addr_dict.items()
+        }
+        new_pool.bytes_deduplicated = self.bytes_deduplicated
+        new_pool.bytes_reclaimed = self.bytes_reclaimed
+        return new_pool
+
+    def get_bank_addrs(self, payload: bytes) -> dict[int, int]:
+        '''Get a dict bank -> address of the copies of payload.'''
+        return self.addr_dict.get(payload, {})
+
+    def add_string(self, payload: bytes, addr: int):
+        self.addr_dict.setdefault(payload, {})[addr >> 16] = addr
+
+    def discard_blocks(self, blocks: list[tuple[int, int]]):
+        '''Forget strings which begin in any of the sorted blocks.'''
+        starts = [block[0] for block in blocks]
+        for payload in list(self.addr_dict):
+            bank_addrs = self.addr_dict[payload]
+            for bank, addr in list(bank_addrs.items()):
+                ind = bisect.bisect_right(starts, addr) - 1
+                if ind >= 0 and addr < blocks[ind][1]:
+                    del bank_addrs[bank]
+
+            if not bank_addrs:
+                del self.addr_dict[payload]
+
+    def get_report(self) -> dict[str, int]:
+        return {
+            'pooled_strings': sum(len(bank_addrs) for bank_addrs
+                                  in self.addr_dict.values()),
+            'bytes_deduplicated': self.bytes_deduplicated,
+            'bytes_reclaimed': self.bytes_reclaimed
+        }
+
+
+def _merge_blocks(blocks: Iterable[tuple[int, int]]) -> list[tuple[int, int]]:
+    '''Merge overlapping or touching [start, end) blocks.'''
+    merged: list[tuple[int, int]] = []
+    for start, end in sorted(blocks):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+
+    return merged
+
+
+def _subtract_blocks(
+        blocks: list[tuple[int, int]],
+        removed: list[tuple[int, int]]
+) -> list[tuple[int, int]]:
+    '''Get the parts of the merged blocks which miss the merged removed.'''
+    result = []
+    ind = 0
+    for start, end in blocks:
+        while ind < len(removed) and removed[ind][1] <= start:
+            ind += 1
+
+        rem_ind = ind
+        while rem_ind < len(removed) and removed[rem_ind][0] < end:
+            rem_start, rem_end = removed[rem_ind]
+            if rem_start > start:
+                result.append((start, rem_start))
+            start = max(start, rem_end)
+            rem_ind += 1
+
+        if start < end:
+            result.append((start, end))
+
+    return result
+
+
 # Class for reading scripts from an FSRom and writing them back out.
 # The main job of this class is to avoid reading the same script many times
 # when changing a location's key items, sealed chests, bosses, etc.
 # Writes back to the rom respect the FSRom's free space.
 class ScriptManager:
 
+    # Compressed scripts keyed by a digest of the uncompressed script.  This
+    # is shared by every ScriptManager so that a script which is written the
+    # same way in many seeds is only compressed once per process.  Entries
+    # are kept in least recently used order.
+    compression_cache: dict[bytes, bytes] = {}
+    compression_cache_size: int = 1024
+
+    # (string index, string indices) keyed by a digest of the compressed
+    # script.  See get_rom_string_refs.
+    string_index_cache: dict[bytes, tuple[Optional[int], list[int]]] = {}
+    string_index_cache_size: int = 4096
+
+    # Number of entries in the location data.  Not every one has a LocID.
+    num_locations: int = 0x200
+
     def __init__(self, fsrom: FSRom,
                  location_list: list[LocID],
                  loc_data_ptr=0x360000,
-                 event_data_ptr=0x3CF9F0):
+                 event_data_ptr=0x3CF9F0,
+                 lazy_strings: bool = False):
+        '''
+        If lazy_strings is set, scripts read their strings from fsrom the
+        first time they are used rather than when the script is read.  Only
+        use this when nothing overwrites string data in fsrom while scripts
+        are held by the manager.
+        '''
         self.fsrom = fsrom
+        self.lazy_strings = lazy_strings
 
         self.script_dict: dict[LocID, Event] = {}
         self.orig_len_dict: dict[LocID, int] = {}
 
+        # Digest of each script as it is on the rom.  A script whose digest
+        # still matches when it is written is left where it is.
+        self.orig_digest_dict: dict[LocID, Optional[bytes]] = {}
+
+        # Strings written by this manager, and the (pointer, string)
+        # addresses used by rewritten scripts which may now be unused.
+        self.string_pool = StringPool()
+        self.released_string_refs: set[tuple[int, int]] = set()
+
         # TODO: Just read the ptr from the rom since we have it.
         self.loc_data_ptr = loc_data_ptr
         self.event_data_ptr = event_data_ptr
 
         for loc_id in location_list:
-            self.script_dict[loc_id] = \
-                Event.from_rom_location(self.fsrom.getbuffer(), loc_id)
-            self.orig_len_dict[loc_id] = \
-                get_compressed_event_length(self.fsrom.getbuffer(), loc_id)
+            self.get_script(loc_id)
+
+    def copy(self, fsrom: FSRom) -> ScriptManager:
+        '''
+        Get a ScriptManager for fsrom (usually a copy of this manager's
+        rom) with independent copies of all of this manager's scripts.
+        '''
+        new_manager = ScriptManager(fsrom, [], self.loc_data_ptr,
+                                    self.event_data_ptr, self.lazy_strings)
+
+        # Scripts with unread strings read them from the new rom.
+        new_manager.script_dict = copy.deepcopy(self.script_dict,
+                                                {id(self.fsrom): fsrom})
+        new_manager.orig_len_dict = dict(self.orig_len_dict)
+        new_manager.orig_digest_dict = dict(self.orig_digest_dict)
+        new_manager.string_pool = self.string_pool.copy()
+        new_manager.released_string_refs = set(self.released_string_refs)
+        return new_manager
+
+    @staticmethod
+    def get_script_digest(data: ByteString) -> bytes:
+        '''Get the digest used to compare and cache uncompressed scripts.'''
+        return hashlib.blake2b(data, digest_size=16).digest()
+
+    @classmethod
+    def compress_script(cls, data: ByteString,
+                        digest: Optional[bytes] = None) -> bytes:
+        '''
+        Compress data, reusing the result of an earlier call with the same
+        data if it is still in the compression cache.
+        '''
+        if digest is None:
+            digest = cls.get_script_digest(data)
+
+        cache = cls.compression_cache
+        compr_event = cache.pop(digest, None)
+        if compr_event is None:
+            compr_event = bytes(compress(data))
+            while cache and len(cache) >= cls.compression_cache_size:
+                del cache[next(iter(cache))]
+
+        cache[digest] = compr_event
+        return compr_event
 
     # A note:  If a script obtained by get_script is edited it will edit
     # the copy in the manager.  This is how I think it should be since
@@ -1372,11 +1888,22 @@ class ScriptManager:
     # clunky.
     def get_script(self, loc_id: LocID) -> Event:
         if loc_id not in self.script_dict:
-            self.script_dict[loc_id] = \
-                Event.from_rom_location(self.fsrom.getbuffer(), loc_id)
+            script = Event.from_rom_location(
+                self.fsrom.getbuffer(), loc_id,
+                self.fsrom if self.lazy_strings else None
+            )
+            self.script_dict[loc_id] = script
             self.orig_len_dict[loc_id] = \
                 get_compressed_event_length(self.fsrom.getbuffer(), loc_id)
 
+            # If reading the strings changed the script then it can not be
+            # left as it is on the rom.
+            if script.modified_strings:
+                self.orig_digest_dict[loc_id] = None
+            else:
+                self.orig_digest_dict[loc_id] = \
+                    self.get_script_digest(script.get_bytearray())
+
         return self.script_dict[loc_id]
 
     def set_script(self, script, loc_id: LocID):
@@ -1386,27 +1913,191 @@ class ScriptManager:
 
         self.script_dict[loc_id] = script
 
+    def is_script_unchanged(self, loc_id: LocID) -> bool:
+        '''
+        Determine whether the script for loc_id is the same as what is
+        already on the rom, so that writing it would change nothing.
+        '''
+        orig_digest = self.orig_digest_dict.get(loc_id, None)
+        script = self.script_dict.get(loc_id, None)
+        if orig_digest is None or script is None or script.modified_strings:
+            return False
+
+        return self.get_script_digest(script.get_bytearray()) == orig_digest
+
+    def get_rom_string_refs(self, loc_id: int) -> list[tuple[int, int]]:
+        '''
+        Get the (pointer address, string address) of each string used by
+        the script which is currently on the rom for loc_id.
+        '''
+        with self.fsrom.getbuffer() as rom:
+            ptr = get_loc_event_ptr(rom, loc_id)
+            digest = self.get_script_digest(
+                rom[ptr:ptr+get_compressed_length(rom, ptr)]
+            )
+
+            cache = self.string_index_cache
+            str_indices = cache.pop(digest, None)
+            if str_indices is None:
+                str_indices = Event.get_string_indices(rom, ptr)
+                while cache and len(cache) >= self.string_index_cache_size:
+                    del cache[next(iter(cache))]
+            cache[digest] = str_indices
+
+            str_pos, indices = str_indices
+            if str_pos is None:
+                return []
+
+            bank = to_file_ptr((str_pos >> 16) << 16)
+            refs = []
+            for index in indices:
+                ptr_st = to_file_ptr(str_pos+2*index)
+                refs.append(
+                    (ptr_st, get_value_from_bytes(rom[ptr_st:ptr_st+2])+bank)
+                )
+
+        return refs
+
     def free_script(self, loc_id: LocID):
-        script = self.get_script(loc_id)
+        self.get_script(loc_id)
         script_ptr = get_loc_event_ptr(self.fsrom.getbuffer(), loc_id)
         script_compr_len = self.orig_len_dict[loc_id]
 
         spaceman = self.fsrom.space_manager
 
-        if script.modified_strings:
-            # Do something to free the strings.
-            # This will take some more sophistication to do correctly.
-            pass
+        # Other scripts may use the same strings, so they are only freed by
+        # reclaim_strings once nothing uses them.
+        self.released_string_refs.update(self.get_rom_string_refs(loc_id))
 
         spaceman.mark_block((script_ptr, script_ptr+script_compr_len),
                             FSWriteType.MARK_FREE)
 
+    def reclaim_strings(self) -> int:
+        '''
+        Free the pointers and strings of rewritten scripts which no script
+        on the rom uses any more.  Returns the number of bytes freed.
+        '''
+        if not self.released_string_refs:
+            return 0
+
+        # Scripts which have not read their strings may be reading from
+        # the blocks about to be freed.
+        for script in self.script_dict.values():
+            script.load_strings()
+
+        live_ptrs, live_strs = set(), set()
+        try:
+            for loc_id in range(self.num_locations):
+                for ptr_st, str_st in self.get_rom_string_refs(loc_id):
+                    live_ptrs.add(ptr_st)
+                    live_strs.add(str_st)
+        except (IndexError, ValueError):
+            # Some location's script can't be read, so it's unknown what is
+            # still in use.  Keep everything for now.
+            return 0
+
+        released_ptrs = {ref[0] for ref in self.released_string_refs}
+        released_strs = {ref[1] for ref in self.released_string_refs}
+
+        with self.fsrom.getbuffer() as rom:
+            live_blocks = _merge_blocks(
+                [(ptr, ptr+2) for ptr in live_ptrs] +
+                [(st, get_ct_string_end(rom, st)) for st in live_strs]
+            )
+            free_blocks = _merge_blocks(
+                [(ptr, ptr+2) for ptr in released_ptrs - live_ptrs] +
+                [(st, get_ct_string_end(rom, st))
+                 for st in released_strs - live_strs]
+            )
+
+        free_blocks = _subtract_blocks(free_blocks, live_blocks)
+        spaceman = self.fsrom.space_manager
+        for block in free_blocks:
+            spaceman.mark_block(block, FSWriteType.MARK_FREE)
+
+        self.string_pool.discard_blocks(free_blocks)
+        self.released_string_refs.clear()
+
+        num_freed = sum(end - start for (start, end) in free_blocks)
+        self.string_pool.bytes_reclaimed += num_freed
+        return num_freed
+
+    def __write_strings(self, strings: list[bytearray]) -> int:
+        '''
+        Write a pointer table for strings followed by any strings which are
+        not already in the pool in the table's bank.  Returns the address
+        of the pointer table.
+        '''
+        spaceman = self.fsrom.space_manager
+        pool = self.string_pool
+
+        payloads = [bytes(string) for string in strings]
+        unique_payloads = list(dict.fromkeys(payloads))
+        ptrs_len = 2*len(payloads)
+
+        # Try the banks which already hold the most of these strings.
+        bank_savings: dict[int, int] = {}
+        for payload in unique_payloads:
+            for bank in pool.get_bank_addrs(payload):
+                bank_savings[bank] = bank_savings.get(bank, 0) + len(payload)
+
+        string_index, bank_addrs = None, {}
+        for bank in sorted(bank_savings, key=lambda b: (-bank_savings[b], b)):
+            bank_addrs = {
+                payload: pool.get_bank_addrs(payload)[bank]
+                for payload in unique_payloads
+                if bank in pool.get_bank_addrs(payload)
+            }
+            new_len = ptrs_len + sum(len(payload)
+                                     for payload in unique_payloads
+                                     if payload not in bank_addrs)
+            try:
+                addr = spaceman.get_free_addr(new_len, bank << 16)
+            except FreeSpaceError:
+                continue
+
+            if addr >> 16 == bank:
+                string_index = addr
+                break
+
+        if string_index is None:
+            # Note: fsrom doesn't let the block cross bank boundaries
+            bank_addrs = {}
+            string_index = spaceman.get_free_addr(
+                ptrs_len + sum(len(payload) for payload in unique_payloads)
+            )
+
+        # Lay out the strings which need to be written after the pointers.
+        str_addrs = dict(bank_addrs)
+        new_strings = bytearray()
+        for payload in unique_payloads:
+            if payload not in str_addrs:
+                str_addrs[payload] = string_index + ptrs_len + len(new_strings)
+                new_strings.extend(payload)
+                pool.add_string(payload, str_addrs[payload])
+
+        ptrs = b''.join(to_little_endian(str_addrs[payload] % 0x10000, 2)
+                        for payload in payloads)
+
+        if ptrs:
+            self.fsrom.seek(string_index)
+            self.fsrom.write(ptrs + new_strings, FSWriteType.MARK_USED)
+
+        pool.bytes_deduplicated += \
+            sum(len(payload) for payload in payloads) - len(new_strings)
+
+        return string_index
+
     # writes the script to the specified locations
     def write_script_to_rom(self, loc_id: LocID, free_old: bool = True):
         # print('calling wstr', loc_id)
 
         spaceman = self.fsrom.space_manager
 
+        # Scripts which were only read (or were changed back) stay put.
+        if free_old and self.is_script_unchanged(loc_id):
+            return
+
         if free_old:
             self.free_script(loc_id)
 
@@ -1414,31 +2105,13 @@ class ScriptManager:
 
         if script.modified_strings:
             # We need to find space for the new strings
-            strings_len = sum(len(x) for x in script.strings)
-            ptrs_len = 2*len(script.strings)
-            total_len = strings_len + ptrs_len
-
-            # Note: fsrom doesn't let the block cross bank boundaries
-            string_index = spaceman.get_free_addr(total_len)
-
-            # str_pos tracks where the pointer needs to point
-            str_pos = string_index % 0x10000 + ptrs_len
-            self.fsrom.seek(string_index)
-
-            # Write the pointers
-            for i in range(len(script.strings)):
-                self.fsrom.write(to_little_endian(str_pos, 2),
-                                 FSWriteType.MARK_USED)
-                str_pos += len(script.strings[i])
-
-            # Write the strings immediately afterwards
-            for x in script.strings:
-                self.fsrom.write(x, FSWriteType.MARK_USED)
-
+            string_index = self.__write_strings(script.strings)
             script.set_string_index(to_rom_ptr(string_index))
 
         # The rest is mostly straightforward
-        compr_event = compress(script.get_bytearray())
+        event_data = script.get_bytearray()
+        digest = self.get_script_digest(event_data)
+        compr_event = self.compress_script(event_data, digest)
         script_ptr = spaceman.get_free_addr(len(compr_event))
 
         self.fsrom.seek(script_ptr)
@@ -1461,6 +2134,7 @@ class ScriptManager:
         # Just in case we end up modifying and writing again.
         script.modified_strings = False
         self.orig_len_dict[loc_id] = len(compr_event)
+        self.orig_digest_dict[loc_id] = digest
     # End of write_script_to_rom
 # End class ScriptManager
 
@@ -1,4 +1,9 @@
+from __future__ import annotations
+import contextlib
 import hashlib
+import mmap
+from pathlib import Path
+from typing import Iterator, Union
 
 import ctevent
 import freespace
@@ -12,6 +17,22 @@ class RomFormatException(Exception):
     pass
 
 
+@contextlib.contextmanager
+def map_rom_file(filename: Union[str, Path]) -> Iterator[memoryview]:
+    '''
+    Map a rom file read-only.  Pages are read as they are used and are
+    shared with every other process which maps the same file.  The view (and
+    any slices of it) must not be used after the context exits.
+    '''
+    with open(filename, 'rb') as infile:
+        with mmap.mmap(infile.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            view = memoryview(mapped)
+            try:
+                yield view
+            finally:
+                view.release()
+
+
 # CTRom is just a combination FSRom and ScriptManager
 # It needs to have all of the information that other modules need to make
 # freespace-aware changes to the rom.
@@ -31,19 +52,37 @@ class CTRom():
 
     @classmethod
     def from_file(cls, filename: str, ignore_checksum=False):
-        with open(filename, 'rb') as infile:
-            rom_bytes = infile.read()
+        with map_rom_file(filename) as rom_view:
+            if not ignore_checksum and \
+               not CTRom.validate_ct_rom_bytes(rom_view):
+                raise InvalidRomException('Bad checksum.')
+            rom_bytes = bytes(rom_view)
+
+        return cls(rom_bytes, True)
 
-        return cls(rom_bytes, ignore_checksum)
+    def copy(self) -> CTRom:
+        '''
+        Get an independent copy of this CTRom.  The copy includes the free
+        space markers and any scripts which have not been written yet.
+        '''
+        new_ctrom = CTRom.__new__(CTRom)
+        new_ctrom.rom_data = self.rom_data.copy()
+        new_ctrom.script_manager = self.script_manager.copy(
+            new_ctrom.rom_data
+        )
+        return new_ctrom
 
     def write_all_scripts_to_rom(self, clear_scripts: bool = True):
         script_dict = self.script_manager.script_dict
         for loc_id in script_dict:
             self.script_manager.write_script_to_rom(loc_id)
 
+        self.script_manager.reclaim_strings()
+
         if clear_scripts:
             self.script_manager.script_dict = {}
             self.script_manager.orig_len_dict = {}
+            self.script_manager.orig_digest_dict = {}
 
     @staticmethod
     def validate_ct_rom_file(filename: str) -> bool:
@@ -89,9 +128,10 @@ class CTRom():
     def fix_snes_checksum(self):
         rom = self.rom_data
 
-        if len(rom.getbuffer()) == 0x400000:
+        rom_size = len(rom.getvalue())
+        if rom_size == 0x400000:
             exhirom = False
-        elif len(rom.getbuffer()) == 0x600000:
+        elif rom_size == 0x600000:
             exhirom = True
         else:
             raise InvalidRomException('Invalid ROM size.')
@@ -104,20 +144,13 @@ class CTRom():
             rom.seek(0x40FFDC)
             rom.write(int(0xFFFF0000).to_bytes(4, 'little'))
 
-        def get_checksum(byte_seq: bytes) -> int:
-            # return functools.reduce(
-            #     lambda x, y: (x+y) % 0x10000,
-            #     byte_seq,
-            #     0
-            # )
-            return sum(byte_seq) % 0x10000
-
-        # Compute the checksum of the first 0x400000
-        checksum = get_checksum(self.rom_data.getbuffer()[0:0x400000])
+        # Compute the checksum of the first 0x400000.  The FSRom keeps the
+        # byte sums up to date, so only changed pages are summed here.
+        checksum = rom.get_byte_sum(0, 0x400000) % 0x10000
 
         # Compute twice the expanded 2MB if exhirom
         if exhirom:
-            checksum += 2*get_checksum(rom.getbuffer()[0x400000:0x600000])
+            checksum += 2*rom.get_byte_sum(0x400000, 0x600000)
             checksum = checksum % 0x10000
 
         inverse_checksum = checksum ^ 0xFFFF
@@ -577,7 +577,7 @@ class EnemyAIDB:
     @classmethod
     def from_ctrom(cls, ct_rom: ctrom.CTRom):
         '''Read the AI data from the given CTRom.'''
-        return cls.from_rom(ct_rom.rom_data.getbuffer())
+        return cls.from_rom(ct_rom.rom_data.get_view())
 
     def write_to_ctrom(self, ct_rom: ctrom.CTRom):
         '''Writes out new AI data to the given CTRom.'''
@@ -223,7 +223,7 @@ class EnemyStats:
     @classmethod
     def from_ctrom(cls, ct_rom: ctrom.CTRom, enemy_id: ctenums.EnemyID):
         '''Read enemy stats from a CTRom.'''
-        return cls.from_rom(ct_rom.rom_data.getbuffer(), enemy_id)
+        return cls.from_rom(ct_rom.rom_data.get_view(), enemy_id)
 
     def write_to_ctrom(self, ct_rom: ctrom.CTRom, enemy_id: ctenums.EnemyID):
         '''Write enemy stats to a CTRom.'''
@@ -509,9 +509,9 @@ def get_sprite_dict_from_ctrom(
         ct_rom: ctrom.CTRom
         ) -> dict[ctenums.EnemyID, EnemySpriteData]:
     '''Build a dictionary EnemyID -> EnemySpriteData from a CTRom.'''
+    rom = ct_rom.rom_data.get_view()
     sprite_dict = {
-        enemy_id: EnemySpriteData.from_rom(ct_rom.rom_data.getbuffer(),
-                                           enemy_id)
+        enemy_id: EnemySpriteData.from_rom(rom, enemy_id)
         for enemy_id in ctenums.EnemyID
     }
 
@@ -521,21 +521,19 @@ def get_sprite_dict_from_ctrom(
 def get_stat_dict_from_ctrom(ct_rom: ctrom.CTRom) -> dict[ctenums.EnemyID,
                                                           EnemyStats]:
     '''Build a dictionary EnemyID -> EnemyStats from a CTRom.'''
-    stat_dict = {
-        enemy_id: EnemyStats.from_ctrom(ct_rom, enemy_id)
-        for enemy_id in ctenums.EnemyID
-    }
-
-    return stat_dict
+    return get_stat_dict_from_rom(ct_rom.rom_data.get_view())
 
 
 def get_stat_dict_from_rom(
         rom: bytes
 ) -> dict[ctenums.EnemyID, EnemyStats]:
     '''Build a dictionary EnemyID -> EnemyStats from a rom.'''
-    ct_rom = ctrom.CTRom(rom, True)
+    stat_dict = {
+        enemy_id: EnemyStats.from_rom(rom, enemy_id)
+        for enemy_id in ctenums.EnemyID
+    }
 
-    return get_stat_dict_from_ctrom(ct_rom)
+    return stat_dict
 
 
 if __name__ == '__main__':
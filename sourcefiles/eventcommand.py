@@ -1,6 +1,7 @@
 from __future__ import annotations
+import copy
 import math
-from typing import Tuple
+from typing import Optional, Sequence, Tuple
 
 from byteops import to_little_endian, get_value_from_bytes
 from enum import Enum, IntEnum, auto
@@ -55,8 +56,44 @@ def get_offset(script_addr):
     return (script_addr - 0x7F0200) // 2
 
 
+class _CommandInfo:
+    '''
+    Descriptive parts of a command.  Every command with a given id shares
+    the _CommandInfo of its entry in event_commands rather than copying it.
+    '''
+    __slots__ = ('num_args', 'arg_descs', 'name', 'desc', 'command_type',
+                 'command_subtype')
+
+    def __init__(self, num_args, arg_descs, name, desc,
+                 command_type=None, command_subtype=None):
+        self.num_args = num_args
+        self.arg_descs = arg_descs
+        self.name = name
+        self.desc = desc
+        self.command_type = command_type
+        self.command_subtype = command_subtype
+
+
+def _info_property(attr: str):
+    '''
+    Make a property which reads attr from a command's _CommandInfo.  Setting
+    it gives the command its own copy of the info so that the shared info in
+    event_commands is never changed.
+    '''
+    def getter(self):
+        return getattr(self._info, attr)
+
+    def setter(self, value):
+        self._info = copy.copy(self._info)
+        setattr(self._info, attr, value)
+
+    return property(getter, setter)
+
+
 class EventCommand:
 
+    __slots__ = ('command', 'arg_lens', 'args', '_logical_args', '_info')
+
     str_commands = [0xBB, 0xC0, 0xC1, 0xC2, 0xC3, 0xC4]
     str_arg_pos = [0, 0, 0, 0, 0, 0]
 
@@ -82,20 +119,32 @@ class EventCommand:
                  arg_lens, arg_descs,
                  name, desc, command_type = None, command_subtype = None):
         self.command = command
-        self.num_args = num_args
-        self.arg_lens = arg_lens
-        self.arg_descs = arg_descs
-        self.name = name
-        self.desc = desc
-
-        self.command_type = command_type
-        self.command_subtype = command_subtype
+        self.arg_lens: Sequence[int] = arg_lens
+        self._info = _CommandInfo(num_args, arg_descs, name, desc,
+                                  command_type, command_subtype)
 
         # These are the actual arguments from the string of bytes in the script
         self.args = []
 
         # These are the decoded args
-        self.logical_args = []
+        self._logical_args: Optional[list] = None
+
+    num_args = _info_property('num_args')
+    arg_descs = _info_property('arg_descs')
+    name = _info_property('name')
+    desc = _info_property('desc')
+    command_type = _info_property('command_type')
+    command_subtype = _info_property('command_subtype')
+
+    @property
+    def logical_args(self) -> list:
+        if self._logical_args is None:
+            self._logical_args = []
+        return self._logical_args
+
+    @logical_args.setter
+    def logical_args(self, value: list):
+        self._logical_args = value
 
     def __eq__(self, other):
         return self.command == other.command and self.args == other.args
@@ -1535,15 +1584,11 @@ class EventCommand:
         return command
 
     def copy(self) -> EventCommand:
-        ret_command = EventCommand(-1, 0, [], [], '', '')
+        ret_command = EventCommand.__new__(EventCommand)
         ret_command.command = self.command
-        ret_command.num_args = self.num_args
-        ret_command.arg_lens = self.arg_lens[:]
-        ret_command.arg_descs = self.arg_descs[:]
-        ret_command.name = self.name
-        ret_command.desc = self.desc
-        ret_command.command_type = self.command_type
-        ret_command.command_subtype = self.command_subtype
+        ret_command.arg_lens = list(self.arg_lens)
+        ret_command._info = self._info
+        ret_command._logical_args = None
 
         ret_command.args = self.args[:]
 
@@ -3650,71 +3695,109 @@ event_commands[0xFF] = \
 
 
 
-def get_command(buf: bytes, offset: int = 0) -> EventCommand:
+# Commands whose length depends on their arguments.  Everything else has the
+# length given by its entry in event_commands.
+_variable_length_commands = (0x2E, 0x4E, 0x88, 0xF1, 0xFF)
 
-    command_id = buf[offset]
-    command = event_commands[command_id].copy()
+# Per command id, the arg_lens and total length of fixed length commands.
+# The length is None for variable length commands.
+_fixed_arg_lens: list[tuple[int, ...]] = [
+    tuple(cmd.arg_lens) for cmd in event_commands
+]
+_fixed_lengths: list[Optional[int]] = [
+    None if cmd_id in _variable_length_commands else 1 + sum(arg_lens)
+    for cmd_id, arg_lens in enumerate(_fixed_arg_lens)
+]
 
-    # print(command)
-    # input()
 
+def _get_variable_arg_lens(buf: bytes, offset: int,
+                           command_id: int) -> tuple[int, ...]:
+    '''Get the arg_lens of a variable length command in buf at offset.'''
     if command_id == 0x2E:
         mode = buf[offset+1] >> 4
         if mode in [4, 5]:
-            command.arg_lens = [1, 1, 1, 1, 1]
-        elif mode == 8:
-            copy_len = get_value_from_bytes(buf[offset+3:offset+4]) - 2
-            print(copy_len)
-            command.arg_lens = [1, 1, 2, copy_len]
-        else:
-            print(f"{command_id:02X}: Error, Unknown Mode")
+            return (1, 1, 1, 1, 1)
+        if mode == 8:
+            copy_len = buf[offset+3] - 2
+            return (1, 1, 2, copy_len)
+
+        print(f"{command_id:02X}: Error, Unknown Mode")
     elif command_id == 0x4E:
         # Data to copy follows command.  Shove data in last arg.
         data_len = get_value_from_bytes(buf[offset+4:offset+6]) - 2
-        command.arg_lens = [2, 1, 2, data_len]
+        return (2, 1, 2, data_len)
     elif command_id == 0x88:
         mode = buf[offset+1] >> 4
         if mode == 0:
-            command.arg_lens = [1]
-        elif mode in [2, 3]:
-            command.arg_lens = [1, 1, 1]
-        elif mode in [4, 5]:
-            command.arg_lens = [1, 1, 1, 1]
-        elif mode == 8:
+            return (1,)
+        if mode in [2, 3]:
+            return (1, 1, 1)
+        if mode in [4, 5]:
+            return (1, 1, 1, 1)
+        if mode == 8:
             # bytes to copy follow command
             copy_len = buf[offset+2] - 2
-            command.arg_lens = [1, 1, 1, copy_len]
-        else:
-            print(f"{command_id:02X}: Error, Unknown Mode")
+            return (1, 1, 1, copy_len)
+
+        print(f"{command_id:02X}: Error, Unknown Mode")
     elif command_id == 0xF1:
         color = buf[offset+1]
         if color == 0:
-            command.arg_lens = [1]
-        else:
-            command.arg_lens = [1, 1]
+            return (1,)
+        return (1, 1)
     elif command_id == 0xFF:  # Mode7 scenes can be weird
         scene = buf[offset+1]
         if scene == 0x90:
-            command.arg_lens = [1, 1, 1, 1]
+            return (1, 1, 1, 1)
         if scene == 0x97:
-            command.arg_lens = [1, 1, 1]
+            return (1, 1, 1)
+
+    return _fixed_arg_lens[command_id]
+
+
+def get_command_length(buf: bytes, offset: int = 0) -> int:
+    '''Get the length of the command in buf at offset without decoding it.'''
+    command_id = buf[offset]
+    length = _fixed_lengths[command_id]
+    if length is None:
+        length = 1 + sum(_get_variable_arg_lens(buf, offset, command_id))
+
+    return length
+
+
+def get_command(buf: bytes, offset: int = 0) -> EventCommand:
+
+    command_id = buf[offset]
+    if _fixed_lengths[command_id] is None:
+        arg_lens = _get_variable_arg_lens(buf, offset, command_id)
+    else:
+        arg_lens = _fixed_arg_lens[command_id]
+
+    # Build the command directly instead of copying the template.  The
+    # descriptive parts are shared with the template.
+    command = EventCommand.__new__(EventCommand)
+    command.command = command_id
+    command.arg_lens = arg_lens
+    command._info = event_commands[command_id]._info
+    command._logical_args = None
 
     # Now we can use arg_lens to extract the args
     pos = offset + 1
-    command.args = []
+    args = []
 
-    if command.command == 0x4E:
-        for i in command.arg_lens[0:-1]:
-            command.args.append(get_value_from_bytes(buf[pos:pos+i]))
+    if command_id == 0x4E:
+        for i in arg_lens[0:-1]:
+            args.append(get_value_from_bytes(buf[pos:pos+i]))
             pos += i
 
-        command.args.append(
-            bytearray(buf[pos:pos+command.arg_lens[-1]])
+        args.append(
+            bytearray(buf[pos:pos+arg_lens[-1]])
         )
-        pos += command.arg_lens[-1]
+        pos += arg_lens[-1]
     else:
-        for i in command.arg_lens:
-            command.args.append(get_value_from_bytes(buf[pos:pos+i]))
+        for i in arg_lens:
+            args.append(int.from_bytes(buf[pos:pos+i], 'little'))
             pos += i
 
+    command.args = args
     return command
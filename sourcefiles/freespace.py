@@ -1,8 +1,11 @@
 from __future__ import annotations
+import bisect
+import dataclasses
 from enum import Enum
 from io import BytesIO
 from pathlib import Path
-from typing import Tuple, Union
+import sys
+from typing import Any, BinaryIO, Iterable, Optional, Tuple, Union
 
 import byteops
 
@@ -15,12 +18,68 @@ class FSWriteType(Enum):
     NO_MARK = 2
 
 
+class FSAllocPolicy(Enum):
+    FIRST_FIT = 0  # Lowest address which fits
+    BEST_FIT = 1  # Smallest free run which fits, lowest address on ties
+
+
+_BANK_SIZE = 0x10000
+
+# Granularity of FSRom's byte sum tracking.
+_SUM_PAGE_SIZE = 0x1000
+
+
+@dataclasses.dataclass
+class FSAllocRecord:
+    '''One request for free space made while a FreeSpace is recording.'''
+    caller: str  # module.function which asked for the space
+    size: int
+    hint: int
+    addr: int
+
+    @property
+    def bank(self) -> int:
+        return self.addr >> 16
+
+    def to_jot_json(self) -> dict[str, Any]:
+        return {
+            'caller': self.caller,
+            'size': self.size,
+            'bank': f'{self.bank:02X}',
+            'hint': f'{self.hint:06X}',
+            'addr': f'{self.addr:06X}'
+        }
+
+
+def _get_caller() -> str:
+    '''Get module.function of the first caller outside of this module.'''
+    frame = sys._getframe(1)
+    while frame is not None and frame.f_globals.get('__name__') == __name__:
+        frame = frame.f_back
+
+    if frame is None:
+        return 'unknown'
+
+    return f"{frame.f_globals.get('__name__')}.{frame.f_code.co_name}"
+
+
 class FreeSpace():
-    def __init__(self, num_bytes, is_free):
+    def __init__(self, num_bytes, is_free,
+                 policy: FSAllocPolicy = FSAllocPolicy.FIRST_FIT):
 
         self.num_bytes = num_bytes
         self.markers = [0, self.num_bytes]
         self.first_free = is_free
+        self.policy = policy
+
+        # Per-bank index of the free runs, used to skip banks which can't
+        # hold an allocation.  Built lazily and forgotten for every bank
+        # that a marking touches.
+        self._bank_runs: dict[int, list[tuple[int, int]]] = {}
+        self._bank_sizes: dict[int, list[tuple[int, int]]] = {}
+
+        # Set to a list to record every allocation.  See get_usage_report.
+        self.alloc_log: Optional[list[FSAllocRecord]] = None
 
     # Mark a block of the buffer as free/not free depending on is_free.
     # block is a half-open interval [block[0], block[1]) as is Python's way.
@@ -53,8 +112,10 @@ class FreeSpace():
                   % (block[0], block[1]))
             block = (0, block[1])
 
-        left_blk = self.__search(0, len(self.markers)-2, block[0])
-        right_blk = self.__search(0, len(self.markers)-2, block[1])
+        self._invalidate_banks(block[0], block[1])
+
+        left_blk = self._find_block(block[0])
+        right_blk = self._find_block(block[1])
 
         lc = (left_blk % 2 == 0)
         rc = (right_blk % 2 == 0)
@@ -108,8 +169,8 @@ class FreeSpace():
         left = block[0]
         right = block[1]
 
-        left_ind = self.__search(0, len(self.markers)-2, left)
-        right_ind = self.__search(0, len(self.markers)-2, right)
+        left_ind = self._find_block(left)
+        right_ind = self._find_block(right)
 
         left_parity = left_ind % 2 == 0
         left_free = left_parity == (self.first_free is True)
@@ -118,6 +179,7 @@ class FreeSpace():
 
     def extend_end_marker(self, new_end, is_free):
         last_free = self.__is_free(len(self.markers)-2)
+        self._invalidate_banks(self.markers[-1]-1, new_end)
 
         # print(f"{new_end:06X}, {is_free}")
         if last_free == is_free:
@@ -125,111 +187,215 @@ class FreeSpace():
         else:
             self.markers.append(new_end)
 
+    def copy(self) -> FreeSpace:
+        '''Get an independent copy of this FreeSpace.'''
+        new_fs = FreeSpace(self.num_bytes, self.first_free, self.policy)
+        new_fs.markers = list(self.markers)
+
+        # The cached run lists are never modified in place, so they can
+        # be shared.
+        new_fs._bank_runs = dict(self._bank_runs)
+        new_fs._bank_sizes = dict(self._bank_sizes)
+
+        if self.alloc_log is not None:
+            new_fs.alloc_log = list(self.alloc_log)
+        return new_fs
+
     def __is_free(self, ind):
         return ((ind % 2 == 0) == self.first_free)
 
-    # First fit.  Location must be after hint
-    def get_free_addr(self, size, hint=0):
-        # block associated with its left marker, so search to len-2
-        ind = self.__search(0, len(self.markers)-2, hint)
+    def _get_bank_runs(self, bank: int) -> list[tuple[int, int]]:
+        '''
+        Get the free runs [start, end) of a bank in address order.  Runs are
+        cut at bank boundaries because data may not cross a bank.
+        '''
+        runs = self._bank_runs.get(bank)
+        if runs is not None:
+            return runs
+
+        bank_start = bank*_BANK_SIZE
+        bank_end = min(bank_start + _BANK_SIZE, self.markers[-1])
+
+        runs = []
+        ind = self._find_block(bank_start)
+        while ind < len(self.markers)-1 and self.markers[ind] < bank_end:
+            if self.__is_free(ind):
+                run_start = max(self.markers[ind], bank_start)
+                run_end = min(self.markers[ind+1], bank_end)
+                if run_end > run_start:
+                    runs.append((run_start, run_end))
+            ind += 1
+
+        self._bank_runs[bank] = runs
+        self._bank_sizes[bank] = sorted(
+            (run_end-run_start, run_start) for (run_start, run_end) in runs
+        )
+        return runs
+
+    def _get_largest_run(self, bank: int) -> int:
+        '''Get the size of the largest free run in a bank.'''
+        if bank not in self._bank_sizes:
+            self._get_bank_runs(bank)
+
+        sizes = self._bank_sizes[bank]
+        return sizes[-1][0] if sizes else 0
+
+    def _invalidate_banks(self, start: int, end: int):
+        '''Forget the bank index for banks which meet [start, end).'''
+        for bank in range(start >> 16, ((end-1) >> 16) + 1):
+            self._bank_runs.pop(bank, None)
+            self._bank_sizes.pop(bank, None)
 
-        # print(f"Searching for {size} free bytes.")
-        if self.__is_free(ind) and (self.markers[ind+1]-hint > 0):
-            return hint
-        else:
-            if not self.__is_free(ind):
-                ind += 1
-
-            start = ind
-            ret = None
-            for x in range(start, len(self.markers)-1, 2):
-                # print(f"({self.markers[x]}, {self.markers[x+1]})")
-                # print(f"Size: {self.markers[x+1]-self.markers[x]}")
-
-                block_st = self.markers[x]
-                block_end = self.markers[x+1]
-                next_bank = (block_st & 0xFF0000) + 0x010000
-
-                true_block_end = min(block_end, next_bank)
-                if true_block_end - block_st >= size:
-                    ret = block_st
-                    break
+    @staticmethod
+    def _fit_in_runs(runs: list[tuple[int, int]], size: int,
+                     policy: FSAllocPolicy,
+                     hint: int = 0) -> Optional[int]:
+        '''
+        Get the index of the run in runs to put size bytes in, or None if
+        nothing fits.  Only space at or after hint is considered.
+        '''
+        best_ind, best_size = None, None
+        for ind, (run_start, run_end) in enumerate(runs):
+            run_size = run_end - max(run_start, hint)
+            if run_size < size:
+                continue
 
-                # If the block ends before the next bank starts, then
-                # block_end == true_block_end, and this if won't trigger.
-                # Otherwise, true_block_end is the start of the next bank, and
-                # we're trying to fit at the start of the next bank.
-                if block_end - true_block_end >= size:
-                    ret = true_block_end  # == next bank start
-                    break
+            if policy == FSAllocPolicy.FIRST_FIT or run_size == size:
+                return ind
+
+            if best_size is None or run_size < best_size:
+                best_ind, best_size = ind, run_size
+
+        return best_ind
+
+    def get_free_addr(self, size: int, hint: int = 0,
+                      policy: Optional[FSAllocPolicy] = None) -> int:
+        '''
+        Get the address of a block of size free bytes at or after hint which
+        does not cross a bank boundary.  The block is chosen according to
+        policy (default: self.policy).  Raises FreeSpaceError if no such
+        block exists.
+        '''
+        addr = self._find_free_addr(size, hint, policy)
+        if self.alloc_log is not None:
+            self.alloc_log.append(
+                FSAllocRecord(_get_caller(), size, hint, addr)
+            )
+
+        return addr
+
+    def _find_free_addr(self, size: int, hint: int,
+                        policy: Optional[FSAllocPolicy]) -> int:
+        if policy is None:
+            policy = self.policy
+
+        hint = max(hint, 0)
+        hint_bank = hint >> 16
+        last_bank = (self.markers[-1]-1) >> 16
+
+        best_addr, best_size = None, None
+        for bank in range(hint_bank, last_bank+1):
+            if self._get_largest_run(bank) < size:
+                continue
+
+            if bank == hint_bank:
+                # The hint cuts runs, so the size index can not be used.
+                runs = self._get_bank_runs(bank)
+                ind = self._fit_in_runs(runs, size, policy, hint)
+                if ind is None:
+                    continue
+                addr = max(runs[ind][0], hint)
+                run_size = runs[ind][1] - addr
+            else:
+                # Smallest run which fits.  For first fit, the first run
+                # which fits in the first bank with a large enough run.
+                sizes = self._bank_sizes[bank]
+                if policy == FSAllocPolicy.FIRST_FIT:
+                    runs = self._get_bank_runs(bank)
+                    ind = self._fit_in_runs(runs, size, policy)
+                    addr = runs[ind][0]
+                    run_size = runs[ind][1] - addr
+                else:
+                    run_size, addr = sizes[bisect.bisect_left(sizes,
+                                                             (size, -1))]
+
+            if policy == FSAllocPolicy.FIRST_FIT or run_size == size:
+                return addr
 
-            if ret is None:
-                # print("Error: Not enough free space.")
-                # print(f"size: {size:06X}, hint: {hint:06X}")
-                # self.print_blocks()
-                raise FreeSpaceError(
-                    f'Not Enough Free Space.  Size: {size:06X}, '
-                    f'hint: {hint:06X}'
-                )
+            if best_size is None or run_size < best_size:
+                best_addr, best_size = addr, run_size
 
-            return ret
+        if best_addr is None:
+            raise FreeSpaceError(
+                f'Not Enough Free Space.  Size: {size:06X}, '
+                f'hint: {hint:06X}'
+            )
+
+        return best_addr
 
     # Sometimes data needs the same bank, so
-    def get_same_bank_free_addrs(self, sizes: list[int],
-                                 hint: int = 0) -> list[int]:
+    def get_same_bank_free_addrs(
+            self, sizes: list[int], hint: int = 0,
+            policy: Optional[FSAllocPolicy] = None
+    ) -> list[int]:
+        '''
+        Get addresses for blocks of the given sizes which all lie in the same
+        bank.  The largest block is placed at or after hint and the rest are
+        placed anywhere in its bank.  Nothing is marked.
+        '''
 
         if not sizes:
             return []
 
-        tries = [0 for x in sizes]
-        perm = tuple(i for i in range(len(sizes)))
+        if policy is None:
+            policy = self.policy
 
         # going to assign in sorted order.
         # Should discard heavily used blocks more quickly.
         # Save the permutation to recover the original order
+        perm = tuple(i for i in range(len(sizes)))
         sort_sizes, perm = zip(*sorted(zip(sizes, perm), reverse=True))
 
-        start = hint
-
-        while True:
-            tries[0] = self.get_free_addr(sort_sizes[0], start)
-            self.mark_block((tries[0], tries[0]+sort_sizes[0]),
-                            FSWriteType.MARK_USED)
-
-            first_bank = (tries[0] >> 16) << 16
-
-            success = True
-
-            for i in range(1, len(sort_sizes)):
-                tries[i] = self.get_free_addr(sort_sizes[i], first_bank)
-                this_bank = (tries[i] >> 16) << 16
-
-                if this_bank != first_bank:
-                    success = False
-                    start = this_bank
-
-                    # undo previous markings
-                    for j in range(0, i):
-                        self.mark_block((tries[j], tries[j]+sort_sizes[j]),
-                                        FSWriteType.MARK_FREE)
-                else:
-                    # Mark and proceed to next
-                    self.mark_block((tries[i], tries[i]+sort_sizes[i]),
-                                    FSWriteType.MARK_USED)
+        hint = max(hint, 0)
+        last_bank = (self.markers[-1]-1) >> 16
+        for bank in range(hint >> 16, last_bank+1):
+            if self._get_largest_run(bank) < sort_sizes[0]:
+                continue
+
+            # Pack into a scratch copy of the bank's runs.
+            runs = list(self._get_bank_runs(bank))
+            tries = []
+            for ind, size in enumerate(sort_sizes):
+                run_ind = self._fit_in_runs(runs, size, policy,
+                                            hint if ind == 0 else 0)
+                if run_ind is None:
+                    break
 
-            if success:
-                break
+                run_start, run_end = runs[run_ind]
+                addr = max(run_start, hint) if ind == 0 else run_start
+                tries.append(addr)
 
-        # Undo markings.  This is sort of ugly.  It would be nice to separate
-        # the buffer from the freespace checker so that we can copy the
-        # freespace checker and mess with that while finding addresses.
-        for i in range(len(tries)):
-            self.mark_block((tries[i], tries[i]+sort_sizes[i]),
-                            FSWriteType.MARK_FREE)
+                # Split the run around the block.
+                runs[run_ind:run_ind+1] = [
+                    run for run in ((run_start, addr),
+                                    (addr+size, run_end))
+                    if run[1] > run[0]
+                ]
+            else:
+                if self.alloc_log is not None:
+                    caller = _get_caller()
+                    self.alloc_log.extend(
+                        FSAllocRecord(caller, size, hint, addr)
+                        for size, addr in zip(sort_sizes, tries)
+                    )
 
-        perm, tries_tuple = zip(*sorted(zip(perm, tries)))
+                perm, tries_tuple = zip(*sorted(zip(perm, tries)))
+                return list(tries_tuple)
 
-        return list(tries_tuple)
+        raise FreeSpaceError(
+            f'Not Enough Free Space in one bank.  Sizes: {sizes}, '
+            f'hint: {hint:06X}'
+        )
 
     # Mark a file with Anskiy's .txt patch format
     # Duplicates much code.  Consider adding patching functionality into
@@ -295,6 +461,49 @@ class FreeSpace():
         with open(filename, 'rb') as ips_obj:
             self.mark_blocks_ips_obj(ips_obj)
 
+    def get_usage_report(self) -> dict[str, Any]:
+        '''
+        Get a json-friendly summary of free space in each bank along with
+        any recorded allocations.  Fragmentation is the portion of a bank's
+        free space which is not in its largest free run.
+        '''
+        banks = {}
+        last_bank = (self.markers[-1]-1) >> 16
+        for bank in range(last_bank+1):
+            runs = self._get_bank_runs(bank)
+            bank_size = min(self.markers[-1], (bank+1)*_BANK_SIZE) - \
+                bank*_BANK_SIZE
+            free = sum(run_end-run_start for (run_start, run_end) in runs)
+            largest = self._get_largest_run(bank)
+            banks[f'{bank:02X}'] = {
+                'free': free,
+                'used': bank_size - free,
+                'utilization': round(1 - free/bank_size, 4),
+                'free_runs': len(runs),
+                'largest_free_run': largest,
+                'fragmentation': round(1 - largest/free, 4) if free else 0
+            }
+
+        report: dict[str, Any] = {
+            'total_free': sum(bank['free'] for bank in banks.values()),
+            'banks': banks
+        }
+
+        if self.alloc_log is not None:
+            by_caller: dict[str, dict[str, int]] = {}
+            for record in self.alloc_log:
+                totals = by_caller.setdefault(record.caller,
+                                              {'count': 0, 'bytes': 0})
+                totals['count'] += 1
+                totals['bytes'] += record.size
+
+            report['allocations_by_caller'] = by_caller
+            report['allocations'] = [
+                record.to_jot_json() for record in self.alloc_log
+            ]
+
+        return report
+
     def print_blocks(self):
 
         print('Free blocks: ')
@@ -322,96 +531,291 @@ class FreeSpace():
                      (self.markers[x+1]-self.markers[x])))
 
     # Find the index of an address in the block map
-    def __search(self, start_ind, end_ind, addr):
-        search_ind = (start_ind+end_ind)//2
+    def _find_block(self, addr: int) -> int:
+        '''
+        Get the index ind with markers[ind] <= addr < markers[ind+1].  Addresses
+        at or past the end belong to the last block.
+        '''
+        ind = bisect.bisect_right(self.markers, addr) - 1
+        return min(max(ind, 0), len(self.markers)-2)
+
+
+class _ByteSumBase:
+    '''An immutable image and the byte sum of each page of it.'''
+    def __init__(self, data: bytes, page_sums: Optional[list[int]] = None):
+        self.data = data
+        self._page_sums = page_sums
+
+    @property
+    def page_sums(self) -> list[int]:
+        if self._page_sums is None:
+            self._page_sums = [
+                sum(self.data[start:start+_SUM_PAGE_SIZE])
+                for start in range(0, len(self.data), _SUM_PAGE_SIZE)
+            ]
+        return self._page_sums
+
+
+@dataclasses.dataclass
+class ParsedPatch:
+    '''
+    The writes and free space marks made by an .ips or .txt patch.  A parsed
+    patch can be applied to any number of FSRoms with FSRom.apply_patch.
+    '''
+    writes: list[tuple[int, bytes, FSWriteType]] = \
+        dataclasses.field(default_factory=list)
+    # [start, end) blocks in the order they are marked.  Adjacent blocks with
+    # the same mark are merged.
+    marks: list[tuple[int, int, FSWriteType]] = \
+        dataclasses.field(default_factory=list)
+
+    def _add_write(self, addr: int, payload: bytes, mark_type: FSWriteType):
+        self.writes.append((addr, payload, mark_type))
+
+        end = addr + len(payload)
+        if end <= addr:
+            return
+
+        if self.marks and self.marks[-1][1] == addr and \
+           self.marks[-1][2] == mark_type:
+            self.marks[-1] = (self.marks[-1][0], end, mark_type)
+        else:
+            self.marks.append((addr, end, mark_type))
+
+    @classmethod
+    def from_txt(cls, lines: Iterable[str]) -> ParsedPatch:
+        '''Parse one of Anskiy's .txt patches.  All writes use space.'''
+        patch = cls()
+        for line in lines:
+            line = line.split(":")
+            address = int(line[0], 0x10)
+            data = bytes.fromhex(line[2])
+
+            patch._add_write(address, data, FSWriteType.MARK_USED)
+
+        return patch
+
+    @classmethod
+    def from_ips(cls, data: bytes) -> ParsedPatch:
+        '''
+        Parse an ips patch.  Most writes are considered used space, but long
+        rle blocks of 0s are considered free space.
+        '''
+        patch = cls()
+        pos = 5  # ignore the "PATCH" at the start
+        while pos < len(data) - 5:
+            # Get the location and size of the payload
+            addr = byteops.get_value_from_bytes_be(data[pos:pos+3])
+            size = byteops.get_value_from_bytes_be(data[pos+3:pos+5])
+            pos += 5
+
+            mark_set = FSWriteType.MARK_USED
 
-        left = self.markers[search_ind]
-        right = self.markers[search_ind+1]
+            if size == 0:
+                # RLE block
+                rle_size = byteops.get_value_from_bytes_be(data[pos:pos+2])
+                rle_byte = data[pos+2]
+                pos += 3
 
-        if left <= addr < right:
-            return search_ind
-        elif addr >= right:
-            if start_ind == len(self.markers)-1:
-                return len(self.markers)-2
+                # Runs of a single symbol are usually free space?
+                # IPS will write 0 blocks to extend the length of a file.
+                # We should mark these as free
+                if rle_byte == 0 and rle_size >= 0x10:
+                    mark_set = FSWriteType.MARK_FREE
+
+                payload = bytes((rle_byte,))*rle_size
             else:
-                return self.__search(search_ind+1, end_ind, addr)
-        else:
-            return self.__search(start_ind, search_ind-1, addr)
+                # Normal block
+                payload = data[pos:pos+size]
+                pos += size
+
+            patch._add_write(addr, payload, mark_set)
+
+        return patch
 
 
 class FSRom(BytesIO):
 
     _patches_path: Path = Path(__file__).parent / 'patches'
 
+    # Parsed patch files keyed by (path, mtime, size).  Shared by every
+    # FSRom in the process so that each file is only parsed once.
+    _parsed_patch_cache: dict[tuple[Path, int, int], ParsedPatch] = {}
+
     def __init__(self, rom: bytes, is_free=False):
         super().__init__(rom)
         self.space_manager = FreeSpace(len(rom), is_free)
 
+        # Byte sums are kept relative to a snapshot of the buffer.  Pages
+        # written by write() since the snapshot are recorded as they are
+        # written.  Writes made through getbuffer() views can not be seen,
+        # so once a view has been made, the other pages are compared with
+        # the snapshot.  See get_page_sums.
+        self._sum_base: Optional[_ByteSumBase] = \
+            _ByteSumBase(rom) if isinstance(rom, bytes) else None
+        self._written_pages: set[int] = set()
+        self._buffer_exported = False
+
+    def copy(self) -> FSRom:
+        '''Get an independent copy of this FSRom and its free space.'''
+        # The copy starts from this rom's byte sum snapshot, which has the
+        # same contents.  BytesIO shares the bytes until the copy is written.
+        self.get_page_sums()
+        base = self._sum_base
+        if base is None:
+            raise ValueError('No byte sum snapshot.')
+
+        new_rom = FSRom(base.data)
+        new_rom._sum_base = base
+        new_rom.space_manager = self.space_manager.copy()
+        return new_rom
+
+    def getbuffer(self) -> memoryview:
+        # Writes through the view can't be tracked.  See get_page_sums.
+        self._buffer_exported = True
+        return super().getbuffer()
+
+    def get_view(self) -> memoryview:
+        '''
+        Get a read-only view of the current contents without copying them.
+        The view shares the buffer, so the next write to the rom copies the
+        buffer instead (unless a getbuffer() view is alive, in which case the
+        contents are copied now).  Use this for reading, not getbuffer(),
+        which copies a buffer shared with another rom.
+        '''
+        return memoryview(self.getvalue())
+
+    def write_to_file(self, outfile: BinaryIO) -> int:
+        '''Write the whole buffer to outfile without copying it first.'''
+        return outfile.write(self.get_view())
+
+    def _has_exports(self) -> bool:
+        '''Determine whether any getbuffer() views are still alive.'''
+        pos = self.tell()
+        size = self.seek(0, 2)
+        self.seek(pos)
+        try:
+            # Truncating to the current size changes nothing, but it is
+            # refused while the buffer is exported.
+            self.truncate(size)
+        except BufferError:
+            return True
+        return False
+
+    def get_page_sums(self) -> list[int]:
+        '''
+        Get the sum of the bytes in each 0x1000 byte page of the buffer.
+
+        Only pages written since the last call (or that differ from the
+        snapshot taken then, if a view was made) are summed again.  Do not
+        modify the returned list.
+        '''
+        base = self._sum_base
+        if base is not None and not self._written_pages and \
+           not self._buffer_exported:
+            return base.page_sums
+
+        data = self.getvalue()
+        if base is None or len(base.data) != len(data):
+            base = _ByteSumBase(data)
+        elif data is not base.data:
+            changed_pages = set(self._written_pages)
+            if self._buffer_exported:
+                # Compare a bank at a time, then pages in changed banks.
+                for bank_st in range(0, len(data), _BANK_SIZE):
+                    bank_end = bank_st + _BANK_SIZE
+                    if data[bank_st:bank_end] == base.data[bank_st:bank_end]:
+                        continue
+                    for page_st in range(bank_st, min(bank_end, len(data)),
+                                         _SUM_PAGE_SIZE):
+                        page_end = page_st + _SUM_PAGE_SIZE
+                        if data[page_st:page_end] != \
+                           base.data[page_st:page_end]:
+                            changed_pages.add(page_st // _SUM_PAGE_SIZE)
+
+            page_sums = list(base.page_sums)
+            for page in changed_pages:
+                page_st = page*_SUM_PAGE_SIZE
+                page_sums[page] = sum(data[page_st:page_st+_SUM_PAGE_SIZE])
+            base = _ByteSumBase(data, page_sums)
+
+        # Re-snapshot so that the next call only looks at new changes.
+        self._sum_base = base
+        self._written_pages.clear()
+        self._buffer_exported = self._has_exports()
+        return base.page_sums
+
+    def get_byte_sum(self, start: int = 0, end: Optional[int] = None) -> int:
+        '''Get the sum of the bytes in [start, end) of the buffer.'''
+        page_sums = self.get_page_sums()
+        data = self._sum_base.data if self._sum_base is not None else b''
+        if end is None:
+            end = len(data)
+
+        first_page = -(-start // _SUM_PAGE_SIZE)
+        last_page = end // _SUM_PAGE_SIZE
+        if first_page >= last_page:
+            return sum(data[start:end])
+
+        return sum(data[start:first_page*_SUM_PAGE_SIZE]) + \
+            sum(page_sums[first_page:last_page]) + \
+            sum(data[last_page*_SUM_PAGE_SIZE:end])
+
+    def apply_patch(self, patch: ParsedPatch):
+        '''Make the writes of a parsed patch and then mark its blocks.'''
+        buf_end = self.seek(0, 2)
+        for addr, payload, mark_type in patch.writes:
+            self.seek(addr)
+            end = addr + len(payload)
+            if end > buf_end:
+                # Extending the buffer has to mark the new space.
+                self.write(payload, mark_type)
+                buf_end = end
+            else:
+                self.write(payload, FSWriteType.NO_MARK)
+
+        for start, end, mark_type in patch.marks:
+            self.space_manager.mark_block((start, end), mark_type)
+
+    @classmethod
+    def _get_parsed_patch(cls, filename: Union[str, Path],
+                          is_ips: bool) -> ParsedPatch:
+        '''
+        Get a patch file parsed.  Each file is parsed once per process unless
+        it changes on disk.
+        '''
+        path = cls._get_patch_path(filename)
+        stat = path.stat()
+        key = (path, stat.st_mtime_ns, stat.st_size)
+
+        patch = cls._parsed_patch_cache.get(key)
+        if patch is None:
+            if is_ips:
+                patch = ParsedPatch.from_ips(path.read_bytes())
+            else:
+                with path.open('r') as patch_obj:
+                    patch = ParsedPatch.from_txt(patch_obj)
+            cls._parsed_patch_cache[key] = patch
+
+        return patch
+
     # Apply one of Anskiy's .txt patches and mark free space
     # Code copied from patcher.py with few modifications.
     # I am assuming that all writes are using up free space.
     def patch_txt_file(self, filename):
-        with self._get_patch_path(filename).open('r') as patch_obj:
-            self.patch_txt(patch_obj)
+        self.apply_patch(self._get_parsed_patch(filename, False))
 
     def patch_txt(self, patch_obj):
-        for line in patch_obj:
-            line = line.split(":")
-            address = int(line[0], 0x10)
-            data = bytearray.fromhex(line[2])
-
-            # print(f"{address:06X}: ")
-            # print(' '.join(f"{x:02X}" for x in data))
-            self.seek(address)
-            self.write(data, FSWriteType.MARK_USED)
+        self.apply_patch(ParsedPatch.from_txt(patch_obj))
 
     # Apply an ips patch.  Most writes are considered used space, but long
     # rle blocks of 0s are considered free space.
     def patch_ips_file(self, filename):
-        with self._get_patch_path(filename).open('rb') as patch_obj:
-            self.patch_ips(patch_obj)
+        self.apply_patch(self._get_parsed_patch(filename, True))
 
     def patch_ips(self, patch_obj):
-        p = patch_obj
-
-        p.seek(0, 2)
-        patch_size = p.tell()
-
-        p.seek(5)  # ignore the "PATCH" at the start
-
-        while p.tell() < patch_size - 5:
-
-            # Get the location of the payload
-            addr_bytes = p.read(3)
-            addr = byteops.get_value_from_bytes_be(addr_bytes)
-
-            # Get the size of the payload
-            size_bytes = p.read(2)
-            size = byteops.get_value_from_bytes_be(size_bytes)
-
-            mark_set = FSWriteType.MARK_USED
-
-            if size == 0:
-                # RLE block
-                rle_size_bytes = p.read(2)
-                rle_size = byteops.get_value_from_bytes_be(rle_size_bytes)
-
-                rle_byte = p.read(1)
-
-                # Runs of a single symbol are usually free space?
-                # IPS will write 0 blocks to extend the length of a file.
-                # We should mark these as free
-                if rle_byte[0] == 0 and rle_size >= 0x10:
-                    mark_set = FSWriteType.MARK_FREE
-
-                payload = bytearray([rle_byte[0]]*rle_size)
-            else:
-                # Normal block
-                payload = p.read(size)
-
-            self.seek(addr)
-            self.write(payload, mark_set)
-            # print(f'Wrote {len(payload):04X} bytes to {addr:06X}')
+        patch_obj.seek(0)
+        self.apply_patch(ParsedPatch.from_ips(patch_obj.read()))
 
     def mark(self, num_bytes: int, mark_type: FSWriteType):
         start = self.tell()
@@ -438,6 +842,11 @@ class FSRom(BytesIO):
 
         spaceman.mark_block((start, end), write_mark)
 
+        if end > start:
+            self._written_pages.update(
+                range(start // _SUM_PAGE_SIZE, (end-1) // _SUM_PAGE_SIZE + 1)
+            )
+
         self.seek(start)
         return BytesIO.write(self, payload)
 
@@ -0,0 +1,686 @@
+'''
+Module for evaluating a GameConfig's access rules as integer bitmasks.
+
+Basic usage:
+    logic = game_config.getCompiledLogic()
+    key_item_mask = logiccompiler.get_key_item_mask(game.keyItems)
+    groups = logic.get_accessible_groups(logic.get_state(key_item_mask))
+
+A state holds one bit per key item (bit int(item)) and one bit per character
+(bit CHAR_SHIFT + int(char)).
+
+Access rules only look at the game state through Game.hasKeyItem and
+Game.hasCharacter, and settings are fixed once the GameConfig is made.  So
+each rule is compiled by running it once for every path through its
+decisions.  The paths which return True become (required, forbidden) mask
+pairs, and the rule is true for a state when any pair matches.  Flag checks
+are constant along every path, so they disappear from the compiled rule.
+
+The characters available for a set of key items are compiled the same way
+from Game.updateAvailableCharacters.
+
+Every GameConfig for the same flags makes the same rules, so compiled rules
+are shared between GameConfigs.  Rules are matched by their code and the
+values they captured.
+
+A rule which looks at the game in any other way (say by counting the key
+items) can not be compiled, and it is evaluated by calling it on a Game
+built from the state instead.
+'''
+from __future__ import annotations
+
+import itertools
+import types
+import typing
+from typing import Any, Callable, Hashable, Iterable, Optional, Tuple
+
+from ctenums import CharID, ItemID
+import logictypes
+
+if typing.TYPE_CHECKING:
+    import logicfactory
+
+
+CHAR_SHIFT = 0x100
+
+# Rules with more decision paths than this are not compiled.
+_MAX_PATHS = 0x1000
+
+# Sizes of the per-state caches before they are cleared.
+_MAX_CACHED_STATES = 0x4000
+
+# A compiled rule is a tuple of (required, forbidden) mask pairs, or None
+# if the rule has to be called.
+_Terms = Optional[Tuple[Tuple[int, int], ...]]
+
+
+class UntraceableRuleException(Exception):
+    pass
+
+
+def get_item_bit(item: ItemID) -> int:
+    return 1 << int(item)
+
+
+def get_char_bit(char: CharID) -> int:
+    return 1 << (CHAR_SHIFT + int(char))
+
+
+class _Tracer:
+    '''
+    Answers game state queries for one path through a rule.  Queries for
+    new bits are answered from the forced decisions, and then with False.
+    '''
+    def __init__(self):
+        self.forced: list[bool] = []
+        self.decisions: list[bool] = []
+        self.required = 0
+        self.forbidden = 0
+
+    def start_path(self, forced: list[bool]):
+        self.forced = forced
+        self.decisions = []
+        self.required = 0
+        self.forbidden = 0
+
+    def query(self, bit: int) -> bool:
+        if self.required & bit:
+            return True
+        if self.forbidden & bit:
+            return False
+
+        ind = len(self.decisions)
+        value = self.forced[ind] if ind < len(self.forced) else False
+        self.decisions.append(value)
+        if value:
+            self.required |= bit
+        else:
+            self.forbidden |= bit
+
+        return value
+
+    def next_path(self) -> Optional[list[bool]]:
+        '''
+        Get the forced decisions for the next path, or None if every path
+        has been traced.
+        '''
+        decisions = self.decisions
+        while decisions and decisions[-1]:
+            decisions.pop()
+
+        if not decisions:
+            return None
+
+        decisions[-1] = True
+        return decisions
+
+
+class _TracedSet:
+    '''Stands in for Game.keyItems or Game.characters while tracing.'''
+    def __init__(self, tracer: _Tracer, get_bit: Callable[[Any], int]):
+        self._tracer = tracer
+        self._get_bit = get_bit
+
+    def __contains__(self, value) -> bool:
+        return self._tracer.query(self._get_bit(value))
+
+    def _untraceable(self, *args, **kwargs):
+        raise UntraceableRuleException
+
+    __iter__ = __len__ = _untraceable
+    add = discard = remove = clear = update = _untraceable
+
+
+def _trace(func: Callable[[logictypes.Game], Any],
+           game: logictypes.Game,
+           tracer: _Tracer) -> list[tuple[int, int, Any]]:
+    '''
+    Run func on every path through its decisions.  Get the required bits,
+    the forbidden bits, and the result of each path.
+    '''
+    paths = []
+    forced: Optional[list[bool]] = []
+    while forced is not None:
+        tracer.start_path(forced)
+        result = func(game)
+        paths.append((tracer.required, tracer.forbidden, result))
+        if len(paths) > _MAX_PATHS:
+            raise UntraceableRuleException
+
+        forced = tracer.next_path()
+
+    return paths
+
+
+def _simplify_terms(terms: set[tuple[int, int]]) -> set[tuple[int, int]]:
+    '''
+    Merge terms which differ only in one bit being required or forbidden,
+    and drop terms which are implied by others.
+    '''
+    while True:
+        merged = set()
+        used = set()
+        for required, forbidden in terms:
+            for bit_term in terms:
+                if (required, forbidden) == bit_term:
+                    continue
+                diff_req = required ^ bit_term[0]
+                diff_forb = forbidden ^ bit_term[1]
+                if diff_req == diff_forb and diff_req & (diff_req - 1) == 0:
+                    merged.add((required & ~diff_req, forbidden & ~diff_req))
+                    used.add((required, forbidden))
+
+        if not merged:
+            break
+        terms = (terms - used) | merged
+
+    return {
+        (required, forbidden) for required, forbidden in terms
+        if not any(
+            (other_req, other_forb) != (required, forbidden) and
+            other_req & required == other_req and
+            other_forb & forbidden == other_forb
+            for other_req, other_forb in terms
+        )
+    }
+
+
+def _get_rule_key(rule: Callable) -> Optional[Hashable]:
+    '''
+    Get a key which is the same for rules that behave the same given the
+    same settings.  Rules made by the same code with the same captured
+    values share a key.  Get None if there is no such key.
+    '''
+    if not isinstance(rule, types.FunctionType):
+        return None
+
+    captured: list[Hashable] = []
+    for value in itertools.chain(
+            (cell.cell_contents for cell in rule.__closure__ or ()),
+            rule.__defaults__ or ()):
+        if isinstance(value, types.FunctionType):
+            value = _get_rule_key(value)
+            if value is None:
+                return None
+        elif not isinstance(value, Hashable):
+            return None
+        captured.append(value)
+
+    return rule.__code__, tuple(captured)
+
+
+class _GroupTable:
+    '''
+    The compiled rules of a list of groups.  Bit i of a group mask stands for
+    the i-th group.
+    '''
+    def __init__(self, group_terms: list[_Terms]):
+        self.group_terms = group_terms
+
+        # Groups with the same term share an entry.
+        term_groups: dict[tuple[int, int], int] = {}
+        self.uncompiled_mask = 0
+        for ind, terms in enumerate(group_terms):
+            if terms is None:
+                self.uncompiled_mask |= 1 << ind
+                continue
+            for term in terms:
+                term_groups[term] = term_groups.get(term, 0) | 1 << ind
+
+        self.terms = [(required, forbidden, group_mask)
+                      for (required, forbidden), group_mask
+                      in term_groups.items()]
+        self._group_masks: dict[int, int] = {}
+
+        # Single bit of a state -> groups whose compiled rules look at it
+        self._dependents: dict[int, int] = {}
+        for required, forbidden, group_mask in self.terms:
+            bits = required | forbidden
+            while bits:
+                low_bit = bits & -bits
+                self._dependents[low_bit] = \
+                    self._dependents.get(low_bit, 0) | group_mask
+                bits ^= low_bit
+
+    def get_group_mask(self, state: int) -> int:
+        '''Get the groups with compiled rules which are accessible.'''
+        group_mask = self._group_masks.get(state)
+        if group_mask is None:
+            group_mask = 0
+            for required, forbidden, term_mask in self.terms:
+                if state & required == required and not state & forbidden:
+                    group_mask |= term_mask
+
+            if len(self._group_masks) >= _MAX_CACHED_STATES:
+                self._group_masks.clear()
+            self._group_masks[state] = group_mask
+
+        return group_mask
+
+    def get_dependents(self, changed: int) -> int:
+        '''
+        Get the groups whose access may differ between two states which
+        differ in the changed bits.
+        '''
+        group_mask = self.uncompiled_mask
+        dependents = self._dependents
+        while changed:
+            low_bit = changed & -changed
+            group_mask |= dependents.get(low_bit, 0)
+            changed ^= low_bit
+
+        return group_mask
+
+
+# Compiled rules shared by every CompiledLogic.  Keyed by the rule key and
+# the settings key.
+_rule_cache: dict[Hashable, _Terms] = {}
+
+# (required, forbidden, char_mask) for each path through
+# updateAvailableCharacters.  Keyed by the settings key and the character
+# assignment.
+_char_path_cache: dict[Hashable, Optional[list[tuple[int, int, int]]]] = {}
+
+# Compiled group lists shared by every CompiledLogic.  Keyed by the rule
+# keys of the groups and the settings key.
+_group_table_cache: dict[Hashable, _GroupTable] = {}
+
+_MAX_CACHED_RULES = 0x1000
+_MAX_CACHED_TABLES = 0x40
+
+
+class CompiledLogic:
+    '''The compiled access rules of a GameConfig.  See module docstring.'''
+    def __init__(self, game_config: logicfactory.GameConfig):
+        self.game_config = game_config
+
+        # Game only looks at these settings.
+        settings = game_config.settings
+        self._settings_key = (settings.game_mode, settings.gameflags)
+
+        # The Game used for tracing is only made if something needs to be
+        # compiled.
+        self._tracer = _Tracer()
+        self._tracing_game: Optional[logictypes.Game] = None
+
+        char_dict = game_config.config.char_assign_dict
+        char_key = (
+            self._settings_key,
+            tuple((spot, char_dict[spot].held_char) for spot in char_dict)
+        )
+        if char_key not in _char_path_cache:
+            if len(_char_path_cache) >= _MAX_CACHED_RULES:
+                _char_path_cache.clear()
+            try:
+                _char_path_cache[char_key] = self._compile_characters()
+            except UntraceableRuleException:
+                _char_path_cache[char_key] = None
+        self._char_paths = _char_path_cache[char_key]
+
+        # id(group) -> (accessRule, terms)
+        self._group_rules: dict[int, tuple[Callable, _Terms]] = {}
+
+        # The groups and rules the table was made for.
+        self._table: Optional[_GroupTable] = None
+        self._table_groups: list[logictypes.LocationGroup] = []
+        self._table_rules: list[Callable] = []
+
+        self._char_masks: dict[int, int] = {}
+        self._char_sets: dict[int, frozenset[CharID]] = {}
+
+    def _get_tracing_game(self) -> logictypes.Game:
+        if self._tracing_game is None:
+            self._tracing_game = logictypes.Game(self.game_config.settings,
+                                                 self.game_config.config)
+            self._tracing_game.keyItems = typing.cast(
+                set, _TracedSet(self._tracer, get_item_bit)
+            )
+
+        return self._tracing_game
+
+    def _compile_characters(self) -> list[tuple[int, int, int]]:
+        def get_char_mask(game: logictypes.Game) -> int:
+            game.updateAvailableCharacters()
+            return get_char_mask_from_chars(game.characters)
+
+        game = self._get_tracing_game()
+        game.characters = set()
+        return _trace(get_char_mask, game, self._tracer)
+
+    def _compile_rule(self, rule: Callable) -> _Terms:
+        game = self._get_tracing_game()
+        game.characters = typing.cast(
+            set, _TracedSet(self._tracer, get_char_bit)
+        )
+        try:
+            paths = _trace(rule, game, self._tracer)
+        except UntraceableRuleException:
+            return None
+
+        terms = {(required, forbidden)
+                 for required, forbidden, result in paths if result}
+        return tuple(_simplify_terms(terms))
+
+    def _get_rule_terms(self, rule: Callable) -> _Terms:
+        rule_key = _get_rule_key(rule)
+        if rule_key is None:
+            return self._compile_rule(rule)
+
+        cache_key = (rule_key, self._settings_key)
+        if cache_key not in _rule_cache:
+            if len(_rule_cache) >= _MAX_CACHED_RULES:
+                _rule_cache.clear()
+            _rule_cache[cache_key] = self._compile_rule(rule)
+
+        return _rule_cache[cache_key]
+
+    def get_group_terms(self, group: logictypes.LocationGroup) -> _Terms:
+        '''
+        Get the compiled access rule of group.  The rule is compiled again if
+        the group's accessRule has been replaced.
+        '''
+        entry = self._group_rules.get(id(group))
+        if entry is None or entry[0] is not group.accessRule:
+            entry = (group.accessRule, self._get_rule_terms(group.accessRule))
+            self._group_rules[id(group)] = entry
+
+        return entry[1]
+
+    def get_char_mask(self, key_item_mask: int) -> int:
+        '''Get the bits of the characters available with the key items.'''
+        char_mask = self._char_masks.get(key_item_mask)
+        if char_mask is not None:
+            return char_mask
+
+        if self._char_paths is None:
+            game = self.make_game(key_item_mask)
+            game.updateAvailableCharacters()
+            char_mask = get_char_mask_from_chars(game.characters)
+        else:
+            # The paths cover every state exactly once.
+            char_mask = next(
+                mask for required, forbidden, mask in self._char_paths
+                if key_item_mask & required == required and
+                not key_item_mask & forbidden
+            )
+
+        if len(self._char_masks) >= _MAX_CACHED_STATES:
+            self._char_masks.clear()
+        self._char_masks[key_item_mask] = char_mask
+
+        return char_mask
+
+    def get_state(self, key_item_mask: int) -> int:
+        '''Add the available characters to the key items.'''
+        return key_item_mask | self.get_char_mask(key_item_mask)
+
+    def get_characters(self, state: int) -> frozenset[CharID]:
+        char_mask = state >> CHAR_SHIFT
+        chars = self._char_sets.get(char_mask)
+        if chars is None:
+            chars = frozenset(char for char in CharID
+                              if char_mask & (1 << int(char)))
+            self._char_sets[char_mask] = chars
+
+        return chars
+
+    def make_game(self, state: int) -> logictypes.Game:
+        '''Get a Game with the key items and characters of state.'''
+        game = logictypes.Game(self.game_config.settings,
+                               self.game_config.config)
+        game.keyItems = set(get_key_items(state))
+        game.characters = set(self.get_characters(state))
+
+        return game
+
+    def _terms_match(self, terms: _Terms, group: logictypes.LocationGroup,
+                     state: int) -> bool:
+        if terms is None:
+            return bool(group.accessRule(self.make_game(state)))
+
+        for required, forbidden in terms:
+            if state & required == required and not state & forbidden:
+                return True
+        return False
+
+    def can_access(self, group: logictypes.LocationGroup,
+                   state: int) -> bool:
+        return self._terms_match(self.get_group_terms(group), group, state)
+
+    def _get_group_table(
+            self, groups: list[logictypes.LocationGroup]) -> _GroupTable:
+        rules = [group.accessRule for group in groups]
+        if self._table is not None and rules == self._table_rules and \
+           groups == self._table_groups:
+            return self._table
+
+        rule_keys = tuple(_get_rule_key(rule) for rule in rules)
+        if None in rule_keys:
+            table = _GroupTable([self.get_group_terms(group)
+                                 for group in groups])
+        else:
+            cache_key = (rule_keys, self._settings_key)
+            table = _group_table_cache.get(cache_key)
+            if table is None:
+                table = _GroupTable([self.get_group_terms(group)
+                                     for group in groups])
+                if len(_group_table_cache) >= _MAX_CACHED_TABLES:
+                    _group_table_cache.clear()
+                _group_table_cache[cache_key] = table
+
+        self._table = table
+        self._table_groups = list(groups)
+        self._table_rules = rules
+        return table
+
+    def get_group_mask(
+            self, state: int,
+            groups: Optional[list[logictypes.LocationGroup]] = None
+    ) -> int:
+        '''
+        Get the groups (default the GameConfig's) accessible in state as a
+        mask.  Bit i is set if groups[i] is accessible.
+        '''
+        if groups is None:
+            groups = self.game_config.locationGroups
+
+        table = self._get_group_table(groups)
+        group_mask = table.get_group_mask(state)
+
+        uncompiled_mask = table.uncompiled_mask
+        if uncompiled_mask:
+            game = self.make_game(state)
+            for ind, group in enumerate(groups):
+                if uncompiled_mask >> ind & 1 and group.accessRule(game):
+                    group_mask |= 1 << ind
+
+        return group_mask
+
+    def get_accessible_groups(
+            self, state: int,
+            groups: Optional[list[logictypes.LocationGroup]] = None
+    ) -> list[logictypes.LocationGroup]:
+        '''
+        Get the groups (default the GameConfig's) accessible in state.
+        '''
+        if groups is None:
+            groups = self.game_config.locationGroups
+
+        group_mask = self.get_group_mask(state, groups)
+        return [group for ind, group in enumerate(groups)
+                if group_mask >> ind & 1]
+
+
+
+class ReachabilityTracker:
+    '''
+    Tracks the key items which can be collected from the start of the game
+    while key items are placed one at a time.
+
+    Placing a key item only records it.  When the tracker is next asked what
+    can be collected, only the groups whose rules look at a newly collected
+    key item or character are checked again.  Placements are undone in
+    reverse order with undo() or rollback().
+
+    The tracker starts from the key items already placed in the GameConfig's
+    groups.  The groups may not change while the tracker is used.
+    '''
+    def __init__(self, logic: CompiledLogic,
+                 key_items: Iterable[ItemID]):
+        self.logic = logic
+        self.groups = list(logic.game_config.locationGroups)
+        self._table = logic._get_group_table(self.groups)
+
+        self.key_item_mask = get_key_item_mask(key_items)
+
+        # id(location) -> index of its group
+        self._group_inds: dict[int, int] = {}
+        self._group_key_items: list[int] = []
+        for ind, group in enumerate(self.groups):
+            group_key_items = 0
+            for location in group.locations:
+                self._group_inds[id(location)] = ind
+                item = location.getKeyItem()
+                if item is not None:
+                    group_key_items |= 1 << item
+            self._group_key_items.append(
+                group_key_items & self.key_item_mask
+            )
+
+        self._collected = 0
+        self._visited = 0
+        self._state = logic.get_state(0)
+        # Key items placed in visited groups which are not collected yet
+        self._pending = 0
+
+        # (group index, group key items, collected, visited, state, pending)
+        # before each placement
+        self._history: list[tuple[int, int, int, int, int, int]] = []
+
+        self._visit((1 << len(self.groups)) - 1)
+
+    def _visit(self, candidates: int):
+        '''
+        Visit the accessible groups among candidates, and then the groups
+        which the key items found there open up.
+        '''
+        group_terms = self._table.group_terms
+        group_key_items = self._group_key_items
+        while True:
+            candidates &= ~self._visited
+            state = self._state
+            new_groups = 0
+            new_key_items = 0
+            while candidates:
+                low_bit = candidates & -candidates
+                candidates ^= low_bit
+                ind = low_bit.bit_length() - 1
+
+                terms = group_terms[ind]
+                if terms is None:
+                    game = self.logic.make_game(state)
+                    if not self.groups[ind].accessRule(game):
+                        continue
+                else:
+                    for required, forbidden in terms:
+                        if state & required == required and \
+                           not state & forbidden:
+                            break
+                    else:
+                        continue
+
+                new_groups |= low_bit
+                new_key_items |= group_key_items[ind]
+
+            self._visited |= new_groups
+            new_key_items &= ~self._collected
+            if not new_key_items:
+                return
+
+            self._collected |= new_key_items
+            self._state = self.logic.get_state(self._collected)
+            candidates = self._table.get_dependents(state ^ self._state)
+
+    def _update(self):
+        '''Collect the pending key items and whatever they open up.'''
+        if self._pending:
+            pending = self._pending
+            self._pending = 0
+
+            self._collected |= pending
+            state = self._state
+            self._state = self.logic.get_state(self._collected)
+            self._visit(self._table.get_dependents(state ^ self._state))
+
+    def place(self, location: typing.Any, item: ItemID):
+        '''Record that item was placed in location.'''
+        ind = self._group_inds[id(location)]
+        self._history.append(
+            (ind, self._group_key_items[ind], self._collected,
+             self._visited, self._state, self._pending)
+        )
+
+        item_bit = get_item_bit(item) & self.key_item_mask
+        self._group_key_items[ind] |= item_bit
+        if self._visited >> ind & 1:
+            self._pending |= item_bit & ~self._collected
+
+    def undo(self):
+        '''Undo the last placement.'''
+        (ind, self._group_key_items[ind], self._collected, self._visited,
+         self._state, self._pending) = self._history.pop()
+
+    def checkpoint(self) -> int:
+        '''Get a checkpoint to pass to rollback().'''
+        return len(self._history)
+
+    def rollback(self, checkpoint: int = 0):
+        '''Undo every placement made since checkpoint (default all).'''
+        if len(self._history) > checkpoint:
+            (ind, _, self._collected, self._visited,
+             self._state, self._pending) = self._history[checkpoint]
+            for entry in reversed(self._history[checkpoint:]):
+                self._group_key_items[entry[0]] = entry[1]
+            del self._history[checkpoint:]
+
+    def get_collected_mask(self) -> int:
+        self._update()
+        return self._collected
+
+    def get_collected_key_items(self) -> list[ItemID]:
+        return get_key_items(self.get_collected_mask())
+
+    def has_all_key_items(self) -> bool:
+        return not self.key_item_mask & ~self.get_collected_mask()
+
+
+_items_by_bit = {int(item): item for item in ItemID}
+
+
+def get_key_item_mask(items: Iterable[Optional[ItemID]]) -> int:
+    mask = 0
+    for item in items:
+        if item is not None:
+            mask |= 1 << item
+
+    return mask
+
+
+def get_char_mask_from_chars(chars: Iterable[CharID]) -> int:
+    mask = 0
+    for char in chars:
+        mask |= get_char_bit(char)
+
+    return mask
+
+
+def get_key_items(state: int) -> list[ItemID]:
+    '''Get the key items of a state in ItemID order.'''
+    key_items = []
+    key_item_mask = state & ((1 << CHAR_SHIFT) - 1)
+    while key_item_mask:
+        low_bit = key_item_mask & -key_item_mask
+        key_items.append(_items_by_bit[low_bit.bit_length() - 1])
+        key_item_mask ^= low_bit
+
+    return key_items
@@ -3,6 +3,7 @@ from typing import List, Optional, Type
 from math import ceil
 
 import ctenums
+import logiccompiler
 from logictypes import BaselineLocation, Location, LocationGroup,\
     LinkedLocation, Game
 from treasures import treasuredata as td
@@ -45,6 +46,8 @@ class GameConfig:
         self.settings = settings
         self.config = config
         self.game: Game
+        self._compiledLogic: Optional[logiccompiler.CompiledLogic] = None
+        self._compiledChars: tuple[Characters, ...] = ()
         self.initLocations()
         self.initKeyItems()
         self.resolveExtraKeyItems()
@@ -127,6 +130,25 @@ class GameConfig:
     def getGame(self) -> Game:
         return self.game
 
+    #
+    # Get the access rules of this mode compiled to bitmask checks.  The
+    # rules are compiled on first use, and again if the character
+    # assignment changes.
+    #
+    # return: A logiccompiler.CompiledLogic for this mode
+    #
+    def getCompiledLogic(self) -> logiccompiler.CompiledLogic:
+        charAssignment = tuple(
+            self.config.char_assign_dict[spot].held_char
+            for spot in self.config.char_assign_dict
+        )
+        if self._compiledLogic is None or \
+           charAssignment != self._compiledChars:
+            self._compiledLogic = logiccompiler.CompiledLogic(self)
+            self._compiledChars = charAssignment
+
+        return self._compiledLogic
+
     #
     # Remove all LocationGroups with the given names.
     #
@@ -1,4 +1,5 @@
 from __future__ import annotations
+import random
 import typing
 
 from ctenums import ItemID, CharID, RecruitID, TreasureID
@@ -470,9 +471,11 @@ class BaselineLocation(Location):
     # given config.  Also sets this object's key item to the chosen item.
     #
     # param: config - The cfg.RandoConfig to write the item to
+    # param: rand - The random.Random to draw the item with
     #
-    def writeRandomItem(self, config: cfg.RandoConfig):
-        item = self.lootDist.get_random_item()
+    def writeRandomItem(self, config: cfg.RandoConfig,
+                        rand: typing.Optional[random.Random] = None):
+        item = self.lootDist.get_random_item(rand)
         self.writeTreasure(item, config)
 
     #
@@ -2,6 +2,7 @@ from __future__ import annotations
 import random
 import typing
 
+import logiccompiler
 import logicfactory
 import logictypes
 
@@ -24,7 +25,8 @@ class KeyItemFiller(typing.Protocol):
 
     def fill_key_item_locations(
             self,
-            game_config: logicfactory.GameConfig
+            game_config: logicfactory.GameConfig,
+            rand: random.Random
     ) -> list[_LocType]:
         '''
         Return a key item assignment for the given GameConfig
@@ -41,7 +43,8 @@ class RandomRejectionFiller:
 
     def fill_key_item_locations(
             self,
-            game_config: logicfactory.GameConfig
+            game_config: logicfactory.GameConfig,
+            rand: random.Random
     ) -> list[_LocType]:
         '''
         Randomly fill in the key items until a valid configuration is reached.
@@ -52,6 +55,13 @@ class RandomRejectionFiller:
                                    game_config.config)
         max_game.keyItems = key_items_set
 
+        # Placements are checked by adding them to a tracker of what is
+        # reachable with no key items placed.
+        tracker = logiccompiler.ReachabilityTracker(
+            game_config.getCompiledLogic(), key_items_set
+        )
+        checkpoint = tracker.checkpoint()
+
         num_attempts = 0
 
         while True:
@@ -67,16 +77,18 @@ class RandomRejectionFiller:
                     f'{len(key_items_list)} KIs'
                 )
 
-            random.shuffle(available_locations)
+            rand.shuffle(available_locations)
             for ind, item in enumerate(key_items_list):
                 available_locations[ind].setKeyItem(item)
+                tracker.place(available_locations[ind], item)
 
-            if is_placement_valid(game_config):
+            if tracker.has_all_key_items():
                 return available_locations[0: len(key_items_list)]
 
             # Reset everything
             for loc in available_locations[0: len(key_items_list)]:
                 loc.unsetKeyItem()
+            tracker.rollback(checkpoint)
 
             num_attempts += 1
             if num_attempts >= self.max_attempts:
@@ -92,7 +104,8 @@ class ALTTPRWeightedFiller:
 
     def fill_key_item_locations(
             self,
-            game_config: logicfactory.GameConfig
+            game_config: logicfactory.GameConfig,
+            rand: random.Random
     ) -> list[_LocType]:
         '''
         Implement a Weighted version of ALTTPR's AssumedFiller algorithm
@@ -107,6 +120,11 @@ class ALTTPRWeightedFiller:
         unassigned_key_items = list(key_items_list)
         assigned_locations: list[_LocType] = []
 
+        # Tracks what the assigned key items make collectable.
+        tracker = logiccompiler.ReachabilityTracker(
+            game_config.getCompiledLogic(), key_items_list
+        )
+
         failure_count = 0
 
         while True:
@@ -114,10 +132,10 @@ class ALTTPRWeightedFiller:
             if not unassigned_key_items:
                 break
 
-            random.shuffle(unassigned_key_items)
+            rand.shuffle(unassigned_key_items)
             next_item = unassigned_key_items.pop()
 
-            collectable_key_items = get_collectable_key_items(game_config)
+            collectable_key_items = tracker.get_collected_key_items()
             assumed_key_items = unassigned_key_items + collectable_key_items
 
             max_game = logictypes.Game(settings, config)
@@ -139,6 +157,7 @@ class ALTTPRWeightedFiller:
 
                 unassigned_key_items = list(key_items_list)
                 assigned_locations = []
+                tracker.rollback()
 
                 # Undo decay for all groups
                 for group in game_config.locationGroups:
@@ -146,10 +165,11 @@ class ALTTPRWeightedFiller:
 
             else:
                 weights = [group.getWeight() for group in avail_groups]
-                group = random.choices(avail_groups, weights=weights, k=1)[0]
-                loc = random.choice([loc for loc in group.locations
-                                     if loc not in assigned_locations])
+                group = rand.choices(avail_groups, weights=weights, k=1)[0]
+                loc = rand.choice([loc for loc in group.locations
+                                   if loc not in assigned_locations])
                 loc.setKeyItem(next_item)
+                tracker.place(loc, next_item)
                 assigned_locations.append(loc)
 
                 # Decay group's weight
@@ -266,7 +286,8 @@ class ALTTPRFiller:
 
     def fill_key_item_locations(
             self,
-            game_config: logicfactory.GameConfig
+            game_config: logicfactory.GameConfig,
+            rand: random.Random
     ) -> list[_LocType]:
         '''
         Get key item locations using ALTTPR's AssumedFiller's algorithm.
@@ -278,6 +299,11 @@ class ALTTPRFiller:
         unassigned_key_items = list(key_items_list)
         assigned_locations: list[_LocType] = []
 
+        # Tracks what the assigned key items make collectable.
+        tracker = logiccompiler.ReachabilityTracker(
+            game_config.getCompiledLogic(), key_items_list
+        )
+
         failure_count = 0
 
         while True:
@@ -285,10 +311,10 @@ class ALTTPRFiller:
             if not unassigned_key_items:
                 break
 
-            random.shuffle(unassigned_key_items)
+            rand.shuffle(unassigned_key_items)
             next_item = unassigned_key_items.pop()
 
-            collectable_key_items = get_collectable_key_items(game_config)
+            collectable_key_items = tracker.get_collected_key_items()
             assumed_key_items = unassigned_key_items + collectable_key_items
 
             max_game = logictypes.Game(settings, config)
@@ -311,10 +337,12 @@ class ALTTPRFiller:
 
                 unassigned_key_items = list(key_items_list)
                 assigned_locations = []
+                tracker.rollback()
             else:
-                loc = random.choice(avail_locs)
+                loc = rand.choice(avail_locs)
                 assigned_locations.append(loc)
                 loc.setKeyItem(next_item)
+                tracker.place(loc, next_item)
 
                 print(f'Assigned {next_item} to {loc.getName()} ')
 
@@ -327,6 +355,7 @@ class ChronosanityFiller:
     '''
     def __init__(self):
         self.locationGroups = []
+        self.logic: typing.Optional[logiccompiler.CompiledLogic] = None
 
     #
     # Get a list of LocationGroups that are available for key item placement.
@@ -339,32 +368,34 @@ class ChronosanityFiller:
             self,
             game: logictypes.Game
     ) -> list[logicfactory.LocationGroup]:
-        game.updateAvailableCharacters()
+        if self.logic is None:
+            raise ValueError('No GameConfig is being filled.')
 
-        # Get a list of all accessible location groups
-        accessibleLocationGroups = []
-        for locationGroup in self.locationGroups:
-            if locationGroup.canAccess(game):
-                if locationGroup.getAvailableLocationCount() > 0:
-                    accessibleLocationGroups.append(locationGroup)
+        state = _get_game_state(self.logic, game)
 
-        return accessibleLocationGroups
+        # Get a list of all accessible location groups
+        return [
+            locationGroup for locationGroup in
+            self.logic.get_accessible_groups(state, self.locationGroups)
+            if locationGroup.getAvailableLocationCount() > 0
+        ]
 
     #
     # Given a weighted list of key items, get a shuffled
     # version of the list with only a single copy of each item.
     #
     # param: weightedList - Weighted key item list
+    # param: rand - random.Random used for the shuffle
     #
     # return: Shuffled list of key items with duplicates removed
     #
     @classmethod
-    def getShuffledKeyItemList(cls, weightedList):
+    def getShuffledKeyItemList(cls, weightedList, rand: random.Random):
         tempList = weightedList.copy()
 
         # In the shuffle, higher weighted items have a better chance of
         # appearing before lower weighted items.
-        random.shuffle(tempList)
+        rand.shuffle(tempList)
 
         keyItemList = []
         for keyItem in tempList:
@@ -378,6 +409,7 @@ class ChronosanityFiller:
     # Given a list of LocationGroups, get a random location.
     #
     # param: groups - List of LocationGroups
+    # param: rand - random.Random used to make the choice
     #
     # return: The LocationGroup the Location was chosen from
     # return: A Location randomly chosen from the groups list
@@ -385,7 +417,8 @@ class ChronosanityFiller:
     @classmethod
     def getRandomLocation(
             cls,
-            groups: list[logicfactory.LocationGroup]):
+            groups: list[logicfactory.LocationGroup],
+            rand: random.Random):
         # get the max rand value from the combined weightings of the location
         # groups. This will be used to help select a location group
         weightTotal = 0
@@ -393,7 +426,7 @@ class ChronosanityFiller:
             weightTotal = weightTotal + group.getWeight()
 
         # Select a location group
-        locationChoice = random.randint(1, weightTotal)
+        locationChoice = rand.randint(1, weightTotal)
         counter = 0
         chosenGroup = None
         for group in groups:
@@ -406,7 +439,7 @@ class ChronosanityFiller:
             raise ValueError("Weighted choice failed")
 
         # Select a random location from the chosen location group.
-        location = random.choice(chosenGroup.getLocations())
+        location = rand.choice(chosenGroup.getLocations())
         return chosenGroup, location
 
     # end getRandomLocation
@@ -416,18 +449,21 @@ class ChronosanityFiller:
     #
     # param: gameConfig A GameConfig object with the configuration information
     #                   necessary to place keys for the selected game type
+    # param: rand - random.Random used for all placement choices
     #
     # return: A list of locations with key items assigned.
     #
     # Raises ImpossibleConfigurationException if not successful.
     def fill_key_item_locations(
             self,
-            gameConfig: logicfactory.GameConfig) -> list[_LocType]:
+            gameConfig: logicfactory.GameConfig,
+            rand: random.Random) -> list[_LocType]:
         self.locationGroups = gameConfig.getLocations()
+        self.logic = gameConfig.getCompiledLogic()
         remainingKeyItems = gameConfig.getKeyItemList()
         chosenLocations: list[_LocType] = []
         success, key_item_locations = self.determineKeyItemPlacement_impl(
-            chosenLocations, remainingKeyItems, gameConfig
+            chosenLocations, remainingKeyItems, gameConfig, rand
         )
 
         if not success:
@@ -441,20 +477,27 @@ class ChronosanityFiller:
     #       by determineKeyItemPlacement after setting up the parameters
     #       needed by this function.
     #
-    # This function will recursively determine key item locations
-    # such that a seed can be 100% completed.  This uses a weighted random
-    # approach to placement and will only consider logically accessible
-    # locations.
+    # This function will determine key item locations such that a seed can
+    # be 100% completed.  This uses a weighted random approach to placement
+    # and will only consider logically accessible locations.
     #
-    # The algorithm for determining locations - For each recursion:
-    #   If there are no key items remaining, unwind the recursion, otherwise
+    # The algorithm for determining locations - For each step:
+    #   If there are no key items remaining, we are done, otherwise
     #     Get a list of logically accessible locations
     #     Choose a location randomly (locations are weighted)
     #     Get a shuffled list of the remaining key items
     #     Loop through the key item list, trying each one in the chosen
     #     location
-    #       Recurse and try the next location/key item
+    #       Take the next step to try the next location/key item
     #
+    # The steps are kept on an explicit stack instead of recursing.
+    #
+    # Whether the remaining key items can be placed only depends on which
+    # key items are already placed: those determine the accessible groups,
+    # and every chosen location is in one of them.  The (placed, remaining)
+    # key item masks of each step that failed are remembered so that the
+    # same dead end is not searched again when it is reached by placing the
+    # same key items in a different order.
     #
     # param: chosenLocations - List of locations already chosen for key items
     # param: remainingKeyItems - List of key items remaining to be placed
@@ -465,6 +508,7 @@ class ChronosanityFiller:
     #                     time.
     # TODO:  Should this passtwo parameters? Game and updateKeyItems function?
     #        It's weird using the Game member of GameConfig.
+    # param: rand - random.Random used for all placement choices
     #
     # return: A tuple containing:
     #             A Boolean indicating whether or not key item placement was
@@ -475,27 +519,35 @@ class ChronosanityFiller:
             self,
             chosenLocations: list[_LocType],
             remainingKeyItems: list[ctenums.ItemID],
-            gameConfig: logicfactory.GameConfig
+            gameConfig: logicfactory.GameConfig,
+            rand: random.Random
     ) -> typing.Tuple[bool, list[_LocType]]:
-        if len(remainingKeyItems) == 0:
-            # We've placed all key items.  This is our breakout condition
-            return True, chosenLocations
-        else:
-            # We still have key items to place.
-            availableLocations = self.getAvailableLocations(
-                gameConfig.getGame()
-            )
-            if len(availableLocations) == 0:
-                # This item configuration is not completable.
-                return False, chosenLocations
-            else:
-                # Continue placing key items.
-                keyItemConfirmed = False
-                returnedChosenLocations = None
+        game = gameConfig.getGame()
+        placedMask = logiccompiler.get_key_item_mask(game.keyItems)
+        remainingMask = logiccompiler.get_key_item_mask(remainingKeyItems)
+
+        # (placed mask, remaining mask) of steps which can not succeed
+        deadEnds: set[tuple[int, int]] = set()
+
+        # Each step on the stack is a list of:
+        #   [locationGroup, location, localKeyItemList, next key item index,
+        #    remainingKeyItems, placedMask, remainingMask]
+        stack: list[list] = []
 
+        while True:
+            if not remainingKeyItems:
+                # We've placed all key items.  This is our breakout condition
+                return True, chosenLocations
+
+            stepKey = (placedMask, remainingMask)
+            availableLocations = []
+            if stepKey not in deadEnds:
+                availableLocations = self.getAvailableLocations(game)
+
+            if availableLocations:
                 # Choose a random location
                 locationGroup, location = \
-                    self.getRandomLocation(availableLocations)
+                    self.getRandomLocation(availableLocations, rand)
                 locationGroup.removeLocation(location)
                 locationGroup.decayWeight()
                 chosenLocations.append(location)
@@ -506,38 +558,52 @@ class ChronosanityFiller:
                 # Use the weighted key item list to get a list of key items
                 # that we can loop through and attempt to place.
                 localKeyItemList = \
-                    self.getShuffledKeyItemList(remainingKeyItems)
-                for keyItem in localKeyItemList:
-                    # Try placing this key item and then recurse
-                    location.setKeyItem(keyItem)
-                    gameConfig.getGame().addKeyItem(keyItem)
-
-                    newKeyItemList = [x for x in remainingKeyItems
-                                      if x != keyItem]
-                    # recurse and try to place the next key item.
-                    keyItemConfirmed, returnedChosenLocations = \
-                        self.determineKeyItemPlacement_impl(chosenLocations,
-                                                            newKeyItemList,
-                                                            gameConfig)
-
-                    if keyItemConfirmed:
-                        # We're unwinding the recursion here,
-                        # all key items are placed.
-                        return keyItemConfirmed, returnedChosenLocations
-
-                    gameConfig.getGame().removeKeyItem(keyItem)
-                # end keyItem loop
-
-                # If we get here, we failed to place an item.
-                # Undo location modifications
-                locationGroup.addLocation(location)
-                locationGroup.undoWeightDecay()
-                chosenLocations.remove(location)
-                location.unsetKeyItem()
-
+                    self.getShuffledKeyItemList(remainingKeyItems, rand)
+                stack.append([locationGroup, location, localKeyItemList, 0,
+                              remainingKeyItems, placedMask, remainingMask])
+            else:
+                # This item configuration is not completable.
+                deadEnds.add(stepKey)
+
+            # Find the next key item to try, backing out of steps which have
+            # tried all of theirs.
+            while stack:
+                step = stack[-1]
+                (locationGroup, location, localKeyItemList, keyItemIndex,
+                 stepKeyItems, stepPlacedMask, stepRemainingMask) = step
+                if keyItemIndex > 0:
+                    game.removeKeyItem(localKeyItemList[keyItemIndex-1])
+
+                if keyItemIndex == len(localKeyItemList):
+                    # We failed to place an item.
+                    # Undo location modifications
+                    locationGroup.addLocation(location)
+                    locationGroup.undoWeightDecay()
+                    chosenLocations.pop()
+                    location.unsetKeyItem()
+
+                    deadEnds.add((stepPlacedMask, stepRemainingMask))
+                    stack.pop()
+                    continue
+
+                keyItem = localKeyItemList[keyItemIndex]
+                step[3] = keyItemIndex + 1
+
+                keyItemBit = logiccompiler.get_item_bit(keyItem)
+                placedMask = stepPlacedMask | keyItemBit
+                remainingMask = stepRemainingMask & ~keyItemBit
+                if (placedMask, remainingMask) in deadEnds:
+                    continue
+
+                # Try placing this key item and then try the next location.
+                location.setKeyItem(keyItem)
+                game.addKeyItem(keyItem)
+                remainingKeyItems = [x for x in stepKeyItems if x != keyItem]
+                break
+            else:
                 return False, chosenLocations
 
-# end determineKeyItemPlacement_impl recursive function
+# end determineKeyItemPlacement_impl function
 
 
 # These maybe should be methods of logicfactory.GameConfig?
@@ -547,13 +613,22 @@ def is_placement_valid(
     '''
     Determines whether all key items are reachable in a GameConfig.
     '''
-    key_items_list = list(set(game_config.getKeyItemList()))
-    accessible_keys = get_collectable_key_items(game_config)
+    tracker = logiccompiler.ReachabilityTracker(
+        game_config.getCompiledLogic(), game_config.getKeyItemList()
+    )
+    return tracker.has_all_key_items()
+
 
-    inaccessible_keys = [x for x in key_items_list
-                         if x not in accessible_keys]
+def _get_game_state(logic: logiccompiler.CompiledLogic,
+                    game: logictypes.Game) -> int:
+    '''
+    Get the compiled logic state of game.  Like
+    game.updateAvailableCharacters(), this sets game.characters.
+    '''
+    state = logic.get_state(logiccompiler.get_key_item_mask(game.keyItems))
+    game.characters = set(logic.get_characters(state))
 
-    return not inaccessible_keys
+    return state
 
 
 def get_available_location_groups(
@@ -565,15 +640,15 @@ def get_available_location_groups(
     Find reachable LocaionGoups with space for a key item.
     '''
 
-    location_groups = []
-    game.updateAvailableCharacters()
+    logic = game_config.getCompiledLogic()
+    state = _get_game_state(logic, game)
 
-    for group in game_config.locationGroups:
-        if group.accessRule(game):
-            unassigned_locs = [loc for loc in group.locations
-                               if loc not in assigned_locs]
-            if unassigned_locs:
-                location_groups.append(group)
+    location_groups = []
+    for group in logic.get_accessible_groups(state):
+        unassigned_locs = [loc for loc in group.locations
+                           if loc not in assigned_locs]
+        if unassigned_locs:
+            location_groups.append(group)
 
     return location_groups
 
@@ -587,13 +662,14 @@ def get_available_locations(
     Find reachable locations that have not already been assigned key items.
     '''
 
+    logic = game_config.getCompiledLogic()
+    state = _get_game_state(logic, game)
+
     locations = []
-    game.updateAvailableCharacters()
-    for group in game_config.locationGroups:
-        if group.accessRule(game):
-            locations.extend(
-                [loc for loc in group.locations if loc not in assigned_locs]
-            )
+    for group in logic.get_accessible_groups(state):
+        locations.extend(
+            [loc for loc in group.locations if loc not in assigned_locs]
+        )
 
     return locations
 
@@ -605,37 +681,10 @@ def get_collectable_key_items(
     Traverse the game config to determine what can be collected.
     '''
 
-    settings = game_config.settings
-    config = game_config.config
-
-    cur_game = logictypes.Game(settings, config)
-    cur_game.keyItems = set()
-    cur_game.updateAvailableCharacters()
-
-    key_items = set(list(game_config.getKeyItemList()))
-
-    groups = list(game_config.locationGroups)
-    while True:
-        new_keys = []
-        exhausted_groups = []
-        for group in groups:
-            if group.accessRule(cur_game):
-                for location in group.locations:
-                    item = location.getKeyItem()
-                    if item in key_items:
-                        new_keys.append(item)
-                exhausted_groups.append(group)
-
-        for group in exhausted_groups:
-            groups.remove(group)
-
-        if new_keys:
-            cur_game.keyItems.update(new_keys)
-            cur_game.updateAvailableCharacters()
-        else:
-            break
-
-    return list(cur_game.keyItems)
+    tracker = logiccompiler.ReachabilityTracker(
+        game_config.getCompiledLogic(), game_config.getKeyItemList()
+    )
+    return tracker.get_collected_key_items()
 
 
 def getFiller(settings: rset.Settings) -> KeyItemFiller:
@@ -649,20 +698,21 @@ def getFiller(settings: rset.Settings) -> KeyItemFiller:
 
 
 def commitKeyItems(settings: rset.Settings,
-                   config: cfg.RandoConfig):
+                   config: cfg.RandoConfig,
+                   rand: random.Random):
     '''Add Key Items to the config.'''
     gameConfig = logicfactory.getGameConfig(settings, config)
     filler = getFiller(settings)
 
     try:
-        chosenLocations = filler.fill_key_item_locations(gameConfig)
+        chosenLocations = filler.fill_key_item_locations(gameConfig, rand)
     except LogicIterationException:
         # Chronosanity is guaranteed to return a valid assignment in the
         # exceedingly rare case that another filler fails.
         print(f'{filler.__class__.__name__} failed. '
               'Falling back to ChronosanityFiller.')
         filler = ChronosanityFiller()
-        chosenLocations = filler.fill_key_item_locations(gameConfig)
+        chosenLocations = filler.fill_key_item_locations(gameConfig, rand)
 
     for location in chosenLocations:
         location.writeKeyItem(config)
@@ -679,7 +729,7 @@ def commitKeyItems(settings: rset.Settings,
                 if location.getKeyItem() in (None,
                                              ctenums.ItemID.NONE,
                                              ctenums.ItemID.MOP):
-                    location.writeRandomItem(config)
+                    location.writeRandomItem(config, rand)
 
                 # Always list the BaselineLocations for spoiler purposes
                 additional_locs.append(location)
@@ -7,13 +7,15 @@ import random
 import randosettings as rset
 
 
-def random_weighted_choice_from_dict(choice_dict: Dict[Any, int]):
+def random_weighted_choice_from_dict(choice_dict: Dict[Any, int],
+                                     rand: random.Random):
     '''Make a random choice from dict keys given weights in dict values.'''
     keys, weights = zip(*choice_dict.items())
-    return random.choices(keys, weights, k=1)[0]
+    return rand.choices(keys, weights, k=1)[0]
 
 
-def generate_mystery_settings(base_settings: rset.Settings) -> rset.Settings:
+def generate_mystery_settings(base_settings: rset.Settings,
+                              rand: random.Random) -> rset.Settings:
     '''
     Use the mystery settings in base_settings to generate a new settings
     object with random flags.
@@ -24,7 +26,8 @@ def generate_mystery_settings(base_settings: rset.Settings) -> rset.Settings:
     GF = rset.GameFlags
     ret_settings = copy.deepcopy(base_settings)
 
-    weighted_choice = random_weighted_choice_from_dict
+    weighted_choice = functools.partial(random_weighted_choice_from_dict,
+                                        rand=rand)
     ms = base_settings.mystery_settings
 
     ret_settings.game_mode = weighted_choice(ms.game_mode_freqs)
@@ -60,7 +63,7 @@ def generate_mystery_settings(base_settings: rset.Settings) -> rset.Settings:
             added_flag = flag
         elif flag in ms.flag_prob_dict:
             prob = ms.flag_prob_dict[flag]
-            if random.random() < prob:
+            if rand.random() < prob:
                 added_flag = flag
             else:
                 added_flag = GF(0)
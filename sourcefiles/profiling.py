@@ -0,0 +1,215 @@
+'''
+Opt-in instrumentation for the generation pipeline.
+
+Basic usage:
+    profiler = profiling.Profiler()
+    with profiler.profile():
+        with profiler.stage('treasurewriter'):
+            treasurewriter.write_treasures_to_config(settings, config, rand)
+    report = profiler.get_report()
+
+Each named stage records its wall time, the number of times it was entered,
+and (with track_allocations) the net and peak bytes allocated while it ran.
+Stages may be nested, and a stage entered more than once accumulates.
+
+While profile() is active the hot helpers in HOT_HELPERS are wrapped to
+count calls and total time.  Functions are replaced in every loaded module
+which imported them by name, so "from ctdecompress import compress" users
+are counted too.  Everything is restored when profile() exits.
+'''
+from __future__ import annotations
+
+import contextlib
+import dataclasses
+import functools
+import importlib
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Iterator, Optional
+
+
+# (module, attribute) of helpers to count calls for.  The attribute may be
+# Class.method.
+HOT_HELPERS: tuple[tuple[str, str], ...] = (
+    ('eventcommand', 'get_command'),
+    ('ctdecompress', 'compress'),
+    ('ctdecompress', 'decompress'),
+    ('freespace', 'FreeSpace.get_free_addr'),
+)
+
+
+@dataclasses.dataclass
+class StageStats:
+    calls: int = 0
+    seconds: float = 0.0
+    alloc_bytes: int = 0  # Net change in traced memory
+    peak_alloc_bytes: int = 0  # Largest rise in traced memory in one call
+
+    def to_jot_json(self) -> dict[str, Any]:
+        return {
+            'calls': self.calls,
+            'seconds': round(self.seconds, 6),
+            'alloc_bytes': self.alloc_bytes,
+            'peak_alloc_bytes': self.peak_alloc_bytes
+        }
+
+
+@dataclasses.dataclass
+class HelperStats:
+    calls: int = 0
+    seconds: float = 0.0
+
+    def to_jot_json(self) -> dict[str, Any]:
+        return {'calls': self.calls, 'seconds': round(self.seconds, 6)}
+
+
+@dataclasses.dataclass
+class _StageFrame:
+    '''A stage which has been entered but not exited.'''
+    stats: StageStats
+    start_time: float
+    start_mem: int
+    peak_mem: int
+
+
+class Profiler:
+    '''Collects per-stage and per-helper timings.  See module docstring.'''
+    def __init__(self, track_allocations: bool = True,
+                 helpers: tuple[tuple[str, str], ...] = HOT_HELPERS):
+        self.track_allocations = track_allocations
+        self.helpers = helpers
+
+        self.stages: dict[str, StageStats] = {}
+        self.helper_stats: dict[str, HelperStats] = {}
+        self.total_seconds = 0.0
+
+        self._open_stages: list[_StageFrame] = []
+        self._patches: list[tuple[Any, str, Any]] = []
+
+    def _get_memory(self) -> int:
+        '''
+        Get the traced memory and fold the peak since the last call into
+        every open stage.
+
+        tracemalloc.reset_peak is new in Python 3.9.  Without it the peak
+        can not be restarted, so stages only see the memory at the times
+        stages are entered and exited.
+        '''
+        if not tracemalloc.is_tracing():
+            return 0
+
+        current, peak = tracemalloc.get_traced_memory()
+        reset_peak = getattr(tracemalloc, 'reset_peak', None)
+        if reset_peak is None:
+            peak = current
+
+        for frame in self._open_stages:
+            frame.peak_mem = max(frame.peak_mem, peak)
+
+        if reset_peak is not None:
+            reset_peak()
+
+        return current
+
+    @contextlib.contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        '''Record the time and memory used by the body under name.'''
+        stats = self.stages.setdefault(name, StageStats())
+        start_mem = self._get_memory()
+        frame = _StageFrame(stats, time.perf_counter(), start_mem, start_mem)
+        self._open_stages.append(frame)
+        try:
+            yield
+        finally:
+            end_mem = self._get_memory()
+            self._open_stages.pop()
+
+            stats.calls += 1
+            stats.seconds += time.perf_counter() - frame.start_time
+            stats.alloc_bytes += end_mem - frame.start_mem
+            stats.peak_alloc_bytes = max(stats.peak_alloc_bytes,
+                                         frame.peak_mem - frame.start_mem)
+
+    def _wrap_helper(self, name: str, func: Callable) -> Callable:
+        stats = self.helper_stats.setdefault(name, HelperStats())
+        perf_counter = time.perf_counter
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                stats.calls += 1
+                stats.seconds += perf_counter() - start
+
+        return wrapper
+
+    def _patch_helpers(self):
+        for module_name, attr_path in self.helpers:
+            owner: Any = importlib.import_module(module_name)
+            *owner_path, attr = attr_path.split('.')
+            for owner_attr in owner_path:
+                owner = getattr(owner, owner_attr)
+
+            orig = getattr(owner, attr)
+            wrapper = self._wrap_helper(f'{module_name}.{attr_path}', orig)
+
+            if owner_path:
+                targets = [owner]
+            else:
+                # Also replace copies made by "from module import attr".
+                targets = [
+                    module for module in list(sys.modules.values())
+                    if getattr(module, '__dict__', {}).get(attr) is orig
+                ]
+
+            for target in targets:
+                self._patches.append((target, attr, orig))
+                setattr(target, attr, wrapper)
+
+    def _unpatch_helpers(self):
+        while self._patches:
+            target, attr, orig = self._patches.pop()
+            setattr(target, attr, orig)
+
+    @contextlib.contextmanager
+    def profile(self) -> Iterator[None]:
+        '''Instrument the hot helpers and trace allocations in the body.'''
+        start_tracing = self.track_allocations and \
+            not tracemalloc.is_tracing()
+        if start_tracing:
+            tracemalloc.start()
+
+        self._patch_helpers()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.total_seconds += time.perf_counter() - start
+            self._unpatch_helpers()
+            if start_tracing:
+                tracemalloc.stop()
+
+    def get_report(self) -> dict[str, Any]:
+        return {
+            'total_seconds': round(self.total_seconds, 6),
+            'stages': {
+                name: stats.to_jot_json()
+                for name, stats in self.stages.items()
+            },
+            'helpers': {
+                name: stats.to_jot_json()
+                for name, stats in self.helper_stats.items()
+            }
+        }
+
+
+def get_stage(profiler: Optional[Profiler],
+              name: str) -> contextlib.AbstractContextManager:
+    '''Get profiler.stage(name), or a context which does nothing.'''
+    if profiler is None:
+        return contextlib.nullcontext()
+
+    return profiler.stage(name)
@@ -292,14 +292,14 @@ class RandoConfig:
         be read easily from the rom: enemy_dict, itemdb, pcstats, tech_db,
           enemy_ai_db, enemy_atk_db, shop_manager.
         '''
-        rom_data = ct_rom.rom_data  # Some types work on bytearrays
-        self.enemy_dict = enemystats.get_stat_dict_from_ctrom(ct_rom)
+        # Some types work on buffers.  They only read, so they share one
+        # view of the rom instead of copying it.
+        rom_view = ct_rom.rom_data.get_view()
+        self.enemy_dict = enemystats.get_stat_dict_from_rom(rom_view)
         self.enemy_sprite_dict = enemystats.get_sprite_dict_from_ctrom(ct_rom)
-        self.item_db = itemdata.ItemDB.from_rom(rom_data.getbuffer())
+        self.item_db = itemdata.ItemDB.from_rom(rom_view)
         self.pcstats = ctpcstats.PCStatsManager.from_ctrom(ct_rom)
-        self.tech_db = techdb.TechDB.get_default_db(rom_data.getbuffer())
-        self.enemy_ai_db = enemyai.EnemyAIDB.from_ctrom(ct_rom)
-        self.enemy_atk_db = enemytechdb.EnemyAttackDB.from_rom(
-            rom_data.getbuffer()
-        )
-        self.shop_manager = shoptypes.ShopManager(rom_data.getbuffer())
+        self.tech_db = techdb.TechDB.get_default_db(rom_view)
+        self.enemy_ai_db = enemyai.EnemyAIDB.from_rom(rom_view)
+        self.enemy_atk_db = enemytechdb.EnemyAttackDB.from_rom(rom_view)
+        self.shop_manager = shoptypes.ShopManager(rom_view)
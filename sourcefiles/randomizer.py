@@ -3,6 +3,8 @@ The Chrono Trigger: Jets of Time Randomizer
 '''
 from __future__ import annotations
 
+import contextlib
+import hashlib
 import random
 import pickle
 import sys
@@ -11,7 +13,7 @@ import textwrap
 import typing
 
 from pathlib import Path
-from typing import Optional, Union
+from typing import BinaryIO, Optional, Union
 
 import cli.arguments as arguments
 import charassign
@@ -46,6 +48,9 @@ from vanillarando import vanillarando
 import epochfail
 import flashreduce
 import seedhash
+import seedpatch
+import baseconfigcache
+import profiling
 import prismshard
 import scriptshortener
 import bucketlist
@@ -56,7 +61,7 @@ import byteops
 import ctenums
 import ctevent
 import eventcommand
-from ctrom import CTRom
+from ctrom import CTRom, map_rom_file
 import ctstrings
 import enemyrewards
 
@@ -80,6 +85,14 @@ class NoConfigException(GenerationFailedException):
     '''Raise when trying to generate a rom with no config set.'''
 
 
+class NoRomException(GenerationFailedException):
+    '''Raise when a dry run Randomizer is asked for a rom.'''
+
+
+class NoBaseConfigException(GenerationFailedException):
+    '''Raise when a dry run has no cached base config for its settings.'''
+
+
 class Randomizer:
     '''
     Main randomizer class.  Produces a random Chrono Trigger rom given a
@@ -101,18 +114,35 @@ class Randomizer:
         rando.set_random_config()
         rando.generate_rom()
         out_rom = rando.get_generated_rom()
+
+    Dry run usage (config and spoilers only):
+        # The base config must have been cached by an earlier generation
+        # or by Randomizer.cache_base_configs.
+        rando = Randomizer(None, settings=rset.Settings())
+        rando.set_random_config()
+        rando.write_json_spoiler_log('spoilers.json')
     '''
     _pickles_path: Path = Path(__file__).parent / 'pickles'
 
-    def __init__(self, rom: bytes, is_vanilla: bool = True,
+    # Maximum number of stage-0 roms (about 4MB each) kept by a Randomizer.
+    _max_stage0_roms: int = 4
+
+    # Holds the rom-derived part of the base config between generations.
+    # See get_base_config_from_settings.
+    base_config_cache = baseconfigcache.BaseConfigCache(_pickles_path)
+
+    def __init__(self, rom: Optional[bytes], is_vanilla: bool = True,
                  settings: Optional[rset.Settings] = None,
                  config: Optional[cfg.RandoConfig] = None):
         '''
         Constructor for a Randomizer.
 
         Args:
-            rom : bytes
-                A bytes-like object of the input rom.
+            rom : Optional[bytes]
+                A bytes-like object of the input rom.  If None, the
+                Randomizer is a dry run which can only make configs and
+                spoilers.  Its base config data is read from
+                Randomizer.base_config_cache.
             is_vanilla: bool = True
                 Whether the rom is an unmodified rom.  Both headerless and
                 headered roms will be accepted if is_vanilla is True.  Using
@@ -130,9 +160,40 @@ class Randomizer:
         '''
         # We want to keep a copy of the base rom around so that we can
         # generate many seeds from it.
-        self.base_ctrom = CTRom(rom, ignore_checksum=not is_vanilla)
+        self.base_ctrom: Optional[CTRom] = None
+        if rom is not None:
+            self.base_ctrom = CTRom(rom, ignore_checksum=not is_vanilla)
+
+        # Whether the base rom is an unmodified rom.  When is_vanilla is
+        # False, this is only checked on the first generation so that
+        # repeated generations (e.g. seedbatch workers) do not rehash it.
+        self._base_is_vanilla: Optional[bool] = True if is_vanilla else None
+        # md5 of the base rom for base_config_cache keys.  The base rom never
+        # changes, so it is only hashed on the first generation.
+        self._base_rom_digest: Optional[str] = None
         self.out_rom: Optional[CTRom] = None
+
+        # Roms with all of the settings-only changes applied, keyed on the
+        # settings they depend on.  See __get_stage0_rom.
+        self._stage0_roms: dict[tuple, tuple[CTRom, Optional[int]]] = {}
+
+        # When set, every free space allocation is recorded and a summary
+        # is stored in free_space_report after each generation (even a
+        # failed one).
+        self.track_free_space = False
+        self.free_space_report: Optional[dict] = None
+
+        # When set, set_random_config and generate_rom record the time and
+        # allocations of each stage in profile_report.  See profiling.py.
+        self.profile = False
+        self.profile_report: Optional[dict] = None
+        self._profiler: Optional[profiling.Profiler] = None
+
         self.hash_string_bytes: Optional[bytes] = None
+
+        # How the hash string on the active/wait screen is computed.
+        self.seed_hash_mode = seedhash.HashMode.FULL
+
         self.has_generated = False
 
         self.settings = settings
@@ -142,6 +203,16 @@ class Randomizer:
     # The randomizer will hold onto its last generated rom in self.out_rom
     # The settings and config are made properties so that I can update
     # whether out_rom correctly reflects the settings/config.
+    @property
+    def is_dry_run(self) -> bool:
+        '''Whether this Randomizer was made without a rom.'''
+        return self.base_ctrom is None
+
+    def __get_base_ctrom(self) -> CTRom:
+        if self.base_ctrom is None:
+            raise NoRomException('A dry run can not make a rom.')
+        return self.base_ctrom
+
     @property
     def settings(self):
         '''
@@ -174,69 +245,91 @@ class Randomizer:
         if self.settings is None:
             raise NoSettingsException
 
-        random.seed(self.settings.seed)
+        self.profile_report = None
+        with self.__profiling('set_random_config'):
+            self.__randomize_config()
+
+    def __randomize_config(self):
+        '''Make self.config from self.settings.'''
+        # Every random choice made for this config draws from rand rather
+        # than the global random module.  This keeps generation deterministic
+        # even when other seeds are generated concurrently in this process.
+        rand = random.Random(self.settings.seed)
 
         if rset.GameFlags.MYSTERY in self.settings.gameflags:
-            self.settings = mystery.generate_mystery_settings(self.settings)
+            with self.__stage('mystery'):
+                self.settings = mystery.generate_mystery_settings(
+                    self.settings, rand
+                )
 
         self.settings.fix_flag_conflicts()
 
         # Some of the config defaults (prices, techdb, enemy stats) are
         # read from the rom.  This routine partially patches a copy of the
-        # base rom, gets the data, and builds the base config.
-        self.config = Randomizer.get_base_config_from_settings(
-            bytearray(self.base_ctrom.rom_data.getvalue()),
-            self.settings
-        )
-
-        # An alternate approach is to build the base config with the pickles
-        # provided.  You just have to make sure to redump any time time that
-        # base_patch.ips or hard.ips change.  Demo below.
-        '''
-        with self._get_pickle_path('default_randoconfig.pickle').open('rb') as infile:
-            self.config = pickle.load(infile)
-
-        if self.settings.enemy_difficulty == rset.Difficulty.HARD:
-            with self._get_pickle_path('enemy_dict_hard.pickle').open('rb') as infile:
-                self.config.enemy_dict = pickle.load(infile)
-        '''
+        # base rom, gets the data, and builds the base config.  The rom data
+        # is cached in pickles/ and only rebuilt when the rom or patches
+        # change.
+        with self.__stage('base_config'):
+            ct_vanilla = None
+            if self.base_ctrom is not None:
+                ct_vanilla = self.base_ctrom.rom_data.getvalue()
+                if self._base_rom_digest is None:
+                    self._base_rom_digest = \
+                        hashlib.md5(ct_vanilla).hexdigest()
+            self.config = Randomizer.get_base_config_from_settings(
+                ct_vanilla, self.settings, rand, self._base_rom_digest
+            )
 
         # Character config.  Includes tech randomization and who can equip
         # which items.
-        elementrando.write_config(self.settings, self.config, random)
-        charrando.write_config(self.settings, self.config)
-
-        techrandomizer.write_tech_order_to_config(self.settings,
-                                                  self.config)
-
-        # Tech Damage Rando can add duplicate effect headers for randomized powers.
-        # So we have to generate the combo tech descs before randomizing the single tech damage.
-        techdescs.update_combo_tech_descs(self.config.tech_db)
-        if rset.GameFlags.TECH_DAMAGE_RANDO in self.settings.gameflags:
-            techdamagerando.modify_all_single_techs(self.config.tech_db)
-        techdescs.update_single_tech_descs(self.config.tech_db)
-        techdescs.clean_up_desc_space(self.config.tech_db)
+        with self.__stage('elementrando'):
+            elementrando.write_config(self.settings, self.config, rand)
+
+        with self.__stage('charrando'):
+            charrando.write_config(self.settings, self.config, rand)
+
+        with self.__stage('techrandomizer'):
+            techrandomizer.write_tech_order_to_config(self.settings,
+                                                      self.config, rand)
+
+            # Tech Damage Rando can add duplicate effect headers for
+            # randomized powers.  So we have to generate the combo tech descs
+            # before randomizing the single tech damage.
+            techdescs.update_combo_tech_descs(self.config.tech_db)
+            if rset.GameFlags.TECH_DAMAGE_RANDO in self.settings.gameflags:
+                techdamagerando.modify_all_single_techs(self.config.tech_db,
+                                                        rand)
+            techdescs.update_single_tech_descs(self.config.tech_db)
+            techdescs.clean_up_desc_space(self.config.tech_db)
 
         # Fast Magic.  Should be fine before or after charrando.
         # Safest after.
         fastmagic.write_config(self.settings, self.config)
 
         # Treasure config.
-        treasurewriter.write_treasures_to_config(self.settings, self.config)
+        with self.__stage('treasurewriter'):
+            treasurewriter.write_treasures_to_config(self.settings,
+                                                     self.config, rand)
 
         # Enemy rewards
-        enemyrewards.write_enemy_rewards_to_config(self.settings, self.config)
+        with self.__stage('enemyrewards'):
+            enemyrewards.write_enemy_rewards_to_config(self.settings,
+                                                       self.config, rand)
 
         # Key item config.  Important that this goes after treasures because
         # otherwise the treasurewriter can overwrite key items placed by
         # Chronosanity
-        logicwriter.commitKeyItems(self.settings, self.config)
+        with self.__stage('logicwriter'):
+            logicwriter.commitKeyItems(self.settings, self.config, rand)
 
         # Now go write LW extra items if need be
-        treasurewriter.add_lw_key_item_gear(self.settings, self.config)
+        with self.__stage('treasurewriter'):
+            treasurewriter.add_lw_key_item_gear(self.settings, self.config,
+                                                rand)
 
         # Shops
-        shopwriter.write_shops_to_config(self.settings, self.config)
+        with self.__stage('shopwriter'):
+            shopwriter.write_shops_to_config(self.settings, self.config, rand)
 
         # Robo's Ribbon in itemdb
         roboribbon.set_robo_ribbon_in_config(self.config)
@@ -244,15 +337,20 @@ class Randomizer:
         # Item Rando
         # Important this is done after roboribbon or itemrando gets confused
         # over which stat boost is +3 speed
-        itemrando.write_item_prices_to_config(self.settings, self.config)
-        itemrando.randomize_healing(self.settings, self.config)
-        itemrando.randomize_accessories(self.settings, self.config)
-        # itemrando.randomize_weapon_armor_stats(self.settings, self.config)
-        itemrando.alt_gear_rando(self.settings, self.config)
-        self.config.item_db.update_all_descriptions()
+        with self.__stage('itemrando'):
+            itemrando.write_item_prices_to_config(self.settings, self.config,
+                                                  rand)
+            itemrando.randomize_healing(self.settings, self.config, rand)
+            itemrando.randomize_accessories(self.settings, self.config, rand)
+            # itemrando.randomize_weapon_armor_stats(self.settings,
+            #                                        self.config, rand)
+            itemrando.alt_gear_rando(self.settings, self.config, rand)
+            self.config.item_db.update_all_descriptions()
 
         # Boss Rando
-        bossrando.write_assignment_to_config(self.settings, self.config)
+        with self.__stage('bossrando'):
+            bossrando.write_assignment_to_config(self.settings, self.config,
+                                                 rand)
 
         # We need the boss rando assignment to determine which bosses need
         # additional bossscaler scaling.  That is accomplished by the above
@@ -262,27 +360,57 @@ class Randomizer:
         # This has to come before boss rando scaling  because some boss scaling
         # changes are defined absolutely instead of relatively, so they would
         # just overwrite the boss rando scaling.
-        bossscaler.determine_boss_rank(self.settings, self.config)
+        with self.__stage('bossscaler'):
+            bossscaler.determine_boss_rank(self.settings, self.config)
 
-        # Finally, scale based on new location.
-        bossrando.scale_bosses_given_assignment(self.settings, self.config)
+        with self.__stage('bossrando'):
+            # Finally, scale based on new location.
+            bossrando.scale_bosses_given_assignment(self.settings,
+                                                    self.config, rand)
 
-        # Black Tyrano/Magus boss randomization
-        bossrando.randomize_midbosses(self.settings, self.config)
+            # Black Tyrano/Magus boss randomization
+            bossrando.randomize_midbosses(self.settings, self.config, rand)
 
         # Tabs
-        tabwriter.write_tabs_to_config(self.settings, self.config)
+        with self.__stage('tabs'):
+            tabwriter.write_tabs_to_config(self.settings, self.config, rand)
 
         # Bucket
-        bucketlist.add_objectives_to_config(self.settings, self.config)
+        with self.__stage('bucketlist'):
+            bucketlist.add_objectives_to_config(self.settings, self.config,
+                                                rand)
 
         # Omen elevator
         self.__update_key_item_descs()
-        self.__set_omen_elevators_config()
+        self.__set_omen_elevators_config(rand)
 
         # Ice age GG buffs if IA flag is present in settings.
         iceage.write_config(self.settings, self.config)
 
+    @contextlib.contextmanager
+    def __profiling(self, name: str) -> typing.Iterator[None]:
+        '''
+        If self.profile is set, profile the body and store the report in
+        self.profile_report[name] (even if the body fails).
+        '''
+        if not self.profile:
+            yield
+            return
+
+        self._profiler = profiling.Profiler()
+        try:
+            with self._profiler.profile():
+                yield
+        finally:
+            if self.profile_report is None:
+                self.profile_report = {}
+            self.profile_report[name] = self._profiler.get_report()
+            self._profiler = None
+
+    def __stage(self, name: str) -> contextlib.AbstractContextManager:
+        '''Get a context which records the body as a stage when profiling.'''
+        return profiling.get_stage(self._profiler, name)
+
     @classmethod
     def __set_fast_zeal_teleporters(cls, ct_rom: CTRom):
         '''
@@ -692,15 +820,15 @@ class Randomizer:
         rom.seek(start)
         rom.write(rt, mark_used)
 
-    def __set_omen_elevators_config(self):
+    def __set_omen_elevators_config(self, rand: random.Random):
         '''Determine which omen elevator encounters a seed gets.'''
         # Ruminators, goons, cybots
         fight_thresh_up = [0xA0, 0x60, 0x80]
         fight_thresh_down = [0x80, 0x60, 0xA0]
         fights_up = [ind for ind, thresh in enumerate(fight_thresh_up)
-                     if random.randrange(0, 0x100) < thresh]
+                     if rand.randrange(0, 0x100) < thresh]
         fights_down = [ind for ind, thresh in enumerate(fight_thresh_down)
-                       if random.randrange(0, 0x100) < thresh]
+                       if rand.randrange(0, 0x100) < thresh]
 
         self.config.omen_elevator_fights_up = fights_up
         self.config.omen_elevator_fights_down = fights_down
@@ -919,8 +1047,19 @@ class Randomizer:
         if self.has_generated:
             return
 
+        self.__get_base_ctrom()
+
         # With valid config and settings, we can write generate the rom
-        self.__write_out_rom()
+        self.free_space_report = None
+        try:
+            with self.__profiling('generate_rom'):
+                self.__write_out_rom()
+        finally:
+            if self.track_free_space and self.out_rom is not None:
+                space_manager = self.out_rom.rom_data.space_manager
+                self.free_space_report = space_manager.get_usage_report()
+                self.free_space_report['strings'] = \
+                    self.out_rom.script_manager.string_pool.get_report()
 
     # There are no good tools for working with animation scripts.  The
     # change is small, so we're doing it directly
@@ -1020,12 +1159,55 @@ class Randomizer:
         # there's no reason not to just do it always.
         self.__disable_xmenu_charlocks(ctrom)
 
-    def __write_out_rom(self):
-        '''Given config and settings, write to self.out_rom'''
-        self.out_rom = CTRom(self.base_ctrom.rom_data.getvalue(), True)
+    def __get_stage0_key(self) -> tuple:
+        '''
+        Get the settings which determine the stage-0 rom.  This is every
+        setting read by __build_stage0_rom.
+        '''
+        return (self.settings.game_mode, self.settings.gameflags,
+                self.settings.item_difficulty, self.track_free_space)
+
+    def __get_stage0_rom(self) -> tuple[CTRom, Optional[int]]:
+        '''
+        Get a copy of the stage-0 rom for the current settings along with the
+        start of its chest description strings (None if the chest text hack
+        was not applied).  The stage-0 rom is built on first use and kept for
+        later generations with the same stage-0 settings.
+        '''
+        key = self.__get_stage0_key()
+        if key not in self._stage0_roms:
+            chest_desc_start = self.__build_stage0_rom()
+            if len(self._stage0_roms) >= self._max_stage0_roms:
+                oldest_key = next(iter(self._stage0_roms))
+                del self._stage0_roms[oldest_key]
+            self._stage0_roms[key] = (self.out_rom, chest_desc_start)
+
+        stage0_rom, chest_desc_start = self._stage0_roms[key]
+        return stage0_rom.copy(), chest_desc_start
+
+    def __build_stage0_rom(self) -> Optional[int]:
+        '''
+        Write every change to self.out_rom which depends only on the base rom
+        and the stage-0 settings (see __get_stage0_key).  Nothing here may
+        read self.config except for the placeholder chest descriptions.
+
+        Returns the start of the chest description strings, or None if the
+        chest text hack was not applied.
+        '''
+        # The copy shares the base rom's bytes until it is written.
+        base_ctrom = self.__get_base_ctrom()
+        self.out_rom = base_ctrom.copy()
+        if self.track_free_space:
+            self.out_rom.rom_data.space_manager.alloc_log = []
+
+        if self._base_is_vanilla is None:
+            self._base_is_vanilla = CTRom.validate_ct_rom_bytes(
+                base_ctrom.rom_data.get_view()
+            )
 
+        chest_desc_start: Optional[int] = None
         initial_vanilla = False
-        if CTRom.validate_ct_rom_bytes(self.out_rom.rom_data.getbuffer()):
+        if self._base_is_vanilla:
             initial_vanilla = True
             # It's too hard reclaiming space from basepatch.ips.  Just take
             # one block that I know is OK.
@@ -1042,8 +1224,9 @@ class Randomizer:
 
 
         if initial_vanilla:
-            # self.out_rom.rom_data.space_manager.mark_block(
-            chesttext.apply_chest_text_hack(
+            # The descriptions written here are overwritten for each seed
+            # in __write_out_rom.
+            chest_desc_start = chesttext.apply_chest_text_hack(
                 self.out_rom, self.config.item_db
             )
             self.out_rom.rom_data.space_manager.mark_block(
@@ -1146,8 +1329,6 @@ class Randomizer:
 
         prismshard.update_prismshard_quest(self.out_rom)
 
-        elementrando.update_ctrom(self.out_rom, self.config)
-
         if epoch_fail:
             epochfail.apply_epoch_fail(self.out_rom, self.settings)
 
@@ -1156,8 +1337,7 @@ class Randomizer:
             # Logic changes are all handled by flags now.
             vanillarando.restore_scripts(self.out_rom)
 
-        self.__apply_logic_tweaks_to_ctrom(self.settings, self.config,
-                                           self.out_rom)
+        self.__apply_logic_tweaks_to_ctrom(self.settings, self.out_rom)
 
         if rset.GameFlags.UNLOCKED_MAGIC in self.settings.gameflags:
             fastmagic.add_tracker_hook(self.out_rom)
@@ -1181,9 +1361,6 @@ class Randomizer:
         self.__fix_northern_ruins_sealed(self.out_rom)
         self.__accelerate_carpenter_quest(self.out_rom)
 
-        # Update the trading post descriptions
-        self.__update_trading_post_string(self.out_rom, self.config)
-
         # Two potential softlocks caused by (presumably) touch == activate.
         self.__try_proto_dome_fix()
         self.__try_mystic_mtn_portal_fix()
@@ -1203,9 +1380,39 @@ class Randomizer:
         # Enable NG+ by defeating Lavos without doing Omen.
         self.__lavos_ngplus()
 
-        # Everything prior was purely based on settings, not the randomization.
+        return chest_desc_start
+
+    def __write_out_rom(self):
+        '''Given config and settings, write to self.out_rom'''
+
+        # Everything in the stage-0 rom is purely based on settings, not the
+        # randomization.  It is only built once for each distinct set of
+        # stage-0 settings and copied for each generation.
+        with self.__stage('stage0'):
+            self.out_rom, chest_desc_start = self.__get_stage0_rom()
+
+        if chest_desc_start is not None:
+            chesttext.write_desc_strings(self.out_rom, self.config.item_db,
+                                         start=chest_desc_start)
+
+        # The remaining script changes depend on the config.  Some edit
+        # scripts which stage-0 installs (SPEKKIO's charrando-eot.flux and
+        # IOKA_TRADING_POST's jot_trading_post.Flux), but no stage-0 step
+        # after their installation touches those scripts.  So it is safe to
+        # make these changes after all of the stage-0 changes.
+        elementrando.update_ctrom(self.out_rom, self.config)
+
+        if rset.GameFlags.VANILLA_ROBO_RIBBON in self.settings.gameflags:
+            vanillarando.restore_ribbon_boost_atropos(
+                self.out_rom, self.config.boss_assign_dict
+            )
+
+        # Update the trading post descriptions
+        self.__update_trading_post_string(self.out_rom, self.config)
+
         # Now, write the information from the config to the rom.
-        self.__write_config_to_out_rom()
+        with self.__stage('write_config'):
+            self.__write_config_to_out_rom()
 
         # Fix to giant's claw box
         claw_copy = treasuretypes.ChestTreasureData()
@@ -1231,10 +1438,14 @@ class Randomizer:
             vanillarando.restore_sos(self.out_rom, self.config)
 
         # Write and remove all scripts
-        self.out_rom.write_all_scripts_to_rom(clear_scripts=True)
+        with self.__stage('scripts'):
+            self.out_rom.write_all_scripts_to_rom(clear_scripts=True)
 
         # Put the seed hash on the active/wait screen
-        self.hash_string_bytes = seedhash.write_hash_string(self.out_rom)
+        with self.__stage('seedhash'):
+            self.hash_string_bytes = seedhash.write_hash_string(
+                self.out_rom, self.settings, self.seed_hash_mode
+            )
 
         # Apply post-randomization changes
         self.__apply_cosmetic_patches(self.out_rom, self.settings)
@@ -1251,8 +1462,11 @@ class Randomizer:
         )
 
         # Rewrite any scripts changed by post-randomization
-        self.out_rom.write_all_scripts_to_rom()
-        self.out_rom.fix_snes_checksum()
+        with self.__stage('scripts'):
+            self.out_rom.write_all_scripts_to_rom()
+
+        with self.__stage('checksum'):
+            self.out_rom.fix_snes_checksum()
         self.has_generated = True
 
     def get_generated_rom(self) -> bytes:
@@ -1263,6 +1477,33 @@ class Randomizer:
             raise GenerationFailedException("Failed to generate rom.")
         return self.out_rom.rom_data.getvalue()
 
+    def write_generated_rom(self, outfile: BinaryIO):
+        '''Write the generated rom to outfile straight from its buffer.'''
+        if not self.has_generated:
+            self.generate_rom()
+
+        if self.out_rom is None:
+            raise GenerationFailedException("Failed to generate rom.")
+        self.out_rom.rom_data.write_to_file(outfile)
+
+    def write_generated_patch(self, outfile: BinaryIO,
+                              patch_format: seedpatch.PatchFormat):
+        '''
+        Write a patch which turns the rom this Randomizer was made with into
+        the generated rom.
+        '''
+        if not self.has_generated:
+            self.generate_rom()
+
+        if self.out_rom is None:
+            raise GenerationFailedException("Failed to generate rom.")
+        base_ctrom = self.__get_base_ctrom()
+        outfile.write(
+            seedpatch.make_patch(base_ctrom.rom_data.get_view(),
+                                 self.out_rom.rom_data.get_view(),
+                                 patch_format)
+        )
+
     def write_spoiler_log(self, outfile):
         if isinstance(outfile, str):
             with open(outfile, 'w', encoding='utf-8') as real_outfile:
@@ -1291,6 +1532,30 @@ class Randomizer:
                 outfile, cls=JOTJSONEncoder, indent=2
             )
 
+    def write_profile_report(self, outfile):
+        '''Write the stage timings from the last generation as json.'''
+        if self.profile_report is None:
+            raise ValueError('No profile report.  Set profile before '
+                             'generating.')
+
+        if isinstance(outfile, str):
+            with open(outfile, 'w', encoding='utf-8') as real_outfile:
+                self.write_profile_report(real_outfile)
+        else:
+            json.dump(self.profile_report, outfile, indent=2)
+
+    def write_free_space_report(self, outfile):
+        '''Write the free space report from the last generation as json.'''
+        if self.free_space_report is None:
+            raise ValueError('No free space report.  Set track_free_space '
+                             'before generating.')
+
+        if isinstance(outfile, str):
+            with open(outfile, 'w', encoding='utf-8') as real_outfile:
+                self.write_free_space_report(real_outfile)
+        else:
+            json.dump(self.free_space_report, outfile, indent=2)
+
     def _summarize_dupes(self):
         CharID = ctenums.CharID
 
@@ -1700,7 +1965,8 @@ class Randomizer:
 
     @classmethod
     def __apply_logic_tweaks_to_config(cls, settings: rset.Settings,
-                                       config: cfg.RandoConfig):
+                                       config: cfg.RandoConfig,
+                                       rand: random.Random):
         '''
         Applies logic tweaks to the config.  Assumes that the settings are
         valid (no conflicts w/ game mode)
@@ -1709,30 +1975,33 @@ class Randomizer:
         GF = rset.GameFlags
 
         if GF.ADD_SUNKEEP_SPOT in flags:
-            vanillarando.add_sunstone_spot_to_config(config)
+            vanillarando.add_sunstone_spot_to_config(config, rand)
 
         if GF.ADD_BEKKLER_SPOT in flags:
-            vanillarando.add_vanilla_clone_check_to_config(config)
+            vanillarando.add_vanilla_clone_check_to_config(config, rand)
 
         if GF.ADD_CYRUS_SPOT in flags:
-            vanillarando.restore_cyrus_grave_check_to_config(config)
+            vanillarando.restore_cyrus_grave_check_to_config(config, rand)
 
         if GF.ADD_OZZIE_SPOT in flags:
-            vanillarando.add_check_to_ozzies_fort_in_config(config)
+            vanillarando.add_check_to_ozzies_fort_in_config(config, rand)
 
         if GF.SPLIT_ARRIS_DOME in flags:
-            vanillarando.add_arris_food_locker_check_to_config(config)
+            vanillarando.add_arris_food_locker_check_to_config(config,
+                                                               rand)
 
         if GF.ADD_RACELOG_SPOT in flags:
-            vanillarando.add_racelog_chest_to_config(config)
+            vanillarando.add_racelog_chest_to_config(config, rand)
 
     @classmethod
     def __apply_logic_tweaks_to_ctrom(cls, settings: rset.Settings,
-                                      config: cfg.RandoConfig,
                                       ct_rom: CTRom):
         '''
         Applies logic tweaks to the scripts.  Assumes that the settings are
         valid (no conflicts w/ game mode)
+
+        VANILLA_ROBO_RIBBON depends on the boss assignment, so it is applied
+        in __write_out_rom instead.
         '''
 
         flags = settings.gameflags
@@ -1765,11 +2034,6 @@ class Randomizer:
         if GF.VANILLA_DESERT in flags:
             vanillarando.revert_sunken_desert_lock(ct_rom)
 
-        if GF.VANILLA_ROBO_RIBBON in flags:
-            vanillarando.restore_ribbon_boost_atropos(
-                ct_rom, config.boss_assign_dict
-        )
-
     # Because switching logic is a feature now, we need a settings object.
     # Ugly.  BETA_LOGIC flag is gone now, but keeping it as-is in case of
     # logic changes to test.
@@ -1966,11 +2230,130 @@ class Randomizer:
         config.boss_rank_dict = {}
 
     @classmethod
-    def get_base_config_from_settings(cls,
-                                      ct_vanilla: bytearray,
-                                      settings: rset.Settings):
+    def __get_base_config_name(cls, settings: rset.Settings) -> str:
+        '''Get the name of the base_config_cache entry for settings.'''
+        is_vanilla_mode = settings.game_mode == rset.GameMode.VANILLA_RANDO
+        return '_'.join((
+            'vanilla' if is_vanilla_mode else 'standard',
+            settings.enemy_difficulty.name.lower(),
+            settings.item_difficulty.name.lower()
+        ))
+
+    @classmethod
+    def __get_base_config_settings(
+            cls, settings: rset.Settings
+    ) -> dict[str, rset.Settings]:
+        '''
+        Get settings for each base config that generating with settings may
+        use, keyed by cache entry name.  Mystery settings may use any mode
+        and difficulty which they give a nonzero weight.
+        '''
+        modes = [settings.game_mode]
+        enemy_difficulties = [settings.enemy_difficulty]
+        item_difficulties = [settings.item_difficulty]
+        if rset.GameFlags.MYSTERY in settings.gameflags:
+            mystery_settings = settings.mystery_settings
+            modes = [
+                mode for mode, weight
+                in mystery_settings.game_mode_freqs.items() if weight > 0
+            ]
+            enemy_difficulties = [
+                difficulty for difficulty, weight
+                in mystery_settings.enemy_difficulty_freqs.items()
+                if weight > 0
+            ]
+            item_difficulties = [
+                difficulty for difficulty, weight
+                in mystery_settings.item_difficulty_freqs.items()
+                if weight > 0
+            ]
+
+        base_settings: dict[str, rset.Settings] = {}
+        for mode in modes:
+            for enemy_difficulty in enemy_difficulties:
+                for item_difficulty in item_difficulties:
+                    entry_settings = rset.Settings()
+                    entry_settings.game_mode = mode
+                    entry_settings.enemy_difficulty = enemy_difficulty
+                    entry_settings.item_difficulty = item_difficulty
+                    name = cls.__get_base_config_name(entry_settings)
+                    base_settings.setdefault(name, entry_settings)
+
+        return base_settings
+
+    @classmethod
+    def __get_rom_base_config(
+            cls,
+            ct_vanilla: Optional[bytes],
+            settings: rset.Settings,
+            rom_digest: Optional[str] = None
+    ) -> tuple[cfg.RandoConfig, Optional[dict]]:
+        '''
+        Get the result of __build_rom_base_config from base_config_cache,
+        building it from ct_vanilla if it is not cached.  If ct_vanilla is
+        None, use an entry built from any rom with the current patches.
+        rom_digest is the md5 hex digest of ct_vanilla, if already known.
+        '''
+        cache_name = cls.__get_base_config_name(settings)
+        patches_digest = baseconfigcache.get_patches_digest()
+        if ct_vanilla is None:
+            entry = cls.base_config_cache.get(cache_name,
+                                              (None, patches_digest))
+            if entry is None:
+                raise NoBaseConfigException(
+                    f'No cached base config {cache_name}.  Generate a seed '
+                    'from a rom first or use Randomizer.cache_base_configs.'
+                )
+            return entry
+
+        if rom_digest is None:
+            rom_digest = hashlib.md5(ct_vanilla).hexdigest()
+        cache_key = (rom_digest, patches_digest)
+        return cls.base_config_cache.get_or_build(
+            cache_name, cache_key,
+            lambda: cls.__build_rom_base_config(ct_vanilla, settings)
+        )
+
+    @classmethod
+    def has_cached_base_configs(cls, settings: rset.Settings) -> bool:
+        '''
+        Whether a dry run with settings has every base config it may need.
+        '''
+        patches_digest = baseconfigcache.get_patches_digest()
+        return all(
+            cls.base_config_cache.get(name, (None, patches_digest))
+            is not None
+            for name in cls.__get_base_config_settings(settings)
+        )
+
+    @classmethod
+    def cache_base_configs(cls, ct_vanilla: bytes,
+                           settings: rset.Settings):
+        '''
+        Read every base config that generating with settings may need from
+        ct_vanilla into base_config_cache so that dry runs can use them.
+        '''
+        for entry_settings in \
+                cls.__get_base_config_settings(settings).values():
+            cls.__get_rom_base_config(ct_vanilla, entry_settings)
+
+    @classmethod
+    def get_base_config_from_settings(
+            cls,
+            ct_vanilla: Optional[bytes],
+            settings: rset.Settings,
+            rand: Optional[random.Random] = None,
+            rom_digest: Optional[str] = None
+    ):
         '''Gets an rset.RandoConfig object with the correct initial values.
 
+        Some logic tweaks add treasure spots with random rewards.  These are
+        drawn from rand, or from a random.Random seeded with settings.seed if
+        rand is not provided.
+
+        If the md5 hex digest of ct_vanilla is already known, pass it as
+        rom_digest so that the rom is not hashed again.
+
         RandoConfig members which are read from rom_data after patches:
           - enemy_dict: holds stats depending on hard mode or not
           - shop_manager: This shouldn't be strictly needed, but at present
@@ -1984,18 +2367,21 @@ class Randomizer:
           - enemy_atk_db: Various enemy techs are changed by base_patch.ips.
           - enemy_ai_db: Various enemy attack scripts are changed by
                          base_patch.ips.
+        These are stored in Randomizer.base_config_cache after the first
+        call.  If ct_vanilla is None, they must already be stored there
+        (from any rom), or NoBaseConfigException is raised.
         '''
 
-        # It's a little wasteful copying the rom data to partially patch it
-        # to extract the base values for the above.
+        if rand is None:
+            rand = random.Random(settings.seed)
 
-        # I do have a pickle with a default config and normal/hard enemy dicts
-        # which can be used instead if this is an issue.  The problem with
-        # using those is the need to update them with every patch.
-        van_ct_rom = CTRom(ct_vanilla, True)
-        ct_rom = CTRom(ct_vanilla, True)
-        Randomizer.__apply_basic_patches(ct_rom)
-        config = cfg.RandoConfig()
+        # Copying and patching the rom to read the above is slow, so the
+        # result is cached on disk.  There is one entry for each combination
+        # of settings that changes what is read, and an entry is rebuilt
+        # whenever the rom or any file in patches/ changes.
+        is_vanilla_mode = settings.game_mode == rset.GameMode.VANILLA_RANDO
+        config, black_hole = cls.__get_rom_base_config(ct_vanilla, settings,
+                                                       rom_digest)
         cls.fill_default_config_entries(config)
 
         spots = bossrando.get_assignable_spots(settings.game_mode,
@@ -2007,45 +2393,16 @@ class Randomizer:
 
         config.boss_data_dict = rotypes.get_boss_data_dict()
 
-        if settings.game_mode == rset.GameMode.VANILLA_RANDO:
-            config.update_from_ct_rom(van_ct_rom)
+        if is_vanilla_mode:
             vanillarando.fix_config(config)
 
             # Apply the experimental logic tweaks in the config
             # This is new, it used to be automatic in vanilla mode.
-            cls.__apply_logic_tweaks_to_config(settings, config)
+            cls.__apply_logic_tweaks_to_config(settings, config, rand)
 
         else:
-            van_config = cfg.RandoConfig()
-            van_config.update_from_ct_rom(van_ct_rom)
-            config.update_from_ct_rom(ct_rom)
-
-            # base_patch.ips apparently writes marle into the magus spot with
-            # custom ai to heal and cast ice2.  It's cool, but we want the
-            # vanilla north cape magus.
-            magus_id = ctenums.EnemyID.MAGUS_NORTH_CAPE
-            magus_nc_sprite = van_config.enemy_sprite_dict[magus_id]
-            magus_nc_ai = van_config.enemy_ai_db.scripts[magus_id]
-            magus_nc_stats = van_config.enemy_dict[magus_id]
-
-            config.enemy_ai_db.scripts[magus_id] = magus_nc_ai
-            config.enemy_sprite_dict[magus_id] = magus_nc_sprite
-            config.enemy_dict[magus_id] = magus_nc_stats
-
             # Apply the experimental logic tweaks in the config
-            cls.__apply_logic_tweaks_to_config(settings, config)
-
-            # Get hard versions of config items if needed.
-            # We're done with the rom at this point, so it's OK to patch.
-            ct_rom.rom_data.patch_ips_file('./patches/hard.ips')
-            if settings.enemy_difficulty == rset.Difficulty.HARD:
-                config.enemy_dict = \
-                    enemystats.get_stat_dict_from_ctrom(ct_rom)
-
-            if settings.item_difficulty == rset.Difficulty.HARD:
-                config.item_db = itemdata.ItemDB.from_rom(
-                    ct_rom.rom_data.getvalue()
-                )
+            cls.__apply_logic_tweaks_to_config(settings, config, rand)
 
             # Why is Dalton worth so few TP?
             config.enemy_dict[ctenums.EnemyID.DALTON_PLUS].tp = 50
@@ -2120,10 +2477,6 @@ class Randomizer:
 
             # Revert antilife to black hole
             if rset.GameFlags.USE_ANTILIFE not in settings.gameflags:
-                TechDB = charrando.TechDB
-                vanilla_db = TechDB.get_default_db(ct_vanilla)
-                black_hole = vanilla_db.get_tech(ctenums.TechID.ANTI_LIFE)
-
                 anti_life = tech_db.get_tech(ctenums.TechID.ANTI_LIFE)
                 anti_life['control'][8] = 0x16  # +Atk for down allies
                 anti_life['effects'][0][9] = 0x20  # Megabomb power
@@ -2227,6 +2580,61 @@ class Randomizer:
 
         return config
 
+    @classmethod
+    def __build_rom_base_config(
+            cls,
+            ct_vanilla: bytes,
+            settings: rset.Settings
+    ) -> tuple[cfg.RandoConfig, Optional[dict]]:
+        '''
+        Build the part of the base config that is read from the (patched)
+        rom.  Only settings.game_mode and the difficulties are used.
+
+        Returns the config and, outside of vanilla mode, the vanilla
+        Black Hole tech which replaces Antilife unless USE_ANTILIFE is set.
+        '''
+        van_ct_rom = CTRom(ct_vanilla, True)
+        config = cfg.RandoConfig()
+
+        if settings.game_mode == rset.GameMode.VANILLA_RANDO:
+            config.update_from_ct_rom(van_ct_rom)
+            return config, None
+
+        ct_rom = CTRom(ct_vanilla, True)
+        Randomizer.__apply_basic_patches(ct_rom)
+
+        van_config = cfg.RandoConfig()
+        van_config.update_from_ct_rom(van_ct_rom)
+        config.update_from_ct_rom(ct_rom)
+
+        # base_patch.ips apparently writes marle into the magus spot with
+        # custom ai to heal and cast ice2.  It's cool, but we want the
+        # vanilla north cape magus.
+        magus_id = ctenums.EnemyID.MAGUS_NORTH_CAPE
+        magus_nc_sprite = van_config.enemy_sprite_dict[magus_id]
+        magus_nc_ai = van_config.enemy_ai_db.scripts[magus_id]
+        magus_nc_stats = van_config.enemy_dict[magus_id]
+
+        config.enemy_ai_db.scripts[magus_id] = magus_nc_ai
+        config.enemy_sprite_dict[magus_id] = magus_nc_sprite
+        config.enemy_dict[magus_id] = magus_nc_stats
+
+        # Get hard versions of config items if needed.
+        # We're done with the rom at this point, so it's OK to patch.
+        ct_rom.rom_data.patch_ips_file('./patches/hard.ips')
+        if settings.enemy_difficulty == rset.Difficulty.HARD:
+            config.enemy_dict = \
+                enemystats.get_stat_dict_from_ctrom(ct_rom)
+
+        if settings.item_difficulty == rset.Difficulty.HARD:
+            config.item_db = itemdata.ItemDB.from_rom(
+                ct_rom.rom_data.get_view()
+            )
+
+        black_hole = van_config.tech_db.get_tech(ctenums.TechID.ANTI_LIFE)
+
+        return config, black_hole
+
     @classmethod
     def get_randmomized_rom(cls,
                             rom: bytearray,
@@ -2260,9 +2668,16 @@ class RandomizerWriter:
 
     def write_output_rom(self, output_path: Path):
         out_name = f"{self.out_string}.sfc"
-        self.out_rom = self.rando.get_generated_rom()
         self.full_output_path = output_path / out_name
-        self.full_output_path.write_bytes(self.out_rom)
+        with self.full_output_path.open('wb') as outfile:
+            self.rando.write_generated_rom(outfile)
+
+    def write_output_patch(self, output_path: Path,
+                           patch_format: seedpatch.PatchFormat):
+        patch_name = f"{self.out_string}.{patch_format.extension}"
+        self.patch_path = output_path / patch_name
+        with self.patch_path.open('wb') as outfile:
+            self.rando.write_generated_patch(outfile, patch_format)
 
     def write_spoiler_log(self, output_path: Path):
         spoiler_name = f"{self.out_string}.spoilers.txt"
@@ -2274,6 +2689,16 @@ class RandomizerWriter:
         self.json_spoiler_path = output_path / json_spoiler_name
         self.rando.write_json_spoiler_log(str(self.json_spoiler_path))
 
+    def write_free_space_report(self, output_path: Path):
+        report_name = f"{self.out_string}.freespace.json"
+        self.free_space_report_path = output_path / report_name
+        self.rando.write_free_space_report(str(self.free_space_report_path))
+
+    def write_profile_report(self, output_path: Path):
+        report_name = f"{self.out_string}.profile.json"
+        self.profile_report_path = output_path / report_name
+        self.rando.write_profile_report(str(self.profile_report_path))
+
 
 def read_names():
     names_path = Path(__file__).parent / 'names.txt'
@@ -2282,11 +2707,53 @@ def read_names():
     return names
 
 
+def dry_run(args, settings: rset.Settings, base_name: str):
+    '''
+    Write json spoilers (and spoilers if asked) for the seed or batch of
+    seeds given by args without making any roms.
+    '''
+    if args.batch is not None:
+        # seedbatch imports this module, so it is only imported when needed.
+        import seedbatch
+        batch_results = seedbatch.generate_batch(
+            None, settings, args.batch, args.output_path, base_name,
+            num_workers=args.workers, spoilers=bool(args.spoilers),
+            json_spoilers=True, profile_reports=bool(args.profile)
+        )
+        num_failed = 0
+        for result in batch_results:
+            if result.succeeded:
+                print(f"json spoilers: {result.json_spoiler_path}")
+            else:
+                num_failed += 1
+                print(f"seed {result.seed} failed:\n{result.error}")
+
+        print(f"Generated {args.batch - num_failed}/{args.batch} configs.")
+        return
+
+    rando = Randomizer(None, settings=settings)
+    rando.profile = bool(args.profile)
+    rando.set_random_config()
+
+    writer = RandomizerWriter(rando, base_name=base_name)
+    writer.write_json_spoiler_log(args.output_path)
+    print(f"json spoilers: {writer.json_spoiler_path}")
+
+    if args.spoilers:
+        writer.write_spoiler_log(args.output_path)
+        print(f"spoilers: {writer.spoiler_path}")
+
+    if rando.profile_report is not None:
+        writer.write_profile_report(args.output_path)
+        print(f"profile: {writer.profile_report_path}")
+
+
 def main():
     parser = arguments.get_parser()
     args = parser.parse_args()
 
-    if not args.input_file.exists():
+    # A dry run only reads the rom if the base configs are not cached.
+    if not args.input_file.exists() and not args.dry_run:
         raise FileNotFoundError("Invalid input file path.")
 
     if args.output_path is None:
@@ -2296,12 +2763,35 @@ def main():
 
     # Make sure the settings are ok before going further and reading the rom.
     settings = arguments.args_to_settings(args)
-    if settings.seed is None or settings.seed == "":
+    if args.batch is not None and args.batch < 1:
+        raise ValueError("Batch size must be positive.")
+
+    patch_formats = [seedpatch.PatchFormat[name.upper()]
+                     for name in args.patch or []]
+    if args.dry_run and patch_formats:
+        raise ValueError("A dry run can not write patches.")
+    if args.no_rom and not patch_formats and not args.dry_run:
+        raise ValueError("Nothing to write without a rom or patch.")
+
+    if args.batch is None and (settings.seed is None or settings.seed == ""):
         names = read_names()
         settings.seed = "".join(random.choice(names) for i in range(2))
 
-    rom = args.input_file.read_bytes()
-    if not CTRom.validate_ct_rom_bytes(rom):
+    base_name = args.input_file.parts[-1]
+    if args.dry_run:
+        # The rom is only needed to fill the base config cache.
+        if not Randomizer.has_cached_base_configs(settings):
+            with map_rom_file(args.input_file) as rom_view:
+                Randomizer.cache_base_configs(bytes(rom_view), settings)
+        dry_run(args, settings, base_name)
+        return
+
+    # Batch workers map the file themselves, so only read it for one seed.
+    with map_rom_file(args.input_file) as rom_view:
+        is_vanilla = CTRom.validate_ct_rom_bytes(rom_view)
+        rom = bytes(rom_view) if args.batch is None else None
+
+    if not is_vanilla:
         print(
             'Warning: File provided is not a vanilla CT ROM.  Proceed '
             'anyway?  Randomization is likely to fail. (Y/N)'
@@ -2310,13 +2800,57 @@ def main():
         if not proceed:
             sys.exit()
 
+    if args.batch is not None:
+        # seedbatch imports this module, so it is only imported when needed.
+        import seedbatch
+        batch_results = seedbatch.generate_batch(
+            args.input_file, settings, args.batch, args.output_path, base_name,
+            num_workers=args.workers, spoilers=bool(args.spoilers),
+            json_spoilers=bool(args.json_spoilers),
+            free_space_reports=bool(args.free_space_report),
+            profile_reports=bool(args.profile),
+            write_roms=not args.no_rom, patch_formats=patch_formats
+        )
+        num_failed = 0
+        for result in batch_results:
+            if result.succeeded:
+                if result.rom_path is not None:
+                    print(f"output ROM: {result.rom_path}")
+                for patch_path in result.patch_paths:
+                    print(f"output patch: {patch_path}")
+            else:
+                num_failed += 1
+                print(f"seed {result.seed} failed:\n{result.error}")
+
+        print(f"Generated {args.batch - num_failed}/{args.batch} seeds.")
+        return
+
+    if rom is None:
+        raise ValueError('No rom was read.')
+
     rando = Randomizer(rom, is_vanilla=False, settings=settings, config=None)
+    rando.track_free_space = bool(args.free_space_report)
+    rando.profile = bool(args.profile)
+    if args.fast_seed_hash:
+        rando.seed_hash_mode = seedhash.HashMode.FAST
     rando.set_random_config()
 
-    base_name = args.input_file.parts[-1]
     writer = RandomizerWriter(rando, base_name=base_name)
-    writer.write_output_rom(args.output_path)
-    print(f"output ROM: {writer.full_output_path}")
+    try:
+        if not args.no_rom:
+            writer.write_output_rom(args.output_path)
+            print(f"output ROM: {writer.full_output_path}")
+        for patch_format in patch_formats:
+            writer.write_output_patch(args.output_path, patch_format)
+            print(f"output patch: {writer.patch_path}")
+    finally:
+        # The report is most useful when generation runs out of space.
+        if rando.free_space_report is not None:
+            writer.write_free_space_report(args.output_path)
+            print(f"free space report: {writer.free_space_report_path}")
+        if rando.profile_report is not None:
+            writer.write_profile_report(args.output_path)
+            print(f"profile: {writer.profile_report_path}")
 
     if args.spoilers:
         writer.write_spoiler_log(args.output_path)
@@ -1655,19 +1655,19 @@ class RandoGUI:
 
         return True
 
-    def get_rom_from_file(self) -> bytearray:
+    def get_rom_from_file(self) -> bytes:
         infile_path = pathlib.Path(self.input_file.get())
 
         if not infile_path.exists():
             raise FileNotFoundError
 
-        with open(str(infile_path), 'rb') as infile:
-            rom = bytearray(infile.read())
-
-            if len(rom) % 0x400 == 0x200:
+        with ctrom.map_rom_file(infile_path) as rom_view:
+            if len(rom_view) % 0x400 == 0x200:
                 print('Header detectected.  Header will be removed from the'
                       'output rom.')
-                rom = rom[0x200:]
+                rom = bytes(rom_view[0x200:])
+            else:
+                rom = bytes(rom_view)
 
         return rom
 
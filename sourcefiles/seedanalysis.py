@@ -0,0 +1,373 @@
+'''
+Module for estimating the distribution of key item placements for a settings
+object by sampling many key item fills.
+
+Basic usage:
+    settings = rset.Settings.get_race_presets()
+    report = seedanalysis.analyze(settings, num_samples=10000,
+                                  num_workers=8)
+    print(report)
+    # How often is the Masamune in a Black Omen spot?
+    report.get_group_rate(ItemID.MASAMUNE_2, 'BlackOmen')
+
+Each sample only does what the key item logic needs: the recruit spots are
+shuffled, a logicfactory.GameConfig is made for the settings, and the usual
+filler (see logicwriters.getFiller) places the key items.  The spheres of
+the fill are read from logicwriters.get_proof_string.  No rom or base config
+is read, so samples are much cheaper than seeds, but the nth sample is not
+the same as generating a seed.
+
+Samples are split into chunks which are analyzed by a pool of processes.
+Sample i is drawn from random.Random(f'{seed}{i}'), so a report depends only
+on the settings, the seed and the number of samples.
+
+Usage (from sourcefiles/):
+    python seedanalysis.py --samples 10000 [--workers N] [--seed S]
+                           [--output report.json] <generation flags>
+'''
+from __future__ import annotations
+
+import argparse
+import collections
+import copy
+import dataclasses
+import json
+import multiprocessing as mp
+import os
+from pathlib import Path
+import random
+import re
+import sys
+from typing import Any, Optional
+
+import cli.arguments as arguments
+from ctenums import CharID, ItemID
+import legacyofcyrus
+import logicfactory
+import logicwriters
+import mystery
+import randoconfig as cfg
+import randomizer
+import randosettings as rset
+
+
+# Lines of logicwriters.get_proof_string
+_SPHERE_LINE_RE = re.compile(r'(\d+): (Recruit|Obtain) (.+) from (.+)')
+_GO_PREFIX = 'GO: '
+_FLIGHT_LINE = 'Unlock Flight'
+
+# Key of go_spheres for the first go mode of any kind.
+ANY_GO = 'Any'
+
+# Number of samples a worker analyzes at a time.
+_CHUNK_SIZE = 250
+
+
+def _add_count(counts: dict[str, collections.Counter], key: str, value):
+    counts.setdefault(key, collections.Counter())[value] += 1
+
+
+def _merge_counts(counts: dict[str, collections.Counter],
+                  other: dict[str, collections.Counter]):
+    for key, counter in other.items():
+        counts.setdefault(key, collections.Counter()).update(counter)
+
+
+def _get_mean(counter: collections.Counter) -> float:
+    total = sum(counter.values())
+    if not total:
+        return 0.0
+    return sum(value*count for value, count in counter.items())/total
+
+
+@dataclasses.dataclass
+class DistributionReport:
+    '''
+    Counts of where key items were placed and in which sphere key items,
+    characters, flight and go modes were found.  Items, locations, groups
+    and characters are keyed by their names.
+    '''
+    num_samples: int = 0
+    failures: int = 0
+    # item -> location -> count
+    item_locations: dict[str, collections.Counter] = \
+        dataclasses.field(default_factory=dict)
+    # item -> location group -> count
+    item_groups: dict[str, collections.Counter] = \
+        dataclasses.field(default_factory=dict)
+    # item -> sphere -> count
+    item_spheres: dict[str, collections.Counter] = \
+        dataclasses.field(default_factory=dict)
+    # character -> sphere -> count
+    char_spheres: dict[str, collections.Counter] = \
+        dataclasses.field(default_factory=dict)
+    # go mode (or ANY_GO) -> sphere -> count.  Samples without that go mode
+    # are not counted.
+    go_spheres: dict[str, collections.Counter] = \
+        dataclasses.field(default_factory=dict)
+    # sphere -> count
+    flight_spheres: collections.Counter = \
+        dataclasses.field(default_factory=collections.Counter)
+    # number of spheres -> count
+    sphere_counts: collections.Counter = \
+        dataclasses.field(default_factory=collections.Counter)
+
+    @property
+    def num_filled(self) -> int:
+        return self.num_samples - self.failures
+
+    def add_proof(self, proof_string: str,
+                  location_groups: dict[str, str]):
+        '''
+        Count one sample from its proof string and a dict of location name
+        to group name.
+        '''
+        sphere = 0
+        first_go: Optional[int] = None
+        for line in proof_string.splitlines():
+            match = _SPHERE_LINE_RE.fullmatch(line)
+            if match is not None:
+                sphere = int(match[1])
+                name, spot = match[3], match[4]
+                if match[2] == 'Recruit':
+                    _add_count(self.char_spheres, name, sphere)
+                else:
+                    _add_count(self.item_spheres, name, sphere)
+                    _add_count(self.item_locations, name, spot)
+                    _add_count(self.item_groups, name,
+                               location_groups.get(spot, spot))
+            elif line.startswith(_GO_PREFIX):
+                _add_count(self.go_spheres, line[len(_GO_PREFIX):], sphere)
+                if first_go is None:
+                    first_go = sphere
+            elif line == _FLIGHT_LINE:
+                self.flight_spheres[sphere] += 1
+
+        if first_go is not None:
+            _add_count(self.go_spheres, ANY_GO, first_go)
+        self.sphere_counts[sphere + 1] += 1
+
+    def merge(self, other: DistributionReport):
+        '''Add the samples of other to this report.'''
+        self.num_samples += other.num_samples
+        self.failures += other.failures
+        _merge_counts(self.item_locations, other.item_locations)
+        _merge_counts(self.item_groups, other.item_groups)
+        _merge_counts(self.item_spheres, other.item_spheres)
+        _merge_counts(self.char_spheres, other.char_spheres)
+        _merge_counts(self.go_spheres, other.go_spheres)
+        self.flight_spheres.update(other.flight_spheres)
+        self.sphere_counts.update(other.sphere_counts)
+
+    def get_location_rate(self, item: ItemID, location: str) -> float:
+        '''Get the fraction of fills with item at the named location.'''
+        counts = self.item_locations.get(str(item), collections.Counter())
+        return counts[location]/self.num_filled if self.num_filled else 0.0
+
+    def get_group_rate(self, item: ItemID, group: str) -> float:
+        '''Get the fraction of fills with item in the named group.'''
+        counts = self.item_groups.get(str(item), collections.Counter())
+        return counts[group]/self.num_filled if self.num_filled else 0.0
+
+    def to_jot_json(self) -> dict[str, Any]:
+        def sort_counts(counts: dict[str, collections.Counter]):
+            return {
+                key: dict(sorted(counter.items()))
+                for key, counter in sorted(counts.items())
+            }
+
+        return {
+            'samples': self.num_samples,
+            'failures': self.failures,
+            'item_locations': sort_counts(self.item_locations),
+            'item_groups': sort_counts(self.item_groups),
+            'item_spheres': sort_counts(self.item_spheres),
+            'char_spheres': sort_counts(self.char_spheres),
+            'go_spheres': sort_counts(self.go_spheres),
+            'flight_spheres': dict(sorted(self.flight_spheres.items())),
+            'sphere_counts': dict(sorted(self.sphere_counts.items())),
+        }
+
+    def __str__(self):
+        lines = [f'{self.num_samples} samples, {self.failures} failed']
+
+        lines.append('Go mode spheres:')
+        for go_mode, counter in sorted(self.go_spheres.items()):
+            rate = sum(counter.values())/max(self.num_filled, 1)
+            lines.append(f'  {go_mode:>16}: {rate:6.1%} of fills, '
+                         f'mean sphere {_get_mean(counter):.2f}')
+        lines.append(
+            f'Number of spheres: mean {_get_mean(self.sphere_counts):.2f}, '
+            f'max {max(self.sphere_counts, default=0)}'
+        )
+
+        lines.append('Key items (mean sphere, most common groups):')
+        for item, counter in sorted(self.item_spheres.items()):
+            groups = ', '.join(
+                f'{group} {count/max(self.num_filled, 1):.1%}'
+                for group, count
+                in self.item_groups[item].most_common(3)
+            )
+            lines.append(f'  {item:>16}: {_get_mean(counter):5.2f}  '
+                         f'{groups}')
+
+        return '\n'.join(lines)
+
+
+def _assign_characters(settings: rset.Settings, config: cfg.RandoConfig,
+                       rand: random.Random):
+    '''
+    Shuffle the recruit spots like charrando.write_pcs_to_config.  Only the
+    held characters matter to the logic, so nothing else is set.
+    '''
+    if settings.game_mode == rset.GameMode.LEGACY_OF_CYRUS:
+        assignment = legacyofcyrus.get_character_assignment(rand)
+    else:
+        chars = [CharID(i) for i in range(7)]
+        rand.shuffle(chars)
+        assignment = dict(zip(config.char_assign_dict.keys(), chars))
+
+    for recruit_spot, char in assignment.items():
+        config.char_assign_dict[recruit_spot].held_char = char
+
+
+def make_sample_config() -> cfg.RandoConfig:
+    '''
+    Get a config to pass to analyze_sample.  The same config can be used for
+    every sample.
+    '''
+    config = cfg.RandoConfig()
+    randomizer.Randomizer.fill_default_config_entries(config)
+    return config
+
+
+def analyze_sample(settings: rset.Settings, config: cfg.RandoConfig,
+                   rand: random.Random, report: DistributionReport):
+    '''
+    Fill the key items once and count the result in report.  Only the
+    character assignment of config is changed.
+    '''
+    report.num_samples += 1
+    if rset.GameFlags.MYSTERY in settings.gameflags:
+        settings = mystery.generate_mystery_settings(settings, rand)
+        settings.fix_flag_conflicts()
+
+    _assign_characters(settings, config, rand)
+
+    game_config = logicfactory.getGameConfig(settings, config)
+    location_groups = {
+        id(location): group
+        for group in game_config.locationGroups
+        for location in group.locations
+    }
+
+    filler = logicwriters.getFiller(settings)
+    try:
+        try:
+            chosen_locations = filler.fill_key_item_locations(game_config,
+                                                              rand)
+        except logicwriters.LogicIterationException:
+            # Same fallback as logicwriters.commitKeyItems
+            filler = logicwriters.ChronosanityFiller()
+            chosen_locations = filler.fill_key_item_locations(game_config,
+                                                              rand)
+    except logicwriters.ImpossibleConfigurationException:
+        report.failures += 1
+        return
+
+    # ChronosanityFiller takes the chosen locations out of their groups.
+    # Put them back so that the proof finds them.
+    group_names = {}
+    for location in chosen_locations:
+        group = location_groups[id(location)]
+        group.addLocation(location)
+        group_names[location.getName()] = group.name
+
+    report.add_proof(logicwriters.get_proof_string(game_config),
+                     group_names)
+
+
+def _analyze_chunk(args: tuple[rset.Settings, str, int, int]
+                   ) -> DistributionReport:
+    settings, seed, start, stop = args
+    config = make_sample_config()
+    report = DistributionReport()
+    for ind in range(start, stop):
+        analyze_sample(settings, config, random.Random(f'{seed}{ind}'),
+                       report)
+
+    return report
+
+
+def analyze(settings: rset.Settings,
+            num_samples: int,
+            num_workers: Optional[int] = None,
+            seed: Optional[str] = None) -> DistributionReport:
+    '''
+    Analyze num_samples key item fills with settings using num_workers
+    processes (default one per cpu).  The seed defaults to settings.seed.
+    '''
+    settings = copy.deepcopy(settings)
+    settings.fix_flag_conflicts()
+    if seed is None:
+        seed = settings.seed or ''
+
+    chunks = [
+        (settings, seed, start, min(start + _CHUNK_SIZE, num_samples))
+        for start in range(0, num_samples, _CHUNK_SIZE)
+    ]
+
+    if num_workers is None:
+        num_workers = os.cpu_count() or 1
+    num_workers = max(1, min(num_workers, len(chunks)))
+
+    report = DistributionReport()
+    if num_workers == 1:
+        for chunk in chunks:
+            report.merge(_analyze_chunk(chunk))
+        return report
+
+    with mp.Pool(num_workers) as pool:
+        for chunk_report in pool.imap_unordered(_analyze_chunk, chunks):
+            report.merge(chunk_report)
+
+    return report
+
+
+def get_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description=__doc__.split('\n\n')[0],
+        formatter_class=arguments.SmartFormatter
+    )
+    parser.add_argument('--samples', type=int, default=1000,
+                        help='number of key item fills to sample')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='number of processes (default one per cpu)')
+    parser.add_argument('--seed', default='',
+                        help='prefix of the seed of each sample')
+    parser.add_argument('--output', type=Path, default=None,
+                        help='also write the report as json')
+    for group in arguments.ALL_GENERATION_AG:
+        group.add_to_parser(parser)
+
+    return parser
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = get_parser()
+    args = parser.parse_args(argv)
+    if args.samples < 1:
+        parser.error('The number of samples must be positive.')
+
+    settings = arguments.args_to_settings(args)
+    report = analyze(settings, args.samples, args.workers)
+    print(report)
+
+    if args.output is not None:
+        args.output.write_text(json.dumps(report.to_jot_json(), indent=2))
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
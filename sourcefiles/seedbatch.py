@@ -0,0 +1,271 @@
+'''
+Module for generating many seeds from the same settings in parallel.
+
+Basic usage:
+    settings = rset.Settings.get_race_presets()
+    for result in seedbatch.generate_batch(
+            ct_vanilla, settings, num_seeds=100, output_path=Path('out'),
+            base_name='ct.sfc', num_workers=8):
+        print(result.seed, result.rom_path)
+
+The vanilla rom is placed in shared memory once, or if a path to the rom is
+given, each worker maps the file read-only.  Each worker process copies the
+rom out when the pool starts, builds a single Randomizer, and then reuses
+that Randomizer for every seed it is handed.  Finished roms and spoilers are
+written by the worker that generated them and results are yielded in
+completion order.
+
+If rom is None, the batch is a dry run: workers make configs and spoilers
+from the cached base configs without any rom (see Randomizer).
+'''
+from __future__ import annotations
+
+import copy
+import dataclasses
+import multiprocessing as mp
+from multiprocessing import shared_memory
+import os
+from pathlib import Path
+import random
+import traceback
+from typing import Iterable, Iterator, Optional, Union
+
+import ctrom
+import randomizer
+import randosettings as rset
+import seedpatch
+
+
+@dataclasses.dataclass
+class BatchResult:
+    '''Outcome of generating a single seed in a batch.'''
+    index: int
+    seed: str
+    rom_path: Optional[Path] = None
+    patch_paths: list[Path] = dataclasses.field(default_factory=list)
+    spoiler_path: Optional[Path] = None
+    json_spoiler_path: Optional[Path] = None
+    free_space_report_path: Optional[Path] = None
+    profile_report_path: Optional[Path] = None
+    error: Optional[str] = None
+
+    @property
+    def succeeded(self) -> bool:
+        return self.error is None
+
+
+@dataclasses.dataclass
+class _BatchJob:
+    '''Everything a worker needs to know to write out one seed.'''
+    index: int
+    settings: rset.Settings
+    output_path: Path
+    base_name: str
+    spoilers: bool = False
+    json_spoilers: bool = False
+    free_space_report: bool = False
+    profile_report: bool = False
+    write_rom: bool = True
+    patch_formats: tuple[seedpatch.PatchFormat, ...] = ()
+
+
+# Per-process state for pool workers.  Set by _init_worker.
+_worker_rando: Optional[randomizer.Randomizer] = None
+
+
+def _init_worker(shm_name: str, rom_size: int):
+    '''
+    Attach to the shared rom and build this worker's Randomizer.  The rom
+    has already been validated by the parent, so the Randomizer is made
+    with is_vanilla=False and the rom is not checked here.  The Randomizer
+    still hashes the rom once, on this worker's first seed, to decide
+    whether it is vanilla.
+    '''
+    global _worker_rando
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        rom = bytes(shm.buf[:rom_size])
+    finally:
+        shm.close()
+
+    _worker_rando = randomizer.Randomizer(rom, is_vanilla=False)
+
+
+def _init_worker_from_file(rom_path: Path):
+    '''
+    Like _init_worker, but the rom is read from a read-only mapping of the
+    rom file.  The mapping is only used to read the file once, and each
+    worker keeps its own copy of the rom.
+    '''
+    global _worker_rando
+
+    with ctrom.map_rom_file(rom_path) as rom_view:
+        rom = bytes(rom_view)
+
+    _worker_rando = randomizer.Randomizer(rom, is_vanilla=False)
+
+
+def _init_worker_dry_run():
+    '''Build this worker's Randomizer for a dry run.'''
+    global _worker_rando
+    _worker_rando = randomizer.Randomizer(None)
+
+
+def _generate_job(job: _BatchJob) -> BatchResult:
+    '''Generate and write out a single seed using this worker's Randomizer.'''
+    rando = _worker_rando
+    if rando is None:
+        raise ValueError('Batch worker was not initialized.')
+
+    result = BatchResult(job.index, job.settings.seed)
+    try:
+        rando.settings = job.settings
+        rando.track_free_space = job.free_space_report
+        rando.profile = job.profile_report
+        rando.set_random_config()
+
+        writer = randomizer.RandomizerWriter(rando, job.base_name)
+        try:
+            if job.write_rom:
+                writer.write_output_rom(job.output_path)
+                result.rom_path = writer.full_output_path
+            for patch_format in job.patch_formats:
+                writer.write_output_patch(job.output_path, patch_format)
+                result.patch_paths.append(writer.patch_path)
+        finally:
+            if rando.free_space_report is not None:
+                writer.write_free_space_report(job.output_path)
+                result.free_space_report_path = \
+                    writer.free_space_report_path
+            if rando.profile_report is not None:
+                writer.write_profile_report(job.output_path)
+                result.profile_report_path = writer.profile_report_path
+
+        if job.spoilers:
+            writer.write_spoiler_log(job.output_path)
+            result.spoiler_path = writer.spoiler_path
+
+        if job.json_spoilers:
+            writer.write_json_spoiler_log(job.output_path)
+            result.json_spoiler_path = writer.json_spoiler_path
+    except Exception:  # Report failure, but keep the worker alive.
+        result.error = traceback.format_exc()
+
+    return result
+
+
+def get_batch_seeds(num_seeds: int,
+                    base_seed: Optional[str] = None) -> list[str]:
+    '''
+    Get a list of num_seeds distinct seed strings.  If a base_seed is given
+    then the seeds are base_seed with an index appended.  Otherwise seeds
+    are random pairs of names like a normal command line generation.
+    '''
+    if base_seed:
+        width = len(str(num_seeds-1))
+        return [f'{base_seed}{ind:0{width}d}' for ind in range(num_seeds)]
+
+    names = randomizer.read_names()
+    seeds: list[str] = []
+    used: set[str] = set()
+    while len(seeds) < num_seeds:
+        seed = ''.join(random.choice(names) for _ in range(2))
+        if seed in used:
+            seed = f'{seed}{len(seeds)}'
+        used.add(seed)
+        seeds.append(seed)
+
+    return seeds
+
+
+def _make_jobs(settings: rset.Settings,
+               seeds: Iterable[str],
+               output_path: Path,
+               base_name: str,
+               spoilers: bool,
+               json_spoilers: bool,
+               free_space_reports: bool,
+               profile_reports: bool,
+               write_roms: bool,
+               patch_formats: tuple[seedpatch.PatchFormat, ...]
+               ) -> Iterator[_BatchJob]:
+    for index, seed in enumerate(seeds):
+        job_settings = copy.deepcopy(settings)
+        job_settings.seed = seed
+        yield _BatchJob(index, job_settings, output_path, base_name,
+                        spoilers, json_spoilers, free_space_reports,
+                        profile_reports, write_roms, patch_formats)
+
+
+def generate_batch(rom: Optional[Union[bytes, Path]],
+                   settings: rset.Settings,
+                   num_seeds: int,
+                   output_path: Path,
+                   base_name: str,
+                   num_workers: Optional[int] = None,
+                   seeds: Optional[list[str]] = None,
+                   spoilers: bool = False,
+                   json_spoilers: bool = False,
+                   free_space_reports: bool = False,
+                   profile_reports: bool = False,
+                   write_roms: bool = True,
+                   patch_formats: Iterable[seedpatch.PatchFormat] = ()
+                   ) -> Iterator[BatchResult]:
+    '''
+    Generate num_seeds seeds with the given settings using a pool of
+    num_workers processes (default: one per cpu).  Outputs are written to
+    output_path as they finish, and a BatchResult is yielded for each seed
+    in the order they complete.
+
+    If seeds is not provided, seeds are made by get_batch_seeds using
+    settings.seed as the base seed (if set).
+
+    The rom may be given as a path to the rom file, in which case it is
+    never read by this process.
+
+    Each seed is written as a rom (unless write_roms is False) and as a patch
+    against the given rom in each of patch_formats.
+
+    If rom is None, only the spoilers are written.  The base configs for
+    settings must be cached (see Randomizer.cache_base_configs).
+    '''
+    if seeds is None:
+        seeds = get_batch_seeds(num_seeds, settings.seed)
+    elif len(seeds) != num_seeds:
+        raise ValueError('Number of seeds does not match num_seeds.')
+
+    formats = tuple(patch_formats)
+    if rom is None:
+        if formats:
+            raise ValueError('A dry run can not write patches.')
+        write_roms = False
+
+    if num_workers is None:
+        num_workers = os.cpu_count() or 1
+    num_workers = max(1, min(num_workers, num_seeds))
+
+    jobs = _make_jobs(settings, seeds, output_path, base_name,
+                      spoilers, json_spoilers, free_space_reports,
+                      profile_reports, write_roms, formats)
+
+    if rom is None:
+        with mp.Pool(num_workers, initializer=_init_worker_dry_run) as pool:
+            yield from pool.imap_unordered(_generate_job, jobs)
+        return
+
+    if isinstance(rom, Path):
+        with mp.Pool(num_workers, initializer=_init_worker_from_file,
+                     initargs=(rom,)) as pool:
+            yield from pool.imap_unordered(_generate_job, jobs)
+        return
+
+    shm = shared_memory.SharedMemory(create=True, size=len(rom))
+    try:
+        shm.buf[:len(rom)] = rom
+        with mp.Pool(num_workers, initializer=_init_worker,
+                     initargs=(shm.name, len(rom))) as pool:
+            yield from pool.imap_unordered(_generate_job, jobs)
+    finally:
+        shm.close()
+        shm.unlink()
@@ -1,17 +1,58 @@
 '''Module for putting a seed hash on the Active/Wait screen.'''
+from enum import Enum
 import hashlib
+import json
+from typing import Optional
 
 import ctrom
 import ctstrings
+from jotjson import JOTJSONEncoder
+import randosettings as rset
 
-def calculate_hash_string(ct_rom: ctrom.CTRom) -> bytes:
-    rom = ct_rom.rom_data
 
-    rom.seek(0)
-    seed = rom.read()
+class HashMode(Enum):
+    FULL = 0  # md5 of the whole rom
+    FAST = 1  # md5 of the settings and the rom's page sums
+
+
+def get_settings_bytes(settings: rset.Settings) -> bytes:
+    '''
+    Get the settings which determine the rom's contents as bytes.  Cosmetic
+    settings are left out because they are applied after the hash.
+    '''
+    settings_dict = json.loads(json.dumps(settings, cls=JOTJSONEncoder))
+    for key in ('cosmetic_flags', 'ctoptions'):
+        settings_dict.pop(key, None)
+
+    return json.dumps(settings_dict, sort_keys=True).encode()
+
+
+def calculate_hash_string(ct_rom: ctrom.CTRom,
+                          settings: Optional[rset.Settings] = None,
+                          mode: HashMode = HashMode.FULL) -> bytes:
+    '''
+    Get the symbols of the hash string for ct_rom.
+
+    In FAST mode, the rom's contents are represented by the byte sums the
+    FSRom keeps for each page (only pages written since they were last
+    computed are summed again), so the whole rom is not hashed.  The
+    settings must be given in this mode.
+    '''
+    rom = ct_rom.rom_data
 
     hasher = hashlib.md5()
-    hasher.update(seed)
+    if mode == HashMode.FAST:
+        if settings is None:
+            raise ValueError('Settings are required for a fast hash.')
+        hasher.update(get_settings_bytes(settings))
+        hasher.update(
+            b''.join(page_sum.to_bytes(4, 'little')
+                     for page_sum in rom.get_page_sums())
+        )
+    else:
+        rom.seek(0)
+        seed = rom.read()
+        hasher.update(seed)
     hex_str = hasher.hexdigest()
 
     symbols = [0x20, 0x21, 0x22, 0x23, 0x24, 0x25, 0x26, 0x27, 0x28, 0x29,
@@ -26,9 +67,11 @@ def calculate_hash_string(ct_rom: ctrom.CTRom) -> bytes:
 
     return bytes(hash_string)
 
-def write_hash_string(ct_rom: ctrom.CTRom) -> bytes:
+def write_hash_string(ct_rom: ctrom.CTRom,
+                      settings: Optional[rset.Settings] = None,
+                      mode: HashMode = HashMode.FULL) -> bytes:
     ''' Puts a hash string on the active/wait screen of this ctrom.'''
-    hash_string = calculate_hash_string(ct_rom)
+    hash_string = calculate_hash_string(ct_rom, settings, mode)
 
     seed_ctstr = ctstrings.CTString.from_str('Seed:')
 
@@ -0,0 +1,329 @@
+'''
+Module for writing a generated rom as an IPS or BPS patch against the rom it
+was generated from, and for applying those patches.
+
+Basic usage:
+    patch = seedpatch.make_patch(vanilla, seed_rom, PatchFormat.BPS)
+    seed_rom = seedpatch.apply_patch(vanilla, patch, PatchFormat.BPS)
+
+Changed ranges are found by comparing whole banks, then pages, then small
+blocks of the two roms.  Only the ends of changed ranges are looked at byte
+by byte.
+'''
+from __future__ import annotations
+
+from enum import Enum
+import functools
+import io
+import re
+from typing import ByteString, Iterator
+import zlib
+
+import freespace
+
+
+class InvalidPatchException(Exception):
+    pass
+
+
+class PatchFormat(Enum):
+    IPS = 0
+    BPS = 1
+
+    @property
+    def extension(self) -> str:
+        return self.name.lower()
+
+
+# Sizes of the blocks compared when looking for changes, largest first.
+# Changed blocks of the smallest size are only trimmed at the ends of ranges.
+_COMPARE_SIZES = (0x10000, 0x1000, 0x100, 0x10)
+
+# Changes separated by at most this many unchanged bytes are written as one
+# range.  This is the size of an IPS record header.
+_MERGE_GAP = 5
+
+# Runs of a single byte at least this long are written as IPS RLE records or
+# BPS target copies.
+_MIN_RUN = 0x10
+_RUN_START_RE = re.compile(rb'(.)\1{%d}' % (_MIN_RUN-1), re.DOTALL)
+
+_IPS_HEADER = b'PATCH'
+_IPS_FOOTER = b'EOF'
+# A record can not start here because it reads as the footer.
+_IPS_EOF_ADDR = int.from_bytes(_IPS_FOOTER, 'big')
+_IPS_MAX_ADDR = 0x1000000
+_IPS_MAX_RECORD = 0xFFFF
+
+_BPS_HEADER = b'BPS1'
+_BPS_SOURCE_READ = 0
+_BPS_TARGET_READ = 1
+_BPS_SOURCE_COPY = 2
+_BPS_TARGET_COPY = 3
+
+
+def _add_range(ranges: list[list[int]], start: int, end: int):
+    if ranges and start - ranges[-1][1] <= _MERGE_GAP:
+        ranges[-1][1] = end
+    else:
+        ranges.append([start, end])
+
+
+def _add_changes(source: bytes, target: bytes,
+                 start: int, end: int, level: int,
+                 ranges: list[list[int]]):
+    size = _COMPARE_SIZES[level]
+    for block_st in range(start, end, size):
+        block_end = min(block_st + size, end)
+        if source[block_st:block_end] == target[block_st:block_end]:
+            continue
+
+        if level == len(_COMPARE_SIZES) - 1:
+            _add_range(ranges, block_st, block_end)
+        else:
+            _add_changes(source, target, block_st, block_end, level+1,
+                         ranges)
+
+
+def get_changed_ranges(source: ByteString,
+                       target: ByteString) -> list[tuple[int, int]]:
+    '''
+    Get the [start, end) ranges where target differs from source.  Bytes of
+    target past the end of source are always changed.  Ranges may include a
+    few unchanged bytes when that makes a patch smaller.
+    '''
+    # Slices of bytes compare with memcmp, but memoryview slices compare
+    # item by item.
+    source, target = bytes(source), bytes(target)
+    common_size = min(len(source), len(target))
+    ranges: list[list[int]] = []
+    _add_changes(source, target, 0, common_size, 0, ranges)
+
+    for change in ranges:
+        start, end = change
+        while source[start] == target[start]:
+            start += 1
+        while source[end-1] == target[end-1]:
+            end -= 1
+        change[:] = start, end
+
+    if len(target) > common_size:
+        _add_range(ranges, common_size, len(target))
+
+    return [(start, end) for start, end in ranges]
+
+
+@functools.lru_cache(maxsize=None)
+def _get_other_byte_re(value: int) -> re.Pattern:
+    '''Get a pattern matching any byte except value.'''
+    return re.compile(rb'[^' + re.escape(bytes([value])) + rb']')
+
+
+def _split_runs(data: bytes, start: int,
+                end: int) -> Iterator[tuple[int, int, bool]]:
+    '''
+    Split data[start:end] into (start, end, is_run) pieces where runs are
+    at least _MIN_RUN copies of one byte.
+    '''
+    # Matching a whole run with a backreference is slow, so only the start
+    # is matched and the end is found by searching for a different byte.
+    pos = start
+    while (match := _RUN_START_RE.search(data, pos, end)) is not None:
+        run_st = match.start()
+        other = _get_other_byte_re(data[run_st]).search(data, run_st, end)
+        run_end = end if other is None else other.start()
+
+        if run_st > pos:
+            yield pos, run_st, False
+        yield run_st, run_end, True
+        pos = run_end
+
+    if pos < end:
+        yield pos, end, False
+
+
+def make_ips(source: ByteString, target: ByteString) -> bytes:
+    '''Get an IPS patch which turns source into target.'''
+    target = bytes(target)
+    if len(target) > _IPS_MAX_ADDR:
+        raise ValueError('IPS can not address the whole target.')
+
+    patch = bytearray(_IPS_HEADER)
+    for range_st, range_end in get_changed_ranges(source, target):
+        for start, end, is_run in _split_runs(target, range_st, range_end):
+            pos = start
+            while pos < end:
+                if pos == _IPS_EOF_ADDR:
+                    # Rewrite the byte before too so the record starts
+                    # elsewhere.
+                    patch += (pos-1).to_bytes(3, 'big') + b'\x00\x02'
+                    patch += target[pos-1:pos+1]
+                    pos += 1
+                    continue
+
+                size = min(end - pos, _IPS_MAX_RECORD)
+                patch += pos.to_bytes(3, 'big')
+                if is_run:
+                    patch += bytes(2) + size.to_bytes(2, 'big')
+                    patch.append(target[pos])
+                else:
+                    patch += size.to_bytes(2, 'big')
+                    patch += target[pos:pos+size]
+                pos += size
+
+    patch += _IPS_FOOTER
+    return bytes(patch)
+
+
+def apply_ips(source: ByteString, patch: ByteString) -> bytes:
+    '''Apply an IPS patch made by make_ips (or any other) to source.'''
+    rom = freespace.FSRom(bytes(source), False)
+    # Free space doesn't matter here, but it has to cover every write.
+    rom.space_manager = freespace.FreeSpace(_IPS_MAX_ADDR, False)
+    rom.patch_ips(io.BytesIO(patch))
+
+    return rom.getvalue()
+
+
+def _encode_bps_number(value: int) -> bytes:
+    encoded = bytearray()
+    while True:
+        low_bits = value & 0x7F
+        value >>= 7
+        if value == 0:
+            encoded.append(0x80 | low_bits)
+            return bytes(encoded)
+        encoded.append(low_bits)
+        value -= 1
+
+
+def _decode_bps_number(patch: bytes, pos: int) -> tuple[int, int]:
+    '''Get the number at patch[pos] and the position after it.'''
+    value, shift = 0, 1
+    while True:
+        if pos >= len(patch):
+            raise InvalidPatchException('Truncated BPS patch.')
+        byte = patch[pos]
+        pos += 1
+        value += (byte & 0x7F)*shift
+        if byte & 0x80:
+            return value, pos
+        shift <<= 7
+        value += shift
+
+
+def make_bps(source: ByteString, target: ByteString) -> bytes:
+    '''Get a BPS patch which turns source into target.'''
+    target = bytes(target)
+
+    patch = bytearray(_BPS_HEADER)
+    patch += _encode_bps_number(len(source))
+    patch += _encode_bps_number(len(target))
+    patch += _encode_bps_number(0)  # No metadata
+
+    pos = 0
+    target_rel = 0  # Where the last target copy ended
+    for range_st, range_end in get_changed_ranges(source, target):
+        if range_st > pos:
+            patch += _encode_bps_number(
+                (range_st - pos - 1) << 2 | _BPS_SOURCE_READ
+            )
+
+        for start, end, is_run in _split_runs(target, range_st, range_end):
+            if is_run:
+                # One byte, then a copy of it which overlaps itself.
+                patch += _encode_bps_number(_BPS_TARGET_READ)
+                patch.append(target[start])
+                patch += _encode_bps_number(
+                    (end - start - 2) << 2 | _BPS_TARGET_COPY
+                )
+                offset = start - target_rel
+                patch += _encode_bps_number(abs(offset) << 1 | (offset < 0))
+                target_rel = end - 1
+            else:
+                patch += _encode_bps_number(
+                    (end - start - 1) << 2 | _BPS_TARGET_READ
+                )
+                patch += target[start:end]
+        pos = range_end
+
+    if pos < len(target):
+        patch += _encode_bps_number(
+            (len(target) - pos - 1) << 2 | _BPS_SOURCE_READ
+        )
+
+    patch += zlib.crc32(source).to_bytes(4, 'little')
+    patch += zlib.crc32(target).to_bytes(4, 'little')
+    patch += zlib.crc32(patch).to_bytes(4, 'little')
+    return bytes(patch)
+
+
+def apply_bps(source: ByteString, patch: ByteString) -> bytes:
+    '''Apply a BPS patch to source.  The checksums are verified.'''
+    patch = bytes(patch)
+    if patch[:4] != _BPS_HEADER or len(patch) < 4 + 3 + 12:
+        raise InvalidPatchException('Not a BPS patch.')
+    if zlib.crc32(patch[:-4]) != int.from_bytes(patch[-4:], 'little'):
+        raise InvalidPatchException('BPS patch checksum mismatch.')
+    if zlib.crc32(source) != int.from_bytes(patch[-12:-8], 'little'):
+        raise InvalidPatchException('BPS patch is for a different source.')
+
+    pos = 4
+    source_size, pos = _decode_bps_number(patch, pos)
+    target_size, pos = _decode_bps_number(patch, pos)
+    metadata_size, pos = _decode_bps_number(patch, pos)
+    pos += metadata_size
+    if source_size != len(source):
+        raise InvalidPatchException('BPS patch is for a different source.')
+
+    target = bytearray()
+    source_rel, target_rel = 0, 0
+    actions_end = len(patch) - 12
+    while pos < actions_end:
+        data, pos = _decode_bps_number(patch, pos)
+        action, length = data & 3, (data >> 2) + 1
+
+        if action == _BPS_SOURCE_READ:
+            out_pos = len(target)
+            target += source[out_pos:out_pos+length]
+        elif action == _BPS_TARGET_READ:
+            target += patch[pos:pos+length]
+            pos += length
+        else:
+            offset, pos = _decode_bps_number(patch, pos)
+            offset = -(offset >> 1) if offset & 1 else offset >> 1
+            if action == _BPS_SOURCE_COPY:
+                source_rel += offset
+                target += source[source_rel:source_rel+length]
+                source_rel += length
+            else:
+                target_rel += offset
+                distance = len(target) - target_rel
+                if distance <= 0:
+                    raise InvalidPatchException('Bad BPS target copy.')
+                # The copy may overlap what it writes, which repeats the
+                # last distance bytes.
+                pattern = bytes(target[target_rel:target_rel+distance])
+                repeats = -(-length // len(pattern))
+                target += (pattern*repeats)[:length]
+                target_rel += length
+
+    if len(target) != target_size or \
+       zlib.crc32(target) != int.from_bytes(patch[-8:-4], 'little'):
+        raise InvalidPatchException('BPS patch produced the wrong target.')
+
+    return bytes(target)
+
+
+def make_patch(source: ByteString, target: ByteString,
+               patch_format: PatchFormat) -> bytes:
+    if patch_format == PatchFormat.IPS:
+        return make_ips(source, target)
+    return make_bps(source, target)
+
+
+def apply_patch(source: ByteString, patch: ByteString,
+                patch_format: PatchFormat) -> bytes:
+    if patch_format == PatchFormat.IPS:
+        return apply_ips(source, patch)
+    return apply_bps(source, patch)
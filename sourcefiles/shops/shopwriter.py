@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 import math
-import random as rand
+import random
 
 from ctenums import ItemID, ShopID
 from treasures import treasuredata as td
@@ -11,7 +11,8 @@ import randosettings as rset
 
 
 def write_shops_to_config(settings: rset.Settings,
-                          config: cfg.RandoConfig):
+                          config: cfg.RandoConfig,
+                          rand: random.Random):
 
     # Bunch of declarations.  They're here instead of in global scope after
     # the great shelling of November 2021.
@@ -98,7 +99,7 @@ def write_shops_to_config(settings: rset.Settings,
     # Melchior's special shop
     shop_manager = config.shop_manager
     shop_manager.set_shop_items(ShopID.MELCHIOR_FAIR,
-                                get_melchior_shop_items())
+                                get_melchior_shop_items(rand))
 
     # Now write out the regular, good, best shops.
     # Parallel lists for type, dist, and guarantees.  This is a little ugly
@@ -113,7 +114,7 @@ def write_shops_to_config(settings: rset.Settings,
         for shop in shop_types[i]:
             guaranteed = shop_guaranteed[i]
             dist = shop_dists[i]
-            items = get_shop_items(guaranteed, dist)
+            items = get_shop_items(guaranteed, dist, rand)
 
             shop_manager.set_shop_items(shop, items)
 
@@ -124,7 +125,7 @@ def write_shops_to_config(settings: rset.Settings,
     # here if desired.  For example, guarantee ethers/midtonics in LW.
 
 
-def get_melchior_shop_items():
+def get_melchior_shop_items(rand: random.Random):
 
     swords = [ItemID.FLASHBLADE, ItemID.PEARL_EDGE,
               ItemID.RUNE_BLADE, ItemID.DEMON_HIT]
@@ -146,18 +147,19 @@ def get_melchior_shop_items():
     return item_list
 
 
-def get_shop_items(guaranteed_items: list[ItemID], item_dist):
+def get_shop_items(guaranteed_items: list[ItemID], item_dist,
+                   rand: random.Random):
     shop_items = guaranteed_items[:]
 
     # potentially shop size should be passed in.  Keep the random isolated.
     item_count = rand.randrange(3, 9) - len(shop_items)
 
     for item_index in range(item_count):
-        item = item_dist.get_random_item()
+        item = item_dist.get_random_item(rand)
 
         # Avoid duplicate items.
         while item in shop_items:
-            item = item_dist.get_random_item()
+            item = item_dist.get_random_item(rand)
 
         shop_items.append(item)
 
@@ -171,7 +173,7 @@ def get_shop_items(guaranteed_items: list[ItemID], item_dist):
 # Get a random price from 1-65000.  This function tends to
 # bias lower numbers to avoid everything being prohibitively expensive.
 #
-def getRandomPrice():
+def getRandomPrice(rand: random.Random):
     r1 = rand.uniform(0, 1)
     r2 = rand.uniform(0, 1)
     return math.floor(abs(r1 - r2) * 65000 + 1)
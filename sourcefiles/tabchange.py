@@ -1,4 +1,4 @@
-import random as rand
+import random
 
 from byteops import to_little_endian, to_rom_ptr
 from ctrom import CTRom
@@ -8,7 +8,8 @@ import randoconfig as cfg
 import randosettings as rset
 
 
-def choose_binom(min_val: int, max_val: int, p_succ: float):
+def choose_binom(min_val: int, max_val: int, p_succ: float,
+                 rand: random.Random):
 
     num_flips = max_val - min_val + 1
     add = 0
@@ -19,7 +20,8 @@ def choose_binom(min_val: int, max_val: int, p_succ: float):
 
 
 def write_tabs_to_config(settings: rset.Settings,
-                         config: cfg.RandoConfig):
+                         config: cfg.RandoConfig,
+                         rand: random.Random):
 
     tab_settings = settings.tab_settings
 
@@ -27,7 +29,7 @@ def write_tabs_to_config(settings: rset.Settings,
         p_succ = tab_settings.binom_success
 
         def rand_func(x: int, y: int):
-            return choose_binom(x, y, p_succ)
+            return choose_binom(x, y, p_succ, rand)
     elif tab_settings.scheme == rset.TabRandoScheme.UNIFORM:
 
         def rand_func(x: int, y: int):
@@ -205,14 +207,14 @@ def rewrite_tabs(filename, rt_start=0x5F7450):
     rt_start_addr = to_little_endian(rt_start, 3)
 
     # Change these, make them function parameters, etc to alter the magnitudes
-    random_num = rand.randrange(0, 100, 1)
+    random_num = random.randrange(0, 100, 1)
     if random_num < 33:
         pow_add = bytearray([2])
     elif random_num > 32 and random_num < 66:
         pow_add = bytearray([3])
     else:
         pow_add = bytearray([4])
-    random_num = rand.randrange(0, 101, 1)
+    random_num = random.randrange(0, 101, 1)
     if random_num < 33:
         mag_add = bytearray([2])
     elif random_num > 32 and random_num < 66:
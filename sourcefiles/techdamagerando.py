@@ -8,7 +8,7 @@ import cttechtypes as ctt
 import techdb
 
 
-def modify_all_single_techs(tech_db: techdb.TechDB):
+def modify_all_single_techs(tech_db: techdb.TechDB, rand: random.Random):
     """
     Scale every single tech in the tech_db.  Shuffle existing MPs.
     This function relies on vanilla tech names to identify techs that need
@@ -57,7 +57,7 @@ def modify_all_single_techs(tech_db: techdb.TechDB):
 
     # Shuffle the MP values
     new_mp_vals = list(orig_mps.values())
-    random.shuffle(new_mp_vals)
+    rand.shuffle(new_mp_vals)
     new_mps = dict(zip(orig_mps.keys(), new_mp_vals))
 
     # Scale the effects.  Also scale the duplicate if one exists
@@ -0,0 +1,105 @@
+import baseconfigcache
+
+
+class Builder:
+    '''Callable that records how many times it was called.'''
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return {'calls': self.calls, 'data': [1, 2, 3]}
+
+
+def test_returns_fresh_copies(tmp_path):
+    cache = baseconfigcache.BaseConfigCache(tmp_path)
+    builder = Builder()
+
+    first = cache.get_or_build('test', ('a',), builder)
+    first['data'].append(4)
+    second = cache.get_or_build('test', ('a',), builder)
+
+    assert builder.calls == 1
+    assert second == {'calls': 1, 'data': [1, 2, 3]}
+
+
+def test_rebuilds_on_key_change(tmp_path):
+    cache = baseconfigcache.BaseConfigCache(tmp_path)
+    builder = Builder()
+
+    cache.get_or_build('test', ('a',), builder)
+    result = cache.get_or_build('test', ('b',), builder)
+
+    assert builder.calls == 2
+    assert result['calls'] == 2
+
+
+def test_reads_from_disk(tmp_path):
+    builder = Builder()
+    baseconfigcache.BaseConfigCache(tmp_path).get_or_build(
+        'test', ('a',), builder
+    )
+
+    # A new cache (e.g. a new process) finds the stored entry.
+    result = baseconfigcache.BaseConfigCache(tmp_path).get_or_build(
+        'test', ('a',), builder
+    )
+    assert builder.calls == 1
+    assert result['calls'] == 1
+
+    # Memory only caches do not.
+    baseconfigcache.BaseConfigCache(tmp_path, use_disk=False).get_or_build(
+        'test', ('a',), builder
+    )
+    assert builder.calls == 2
+
+
+def test_patches_digest_tracks_changes(tmp_path):
+    (tmp_path / 'a.ips').write_bytes(b'PATCH')
+    (tmp_path / 'b.txt').write_bytes(b'1234')
+    digest = baseconfigcache.get_patches_digest(tmp_path)
+
+    assert baseconfigcache.get_patches_digest(tmp_path) == digest
+
+    (tmp_path / 'b.txt').write_bytes(b'12345')
+    assert baseconfigcache.get_patches_digest(tmp_path) != digest
+
+
+def test_get_matches_none_in_key(tmp_path):
+    builder = Builder()
+    baseconfigcache.BaseConfigCache(tmp_path).get_or_build(
+        'test', ('rom', 'patches'), builder
+    )
+
+    cache = baseconfigcache.BaseConfigCache(tmp_path)
+    assert cache.get('test', (None, 'patches')) == \
+        {'calls': 1, 'data': [1, 2, 3]}
+    assert cache.get('test', (None, 'other patches')) is None
+    assert cache.get('missing', (None, 'patches')) is None
+
+    # The entry found by get is kept in memory.
+    assert cache.get_or_build('test', ('rom', 'patches'), builder) == \
+        {'calls': 1, 'data': [1, 2, 3]}
+    assert builder.calls == 1
+
+
+def test_code_changes_rebuild(tmp_path):
+    source_path = tmp_path / 'source'
+    (source_path / 'tests').mkdir(parents=True)
+    (source_path / 'builder.py').write_text('X = 1\n')
+    (source_path / 'tests' / 'test_builder.py').write_text('X = 1\n')
+    builder = Builder()
+
+    def get_result():
+        # New caches, because the code is only hashed once per process.
+        baseconfigcache._code_digests.clear()
+        return baseconfigcache.BaseConfigCache(
+            tmp_path, source_path=source_path
+        ).get_or_build('test', ('a',), builder)
+
+    get_result()
+    (source_path / 'tests' / 'test_builder.py').write_text('X = 22\n')
+    assert get_result()['calls'] == 1
+
+    (source_path / 'builder.py').write_text('X = 22\n')
+    assert get_result()['calls'] == 2
@@ -0,0 +1,18 @@
+from benchmarks import generation
+
+
+def test_synthetic_run_and_baseline():
+    results = generation.run(None, num_seeds=2, case_names=['race'])
+    assert results[0].failures == 0
+    assert len(results[0].latencies) == 2
+
+    report = generation.get_report(results, synthetic=True)
+    assert generation.compare_to_baseline(report, report) == []
+
+    slow = generation.get_report(results, synthetic=True)
+    slow['cases']['race'] = dict(
+        report['cases']['race'],
+        seeds_per_sec=report['cases']['race']['seeds_per_sec']/2,
+    )
+    regressions = generation.compare_to_baseline(slow, report)
+    assert len(regressions) == 1 and regressions[0].startswith('race')
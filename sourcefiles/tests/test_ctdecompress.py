@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+import random
+
+import pytest
+
+import ctdecompress
+import ctenums
+import ctevent
+
+try:
+    import ctcompress
+except ImportError:
+    ctcompress = None
+
+
+# Set CT_ROM to the path of a vanilla rom to run the tests over real scripts.
+_rom_path = Path(os.environ.get('CT_ROM',
+                                Path(__file__).parent.parent / 'ct.sfc'))
+
+needs_native = pytest.mark.skipif(
+    ctcompress is None or not hasattr(ctcompress, 'decompress'),
+    reason='ctcompress extension with decompress not built'
+)
+
+
+def get_test_sources() -> list[bytes]:
+    rand = random.Random(0)
+    sources = [b'\x00'*0x200, bytes(range(0x100))*4]
+    for size in (1, 7, 8, 9, 0x123, 0x1000):
+        # Mix of repeated and random runs so that both copy and literal
+        # packets show up.
+        source = bytearray()
+        while len(source) < size:
+            if source and rand.random() < 0.5:
+                start = rand.randrange(len(source))
+                source += source[start:start+rand.randrange(3, 40)]
+            else:
+                source += bytes(rand.randrange(0x100) for _ in range(5))
+        sources.append(bytes(source[:size]))
+
+    return sources
+
+
+@pytest.mark.parametrize('source', get_test_sources())
+def test_round_trip(source: bytes):
+    compressed = ctdecompress.compress(source)
+    rom = b'\xFF'*5 + compressed + b'\xFF'*5
+
+    assert ctdecompress.decompress_py(rom, 5) == source
+    assert ctdecompress.decompress(rom, 5) == source
+    assert ctdecompress.get_compressed_length(rom, 5) == \
+        ctdecompress.get_compressed_length_py(rom, 5)
+
+
+@pytest.mark.skipif(
+    ctcompress is None or not hasattr(ctcompress, 'compress_reference'),
+    reason='ctcompress extension with compress_reference not built'
+)
+@pytest.mark.parametrize('source', get_test_sources() + [b'', b'\x00'*0x3000])
+def test_compress_matches_reference(source: bytes):
+    '''The hash chain match finder gives the brute force search's output.'''
+    assert ctcompress.compress(source) == \
+        ctcompress.compress_reference(source)
+
+
+@needs_native
+@pytest.mark.skipif(not _rom_path.exists(), reason='no rom available')
+def test_native_matches_python_on_rom():
+    rom = _rom_path.read_bytes()
+    if len(rom) % 0x400000 == 0x200:
+        rom = rom[0x200:]
+
+    for loc_id in ctenums.LocID:
+        ptr = ctevent.get_loc_event_ptr(rom, loc_id)
+        length = ctdecompress.get_compressed_length_py(rom, ptr)
+        script = ctdecompress.decompress_py(rom, ptr)
+
+        assert ctcompress.get_compressed_length(rom, ptr) == length
+        assert ctcompress.decompress(rom, ptr) == script
+        assert ctdecompress.decompress(
+            ctdecompress.compress(script), 0
+        ) == script
+        if hasattr(ctcompress, 'compress_reference'):
+            assert ctcompress.compress(script) == \
+                ctcompress.compress_reference(script)
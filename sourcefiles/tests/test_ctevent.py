@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import copy
+from io import BytesIO
+import random
+
+import pytest
+
+import ctdecompress
+import ctevent
+from eventcommand import EventCommand as EC, get_command
+
+
+FLUX_NAMES = ['VR_002_Crono_Room.Flux', 'VR_10C_Geno_Dome_Mainframe.Flux',
+              'bucket_eot.Flux', 'jot_trading_post.Flux']
+
+
+class UnindexedEvent(ctevent.Event):
+    '''Event which always takes the original decode-everything paths.'''
+    def _get_command_index(self):
+        return None
+
+
+def get_offsets(script: ctevent.Event) -> list[int]:
+    offsets = []
+    pos = script.get_object_start(0)
+    while pos < len(script.data):
+        offsets.append(pos)
+        pos += len(get_command(script.data, pos))
+
+    return offsets
+
+
+@pytest.mark.parametrize('flux_name', FLUX_NAMES)
+def test_index_matches_unindexed(flux_name: str):
+    '''
+    Random searches, insertions and deletions give the same results with
+    and without the command index.
+    '''
+    rand = random.Random(flux_name)
+    script = ctevent.Event.from_flux(flux_name)
+    ref_script = copy.deepcopy(script)
+    ref_script.__class__ = UnindexedEvent
+
+    jump_cmds = EC.fwd_jump_commands + EC.back_jump_commands
+    cmd_ids = sorted(set(script.data[pos] for pos in get_offsets(script)))
+
+    for _ in range(120):
+        offsets = get_offsets(ref_script)
+        pos = rand.choice(offsets)
+        action = rand.randrange(4)
+
+        if action == 0:
+            find_ids = rand.sample(cmd_ids, 3)
+            end = rand.choice([None, rand.choice(offsets)])
+            assert script.find_command_opt(find_ids, pos, end)[0] == \
+                ref_script.find_command_opt(find_ids, pos, end)[0]
+        elif action == 1:
+            find_cmd = get_command(ref_script.data, rand.choice(offsets))
+            assert script.find_exact_command_opt(find_cmd, pos) == \
+                ref_script.find_exact_command_opt(find_cmd, pos)
+        elif action == 2 and script.data[pos] not in jump_cmds:
+            script.delete_commands(pos, 1)
+            ref_script.delete_commands(pos, 1)
+        elif action == 3:
+            new_cmd = get_command(ref_script.data, rand.choice(offsets))
+            if new_cmd.command not in jump_cmds:
+                script.insert_commands(new_cmd.to_bytearray(), pos)
+                ref_script.insert_commands(new_cmd.to_bytearray(), pos)
+
+        assert script.data == ref_script.data
+
+    # The index was kept up to date rather than rebuilt.
+    index = script._get_command_index()
+    assert index is not None
+    assert index.offsets == get_offsets(script)
+
+
+def test_direct_edits_invalidate_index():
+    script = ctevent.Event.from_flux(FLUX_NAMES[0])
+    start = script.get_object_start(0)
+    script.find_command_opt([0xB8], start)  # Build the index
+
+    # Replace the second command with a Return by editing data directly.
+    ret_pos = get_offsets(script)[1]
+    ret_end = ret_pos + len(get_command(script.data, ret_pos))
+    script.data[ret_pos:ret_end] = b'\x00'
+
+    assert script.find_command_opt([0x00], start)[0] == ret_pos
+    assert script._get_command_index().offsets == get_offsets(script)
+
+
+def make_string_rom() -> tuple[bytearray, int]:
+    '''
+    Get a rom with a script using string indices 5 and 2 of a string table
+    at 0x010000.  String 5 is longer than the chunk used to search for the
+    end of a string.
+    '''
+    rom = bytearray(0x20000)
+    strings = {2: b'\x41\x42\x00', 5: b'\x43'*0x180 + b'\x00'}
+    for index, (addr, string) in zip((2, 5), ((0x10100, strings[2]),
+                                              (0x10200, strings[5]))):
+        rom[0x10000+2*index:0x10000+2*index+2] = \
+            (addr & 0xFFFF).to_bytes(2, 'little')
+        rom[addr:addr+len(string)] = string
+
+    event_data = bytes([1]) + b'\x20\x00'*16 + \
+        b'\xB8\x00\x00\xC1' + b'\xBB\x05' + b'\xBB\x02' + b'\x00'
+    compr_event = ctdecompress.compress(event_data)
+    rom[0x1000:0x1000+len(compr_event)] = compr_event
+
+    return rom, 0x1000
+
+
+def test_lazy_strings_match_eager():
+    rom, ptr = make_string_rom()
+    eager = ctevent.Event.from_rom(rom, ptr)
+    lazy = ctevent.Event.from_rom(rom, ptr, string_source=BytesIO(rom))
+
+    # Indices are renumbered in order of use.
+    assert eager.data[-5:-1] == bytearray(b'\xBB\x01\xBB\x00')
+    assert eager.strings == [bytearray(b'\x41\x42\x00'),
+                             bytearray(b'\x43'*0x180 + b'\x00')]
+
+    assert not lazy.strings_loaded
+    assert lazy.data == eager.data
+    lazy_copy = copy.deepcopy(lazy)
+    assert lazy.strings == eager.strings
+    assert lazy.strings_loaded
+    assert lazy_copy.strings == eager.strings
@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+from typing import Optional
+
+import pytest
+
+import ctdecompress
+import ctenums
+import ctevent
+import ctrom
+import freespace
+
+
+def make_ctrom() -> ctrom.CTRom:
+    ct_rom = ctrom.CTRom(bytes(0x400000), ignore_checksum=True)
+    ct_rom.rom_data.space_manager.mark_block(
+        (0x100000, 0x110000), freespace.FSWriteType.MARK_FREE
+    )
+
+    event = ctevent.Event()
+    event.data = bytearray(b'\x00\x01\x02')
+    ct_rom.script_manager.script_dict[ctenums.LocID.LOAD_SCREEN] = event
+    ct_rom.script_manager.orig_len_dict[ctenums.LocID.LOAD_SCREEN] = 3
+
+    return ct_rom
+
+
+def test_copy_is_independent():
+    orig = make_ctrom()
+    copy = orig.copy()
+
+    assert copy.rom_data.getvalue() == orig.rom_data.getvalue()
+    assert copy.rom_data.space_manager.markers == \
+        orig.rom_data.space_manager.markers
+
+    orig.rom_data.seek(0x100000)
+    orig.rom_data.write(b'\xFF'*0x10, freespace.FSWriteType.MARK_USED)
+    orig.script_manager.get_script(ctenums.LocID.LOAD_SCREEN).data[0] = 0xFF
+
+    assert copy.rom_data.getbuffer()[0x100000] == 0
+    assert copy.rom_data.space_manager.get_free_addr(0x10) == 0x100000
+    assert copy.script_manager.get_script(ctenums.LocID.LOAD_SCREEN).data \
+        == bytearray(b'\x00\x01\x02')
+    assert copy.script_manager.fsrom is copy.rom_data
+
+
+def make_script_ctrom(bodies: Optional[list[bytes]] = None,
+                      rom: Optional[bytearray] = None) -> ctrom.CTRom:
+    '''
+    Get a CTRom with a small script for LOAD_SCREEN and CRONOS_ROOM and
+    some free space to write new scripts to.  By default the body of each
+    script is a distinct number of returns.
+    '''
+    if bodies is None:
+        bodies = [b'\x00', b'\x00\x00']
+
+    if rom is None:
+        rom = bytearray(0x400000)
+
+    for ind, loc_id in enumerate((ctenums.LocID.LOAD_SCREEN,
+                                  ctenums.LocID.CRONOS_ROOM)):
+        # One object with all functions starting at 0x20.
+        event_data = bytes([1]) + b'\x20\x00'*16 + bodies[ind]
+        compr_event = ctdecompress.compress(event_data)
+        script_ptr = 0x200000 + 0x100*ind
+
+        rom[script_ptr:script_ptr+len(compr_event)] = compr_event
+        loc_ptr = 0x360000 + 14*loc_id + 8
+        rom[loc_ptr:loc_ptr+2] = ind.to_bytes(2, 'little')
+        event_ptr = 0x3CF9F0 + 3*ind
+        rom[event_ptr:event_ptr+3] = \
+            (0xC00000+script_ptr).to_bytes(3, 'little')
+
+    ct_rom = ctrom.CTRom(bytes(rom), ignore_checksum=True)
+    ct_rom.rom_data.space_manager.mark_block(
+        (0x100000, 0x110000), freespace.FSWriteType.MARK_FREE
+    )
+    return ct_rom
+
+
+def test_unchanged_scripts_are_not_rewritten():
+    ct_rom = make_script_ctrom()
+    orig_rom = ct_rom.rom_data.getvalue()
+
+    script_man = ct_rom.script_manager
+    script_man.get_script(ctenums.LocID.LOAD_SCREEN)
+    script_man.get_script(ctenums.LocID.CRONOS_ROOM).data += b'\x00'
+    ct_rom.write_all_scripts_to_rom()
+
+    new_rom = ct_rom.rom_data.getvalue()
+    assert ctevent.get_loc_event_ptr(new_rom, ctenums.LocID.LOAD_SCREEN) \
+        == 0x200000
+    assert new_rom[0x200000:0x200100] == orig_rom[0x200000:0x200100]
+    assert ctevent.get_loc_event_ptr(new_rom, ctenums.LocID.CRONOS_ROOM) \
+        == 0x100000
+    assert ctevent.Event.from_rom_location(
+        new_rom, ctenums.LocID.CRONOS_ROOM
+    ).data.endswith(b'\x00'*3)
+
+
+def test_compression_cache_is_shared(monkeypatch):
+    calls = []
+
+    def counting_compress(data):
+        calls.append(bytes(data))
+        return ctdecompress.compress(data)
+
+    monkeypatch.setattr(ctevent, 'compress', counting_compress)
+    monkeypatch.setattr(ctevent.ScriptManager, 'compression_cache', {})
+
+    base_rom = make_script_ctrom()
+    for _ in range(3):
+        ct_rom = base_rom.copy()
+        ct_rom.script_manager.get_script(ctenums.LocID.CRONOS_ROOM).data \
+            += b'\x00'
+        ct_rom.write_all_scripts_to_rom()
+
+    assert len(calls) == 1
+
+
+def make_string_ctrom() -> ctrom.CTRom:
+    '''
+    Get a CTRom whose LOAD_SCREEN script uses strings 0 and 1 of a string
+    table at 0x210000 and whose CRONOS_ROOM script uses string 1.
+    '''
+    rom = bytearray(0x400000)
+    rom[0x210000:0x210004] = b'\x00\x01\x00\x02'
+    rom[0x210100:0x210102] = b'\x41\x00'
+    rom[0x210200:0x210203] = b'\x42\x42\x00'
+
+    str_index = b'\xB8\x00\x00\xE1'
+    return make_script_ctrom(
+        [str_index + b'\xBB\x00\xBB\x01\x00', str_index + b'\xBB\x01\x00'],
+        rom
+    )
+
+
+def test_unused_strings_are_reclaimed():
+    ct_rom = make_string_ctrom()
+    script = ct_rom.script_manager.get_script(ctenums.LocID.LOAD_SCREEN)
+    script.strings[0] = bytearray(b'\x43\x00')
+    script.modified_strings = True
+    ct_rom.write_all_scripts_to_rom()
+
+    # String 1 is still used by the CRONOS_ROOM script.  Note that
+    # is_block_free takes an inclusive end.
+    spaceman = ct_rom.rom_data.space_manager
+    assert spaceman.is_block_free((0x210000, 0x210001))
+    assert spaceman.is_block_free((0x210100, 0x210101))
+    assert not spaceman.is_block_free((0x210002, 0x210003))
+    assert not spaceman.is_block_free((0x210200, 0x210202))
+    assert ct_rom.script_manager.string_pool.bytes_reclaimed == 4
+
+    rom = ct_rom.rom_data.getvalue()
+    for loc_id, strings in (
+            (ctenums.LocID.LOAD_SCREEN, [b'\x43\x00', b'\x42\x42\x00']),
+            (ctenums.LocID.CRONOS_ROOM, [b'\x42\x42\x00'])):
+        assert ctevent.Event.from_rom_location(rom, loc_id).strings == \
+            strings
+
+
+def test_identical_strings_are_shared():
+    ct_rom = make_string_ctrom()
+    script_man = ct_rom.script_manager
+    for loc_id in (ctenums.LocID.LOAD_SCREEN, ctenums.LocID.CRONOS_ROOM):
+        script_man.get_script(loc_id).modified_strings = True
+    ct_rom.write_all_scripts_to_rom()
+
+    pool = script_man.string_pool
+    assert pool.bytes_deduplicated == 3
+    assert pool.bytes_reclaimed == 2*2 + 2 + 3
+    spaceman = ct_rom.rom_data.space_manager
+    for block in ((0x210000, 0x210003), (0x210100, 0x210101),
+                  (0x210200, 0x210202)):
+        assert spaceman.is_block_free(block)
+
+    rom = ct_rom.rom_data.getvalue()
+    load_screen = ctevent.Event.from_rom_location(rom,
+                                                  ctenums.LocID.LOAD_SCREEN)
+    cronos_room = ctevent.Event.from_rom_location(rom,
+                                                  ctenums.LocID.CRONOS_ROOM)
+    assert cronos_room.strings == load_screen.strings[1:]
+
+
+def test_rom_file_round_trip(tmp_path):
+    ct_rom = make_ctrom()
+    ct_rom.rom_data.seek(0x1234)
+    ct_rom.rom_data.write(b'\xAB\xCD')
+
+    rom_path = tmp_path / 'ct.sfc'
+    with rom_path.open('wb') as outfile:
+        ct_rom.rom_data.write_to_file(outfile)
+
+    with ctrom.map_rom_file(rom_path) as rom_view:
+        assert rom_view.readonly
+        assert rom_view == ct_rom.rom_data.getvalue()
+
+    with pytest.raises(ctrom.InvalidRomException):
+        ctrom.CTRom.from_file(rom_path)
+
+    read_rom = ctrom.CTRom.from_file(rom_path, ignore_checksum=True)
+    assert read_rom.rom_data.getvalue() == ct_rom.rom_data.getvalue()
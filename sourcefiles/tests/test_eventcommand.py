@@ -0,0 +1,61 @@
+import copy
+
+import pytest
+
+import ctevent
+import eventcommand
+from eventcommand import EventCommand as EC, event_commands, get_command, \
+    get_command_length
+
+
+@pytest.mark.parametrize('flux_name', ['bucket_eot.Flux',
+                                       'VR_10C_Geno_Dome_Mainframe.Flux'])
+def test_decode_round_trip(flux_name: str):
+    script = ctevent.Event.from_flux(flux_name)
+    data = bytes(script.data)
+
+    pos = script.get_object_start(0)
+    while pos < len(data):
+        cmd = get_command(data, pos)
+        length = get_command_length(data, pos)
+
+        assert len(cmd) == length
+        assert cmd.to_bytearray() == data[pos:pos+length]
+        assert cmd.name == event_commands[data[pos]].name
+        pos += length
+
+
+@pytest.mark.parametrize(
+    'cmd_bytes',
+    [b'\x2E\x40\x01\x02\x03\x04', b'\x2E\x80\x10\x05\x00\xAA\xBB\xCC',
+     b'\x4E\x00\x20\x7F\x05\x00\xAA\xBB\xCC',
+     b'\x88\x00', b'\x88\x20\x01\x02', b'\x88\x40\x01\x02\x03',
+     b'\x88\x80\x04\x00\xAA\xBB',
+     b'\xF1\x00', b'\xF1\x01\x02',
+     b'\xFF\x90\x01\x02\x03', b'\xFF\x97\x01\x02', b'\xFF\x10']
+)
+def test_variable_length_commands(cmd_bytes: bytes):
+    buf = b'\x00' + cmd_bytes + b'\x00'*8
+    cmd = get_command(buf, 1)
+
+    assert get_command_length(buf, 1) == len(cmd_bytes)
+    assert cmd.to_bytearray() == cmd_bytes
+
+
+def test_metadata_is_shared_not_changed():
+    buf = EC.return_cmd().to_bytearray()
+    cmd = get_command(buf)
+    orig_name = event_commands[0].name
+
+    cmd.name = 'Changed'
+    assert event_commands[0].name == orig_name
+    assert get_command(buf).name == orig_name
+
+    # Copies of decoded commands can have their arg_lens edited.
+    cmd_copy = get_command(b'\xF1\x01\x02').copy()
+    cmd_copy.arg_lens[-1] = 2
+    assert eventcommand._get_variable_arg_lens(b'\xF1\x01\x02', 0, 0xF1) \
+        == (1, 1)
+
+    deep = copy.deepcopy(cmd)
+    assert deep == cmd and deep.name == 'Changed'
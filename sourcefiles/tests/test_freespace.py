@@ -0,0 +1,159 @@
+import pytest
+
+from freespace import FreeSpace, FreeSpaceError, FSAllocPolicy, FSRom, \
+    FSWriteType, ParsedPatch
+
+
+def make_space() -> FreeSpace:
+    '''
+    Free runs:
+      [0x010100, 0x010200) - 0x100 bytes
+      [0x010800, 0x010840) - 0x40 bytes
+      [0x02FF00, 0x030100) - crosses from bank 0x02 to bank 0x03
+    '''
+    space = FreeSpace(0x400000, False)
+    for block in ((0x010100, 0x010200), (0x010800, 0x010840),
+                  (0x02FF00, 0x030100)):
+        space.mark_block(block, FSWriteType.MARK_FREE)
+
+    return space
+
+
+def test_first_fit():
+    space = make_space()
+    assert space.get_free_addr(0x40) == 0x010100
+    assert space.get_free_addr(0x40, hint=0x010200) == 0x010800
+    assert space.get_free_addr(0x40, hint=0x010180) == 0x010180
+
+
+def test_best_fit():
+    space = make_space()
+    assert space.get_free_addr(0x40, policy=FSAllocPolicy.BEST_FIT) \
+        == 0x010800
+
+    space.policy = FSAllocPolicy.BEST_FIT
+    assert space.get_free_addr(0x80) == 0x010100
+
+
+def test_no_bank_crossing():
+    space = make_space()
+    with pytest.raises(FreeSpaceError):
+        space.get_free_addr(0x180)
+
+
+def test_index_tracks_marks():
+    space = make_space()
+    assert space.get_free_addr(0x100) == 0x010100
+
+    space.mark_block((0x010100, 0x010110), FSWriteType.MARK_USED)
+    assert space.get_free_addr(0x100) == 0x02FF00
+
+    copy = space.copy()
+    space.mark_block((0x010100, 0x010110), FSWriteType.MARK_FREE)
+    assert space.get_free_addr(0x100) == 0x010100
+    assert copy.get_free_addr(0x100) == 0x02FF00
+
+
+def test_same_bank():
+    space = make_space()
+    assert space.get_same_bank_free_addrs([0x40, 0x100]) == \
+        [0x010800, 0x010100]
+
+    # Nothing is marked.
+    assert space.get_free_addr(0x100) == 0x010100
+
+    # Too much for any one bank.
+    with pytest.raises(FreeSpaceError):
+        space.get_same_bank_free_addrs([0x100, 0x100])
+
+
+def test_usage_report():
+    space = make_space()
+    space.alloc_log = []
+    addr = space.get_free_addr(0x40)
+    space.mark_block((addr, addr+0x40), FSWriteType.MARK_USED)
+    space.get_same_bank_free_addrs([0x10, 0x20], hint=0x020000)
+
+    report = space.get_usage_report()
+    bank_01 = report['banks']['01']
+    assert bank_01['free'] == 0x100
+    assert bank_01['free_runs'] == 2
+    assert bank_01['largest_free_run'] == 0xC0
+    assert bank_01['fragmentation'] == 0.25
+
+    assert [(rec['caller'], rec['size'], rec['bank'])
+            for rec in report['allocations']] == [
+        ('test_freespace.test_usage_report', 0x40, '01'),
+        ('test_freespace.test_usage_report', 0x20, '02'),
+        ('test_freespace.test_usage_report', 0x10, '02'),
+    ]
+    assert report['allocations_by_caller'] == {
+        'test_freespace.test_usage_report': {'count': 3, 'bytes': 0x70}
+    }
+
+
+def test_rom_byte_sums():
+    data = bytes(range(256))*0x100
+    rom = FSRom(data, True)
+    assert rom.get_byte_sum() == sum(data)
+
+    rom.seek(0x0FF0)
+    rom.write(b'\xFF'*0x20)
+    assert rom.get_byte_sum() == sum(rom.getvalue())
+    assert rom.get_byte_sum(0x0FF8, 0x1234) == \
+        sum(rom.getvalue()[0x0FF8:0x1234])
+
+    # Writes through a view are found by comparison.
+    with rom.getbuffer() as buf:
+        buf[0x8000:0x8010] = bytes(0x10)
+    assert rom.get_byte_sum() == sum(rom.getvalue())
+
+    # A copy keeps the sums, but changes are independent.
+    copy = rom.copy()
+    copy.seek(0xC000)
+    copy.write(b'\x01'*4)
+    assert copy.get_byte_sum() == sum(copy.getvalue())
+    assert rom.get_byte_sum() == sum(rom.getvalue())
+    assert rom.getvalue() != copy.getvalue()
+
+
+def test_rom_view():
+    rom = FSRom(bytes(0x2000), True)
+    view = rom.get_view()
+    assert view.readonly
+
+    # The view keeps the old contents when the rom is written.
+    rom.seek(0x10)
+    rom.write(b'\x01')
+    assert view[0x10] == 0
+    assert rom.get_view()[0x10] == 1
+
+
+def test_parsed_ips_patch():
+    patch_data = b'PATCH' + \
+        b'\x00\x00\x10\x00\x02\xAB\xCD' + \
+        b'\x00\x00\x12\x00\x00\x00\x20\x00' + \
+        b'\x00\x00\x40\x00\x00\x00\x04\xEE' + \
+        b'EOF'
+    patch = ParsedPatch.from_ips(patch_data)
+
+    assert [(addr, payload) for addr, payload, _ in patch.writes] == [
+        (0x10, b'\xAB\xCD'), (0x12, bytes(0x20)), (0x40, b'\xEE'*4)
+    ]
+    assert patch.marks == [
+        (0x10, 0x12, FSWriteType.MARK_USED),
+        (0x12, 0x32, FSWriteType.MARK_FREE),
+        (0x40, 0x44, FSWriteType.MARK_USED)
+    ]
+
+    rom = FSRom(bytes(0x100), True)
+    rom.apply_patch(patch)
+    assert rom.getvalue()[0x10:0x12] == b'\xAB\xCD'
+    assert rom.getvalue()[0x40:0x45] == b'\xEE'*4 + b'\x00'
+    assert not rom.space_manager.is_block_free((0x10, 0x11))
+    assert rom.space_manager.is_block_free((0x12, 0x31))
+
+
+def test_adjacent_txt_marks_merge():
+    patch = ParsedPatch.from_txt(['000010:2:01 02', '000012:1:03'])
+    assert patch.marks == [(0x10, 0x13, FSWriteType.MARK_USED)]
@@ -0,0 +1,131 @@
+import random
+
+import pytest
+
+from ctenums import ItemID
+import logiccompiler
+import logicfactory
+import logictypes
+import randoconfig as cfg
+import randomizer
+import randosettings as rset
+
+
+GF = rset.GameFlags
+
+
+def make_game_config(settings: rset.Settings,
+                     rand: random.Random) -> logicfactory.GameConfig:
+    config = cfg.RandoConfig()
+    randomizer.Randomizer.fill_default_config_entries(config)
+
+    chars = [assignment.held_char
+             for assignment in config.char_assign_dict.values()]
+    rand.shuffle(chars)
+    for assignment, char in zip(config.char_assign_dict.values(), chars):
+        assignment.held_char = char
+
+    settings.fix_flag_conflicts()
+    return logicfactory.getGameConfig(settings, config)
+
+
+@pytest.mark.parametrize('game_mode', list(rset.GameMode))
+@pytest.mark.parametrize('flags', [
+    GF(0),
+    GF.CHRONOSANITY,
+    GF.EPOCH_FAIL | GF.UNLOCKED_SKYGATES | GF.LOCKED_CHARS,
+    GF.CHRONOSANITY | GF.EPOCH_FAIL | GF.RESTORE_JOHNNY_RACE |
+    GF.ADD_SUNKEEP_SPOT | GF.ROCKSANITY,
+    GF.STARTERS_SUFFICIENT | GF.VANILLA_DESERT | GF.RESTORE_TOOLS,
+])
+def test_compiled_rules_match_lambdas(game_mode, flags):
+    rand = random.Random(f'{game_mode}{flags}')
+    settings = rset.Settings.get_race_presets()
+    settings.game_mode = game_mode
+    settings.gameflags |= flags
+    game_config = make_game_config(settings, rand)
+    logic = game_config.getCompiledLogic()
+
+    items = sorted(set(game_config.keyItemList) | set(ItemID))
+    for _ in range(200):
+        key_items = {item for item in items if rand.random() < 0.4}
+        state = logic.get_state(logiccompiler.get_key_item_mask(key_items))
+
+        game = logictypes.Game(game_config.settings, game_config.config)
+        game.keyItems = key_items
+        game.updateAvailableCharacters()
+        assert logic.get_characters(state) == game.characters
+
+        for group in game_config.locationGroups:
+            assert logic.can_access(group, state) == \
+                bool(group.accessRule(game)), group.name
+
+
+def test_untraceable_rule_is_called():
+    settings = rset.Settings.get_race_presets()
+    game_config = make_game_config(settings, random.Random(0))
+    group = game_config.locationGroups[0]
+    group.accessRule = lambda game: game.getKeyItemCount() >= 2
+
+    logic = game_config.getCompiledLogic()
+    assert logic.get_group_terms(group) is None
+
+    one_item = logiccompiler.get_item_bit(ItemID.PENDANT)
+    two_items = one_item | logiccompiler.get_item_bit(ItemID.GATE_KEY)
+    assert not logic.can_access(group, logic.get_state(one_item))
+    assert logic.can_access(group, logic.get_state(two_items))
+
+
+def get_collectable_by_rules(game_config: logicfactory.GameConfig):
+    '''Find the collectable key items by calling the group rules.'''
+    key_items = set(game_config.keyItemList)
+    game = logictypes.Game(game_config.settings, game_config.config)
+    while True:
+        game.updateAvailableCharacters()
+        found = {
+            location.getKeyItem()
+            for group in game_config.locationGroups
+            if group.accessRule(game)
+            for location in group.locations
+        } & key_items
+        if found <= game.keyItems:
+            return sorted(game.keyItems)
+        game.keyItems |= found
+
+
+@pytest.mark.parametrize('flags', [
+    GF(0),
+    GF.CHRONOSANITY | GF.EPOCH_FAIL | GF.LOCKED_CHARS,
+])
+def test_tracker_matches_rules(flags):
+    rand = random.Random(str(flags))
+    settings = rset.Settings.get_race_presets()
+    settings.gameflags |= flags
+    game_config = make_game_config(settings, rand)
+    locations = [location for group in game_config.locationGroups
+                 for location in group.locations]
+    tracker = logiccompiler.ReachabilityTracker(
+        game_config.getCompiledLogic(), game_config.keyItemList
+    )
+
+    for _ in range(5):
+        checkpoint = tracker.checkpoint()
+        placed = []
+        chosen = rand.sample(locations, len(game_config.keyItemList))
+        for location, item in zip(chosen, game_config.keyItemList):
+            location.setKeyItem(item)
+            tracker.place(location, item)
+            placed.append(location)
+            assert tracker.get_collected_key_items() == \
+                get_collectable_by_rules(game_config)
+
+        location = placed.pop()
+        location.setKeyItem(ItemID.NONE)
+        tracker.undo()
+        assert tracker.get_collected_key_items() == \
+            get_collectable_by_rules(game_config)
+
+        for location in placed:
+            location.setKeyItem(ItemID.NONE)
+        tracker.rollback(checkpoint)
+        assert tracker.get_collected_key_items() == []
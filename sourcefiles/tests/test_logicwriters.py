@@ -0,0 +1,82 @@
+import random
+
+import pytest
+
+import logicfactory
+import logictypes
+import logicwriters
+import randoconfig as cfg
+import randomizer
+import randosettings as rset
+from treasures import treasurewriter
+
+
+def make_config() -> cfg.RandoConfig:
+    '''Get a config with the default (non-rom) entries filled in.'''
+    config = cfg.RandoConfig()
+    randomizer.Randomizer.fill_default_config_entries(config)
+    return config
+
+
+def fill_treasures(settings: rset.Settings, rand: random.Random):
+    '''Run the treasure and key item writers and return the rewards.'''
+    config = make_config()
+    treasurewriter.write_treasures_to_config(settings, config, rand)
+    logicwriters.commitKeyItems(settings, config, rand)
+    return {
+        tid: treasure.reward
+        for tid, treasure in config.treasure_assign_dict.items()
+    }
+
+
+@pytest.mark.parametrize('flags', [rset.GameFlags(0),
+                                   rset.GameFlags.CHRONOSANITY])
+def test_fill_uses_only_given_rng(flags):
+    '''
+    The same seed gives the same placement regardless of what happens to the
+    global random module in between.
+    '''
+    settings = rset.Settings.get_race_presets()
+    settings.gameflags |= flags
+
+    first = fill_treasures(settings, random.Random('seed'))
+    random.seed('something else')
+    random.random()
+    second = fill_treasures(settings, random.Random('seed'))
+
+    assert first == second
+
+
+def test_chronosanity_impossible_fill_is_undone():
+    '''
+    A fill with too few reachable spots searches every placement, raises
+    ImpossibleConfigurationException, and leaves the groups as they were.
+    '''
+    settings = rset.Settings.get_race_presets()
+    settings.gameflags |= rset.GameFlags.CHRONOSANITY
+    settings.fix_flag_conflicts()
+    game_config = logicfactory.getGameConfig(settings, make_config())
+
+    # Leave three spots which need no key items and nothing else.
+    start_game = logictypes.Game(settings, game_config.config)
+    start_game.updateAvailableCharacters()
+    num_spots = 3
+    for group in game_config.getLocations():
+        keep = num_spots if group.accessRule(start_game) else 0
+        for location in group.getLocations()[keep:]:
+            group.removeLocation(location)
+        num_spots -= len(group.getLocations())
+
+    def get_groups():
+        # The order of a group's locations may change.
+        return [(set(group.getLocations()), group.getWeight())
+                for group in game_config.getLocations()]
+
+    before = get_groups()
+
+    filler = logicwriters.ChronosanityFiller()
+    with pytest.raises(logicwriters.ImpossibleConfigurationException):
+        filler.fill_key_item_locations(game_config, random.Random(0))
+
+    assert get_groups() == before
+    assert not game_config.getGame().keyItems
@@ -0,0 +1,43 @@
+import tracemalloc
+
+import pytest
+
+import ctdecompress
+import ctevent
+import profiling
+
+
+@pytest.mark.parametrize('has_reset_peak', [True, False])
+def test_stages_and_helpers_are_recorded(has_reset_peak, monkeypatch):
+    if not has_reset_peak:
+        monkeypatch.delattr(tracemalloc, 'reset_peak', raising=False)
+    elif not hasattr(tracemalloc, 'reset_peak'):
+        pytest.skip('tracemalloc.reset_peak needs Python 3.9')
+
+    orig_compress = ctevent.compress
+    profiler = profiling.Profiler()
+    with profiler.profile():
+        for _ in range(2):
+            with profiler.stage('outer'):
+                with profiler.stage('inner'):
+                    data = bytearray(0x1000)
+                    ctevent.compress(b'\x00\x01'*0x20)
+
+    # Helpers imported by name elsewhere are restored afterwards.
+    assert ctevent.compress is orig_compress
+    assert ctdecompress.compress is orig_compress
+
+    report = profiler.get_report()
+    assert report['stages']['outer']['calls'] == 2
+    assert report['stages']['inner']['calls'] == 2
+    assert report['stages']['inner']['peak_alloc_bytes'] >= len(data)
+    assert report['stages']['outer']['peak_alloc_bytes'] >= \
+        report['stages']['inner']['peak_alloc_bytes']
+    assert report['helpers']['ctdecompress.compress']['calls'] == 2
+    assert report['helpers']['freespace.FreeSpace.get_free_addr']['calls'] \
+        == 0
+
+
+def test_get_stage_without_profiler():
+    with profiling.get_stage(None, 'stage'):
+        pass
@@ -1,5 +1,81 @@
+import pytest
+
+import baseconfigcache
 import randomizer
+import randosettings as rset
 
 
 def test_noop():
     assert randomizer
+
+
+@pytest.fixture
+def empty_base_config_cache(monkeypatch, tmp_path):
+    cache = baseconfigcache.BaseConfigCache(tmp_path, use_disk=False)
+    monkeypatch.setattr(randomizer.Randomizer, 'base_config_cache', cache)
+    return cache
+
+
+def test_dry_run_needs_cached_base_config(empty_base_config_cache):
+    settings = rset.Settings.get_race_presets()
+    settings.seed = 'dry run'
+    rando = randomizer.Randomizer(None, settings=settings)
+
+    assert rando.is_dry_run
+    assert not randomizer.Randomizer.has_cached_base_configs(settings)
+    with pytest.raises(randomizer.NoBaseConfigException):
+        rando.set_random_config()
+
+
+def test_dry_run_can_not_make_rom(empty_base_config_cache):
+    rando = randomizer.Randomizer(None,
+                                  settings=rset.Settings.get_race_presets())
+    rando.config = randomizer.cfg.RandoConfig()
+
+    with pytest.raises(randomizer.NoRomException):
+        rando.generate_rom()
+
+
+def test_has_cached_base_configs(empty_base_config_cache):
+    settings = rset.Settings.get_race_presets()
+    patches_digest = baseconfigcache.get_patches_digest()
+    empty_base_config_cache.get_or_build(
+        'standard_normal_normal', ('some rom', patches_digest),
+        lambda: 'base config'
+    )
+    assert randomizer.Randomizer.has_cached_base_configs(settings)
+
+    # Mystery seeds may pick other modes and difficulties.
+    settings.gameflags |= rset.GameFlags.MYSTERY
+    assert not randomizer.Randomizer.has_cached_base_configs(settings)
+
+
+def test_base_rom_is_hashed_once(empty_base_config_cache, monkeypatch):
+    class CacheMiss(Exception):
+        pass
+
+    def get_or_build(name, key, builder):
+        keys.append(key)
+        raise CacheMiss
+
+    def md5(data=b''):
+        # hashlib is shared with baseconfigcache, which hashes small files.
+        if len(data) == 0x400000:
+            hashes.append(data)
+        return orig_md5(data)
+
+    keys: list[tuple] = []
+    hashes: list[bytes] = []
+    orig_md5 = randomizer.hashlib.md5
+    monkeypatch.setattr(empty_base_config_cache, 'get_or_build',
+                        get_or_build)
+    monkeypatch.setattr(randomizer.hashlib, 'md5', md5)
+
+    rando = randomizer.Randomizer(bytes(0x400000), is_vanilla=False,
+                                  settings=rset.Settings.get_race_presets())
+    for _ in range(2):
+        with pytest.raises(CacheMiss):
+            rando.set_random_config()
+
+    assert len(hashes) == 1
+    assert keys[0] == keys[1]
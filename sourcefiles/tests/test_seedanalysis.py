@@ -0,0 +1,58 @@
+import random
+
+import pytest
+
+import randosettings as rset
+import seedanalysis
+
+
+GF = rset.GameFlags
+
+
+def test_add_proof():
+    proof = '\n'.join([
+        '0: Recruit Lucca from Starting1',
+        '0: Obtain Pendant from Zenan Bridge',
+        'Unlock Flight',
+        '1: Obtain Gate Key from Zenan Bridge',
+        'GO: Black Omen',
+    ])
+
+    report = seedanalysis.DistributionReport()
+    report.num_samples = 1
+    report.add_proof(proof, {'Zenan Bridge': 'Zenan'})
+
+    assert report.char_spheres == {'Lucca': {0: 1}}
+    assert report.item_spheres['Gate Key'] == {1: 1}
+    assert report.item_groups['Pendant'] == {'Zenan': 1}
+    assert report.flight_spheres == {0: 1}
+    assert report.go_spheres == {
+        'Black Omen': {1: 1},
+        seedanalysis.ANY_GO: {1: 1},
+    }
+    assert report.sphere_counts == {2: 1}
+
+
+@pytest.mark.parametrize('flags', [GF(0), GF.CHRONOSANITY])
+def test_analyze(flags):
+    settings = rset.Settings.get_race_presets()
+    settings.gameflags |= flags
+    settings.fix_flag_conflicts()
+    report = seedanalysis.analyze(settings, 20, num_workers=1, seed='test')
+
+    assert report.num_samples == 20
+    assert report.failures == 0
+    for counter in report.item_groups.values():
+        assert sum(counter.values()) == report.num_filled
+
+    # Chunks of samples must add up to the same report.
+    first = seedanalysis.DistributionReport()
+    second = seedanalysis.DistributionReport()
+    config = seedanalysis.make_sample_config()
+    for ind in range(20):
+        seedanalysis.analyze_sample(
+            settings, config, random.Random(f'test{ind}'),
+            first if ind < 7 else second
+        )
+    first.merge(second)
+    assert first.to_jot_json() == report.to_jot_json()
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import random
+
+import pytest
+
+import seedpatch
+from seedpatch import PatchFormat
+
+
+def get_random_bytes(rand: random.Random, size: int) -> bytes:
+    # Random.randbytes is not available before Python 3.9
+    return rand.getrandbits(8*size).to_bytes(size, 'little')
+
+
+def make_roms() -> tuple[bytes, bytes]:
+    rand = random.Random(0)
+    source = get_random_bytes(rand, 0x20000)
+
+    target = bytearray(source)
+    target[0x100:0x104] = b'\x01\x02\x03\x04'
+    target[0x108] ^= 0xFF
+    target[0x8000:0x9000] = bytes(0x1000)  # A run
+    target += b'\x55'*0x100 + get_random_bytes(rand, 0x100)  # Expanded
+
+    return source, bytes(target)
+
+
+def test_changed_ranges():
+    source, target = make_roms()
+    assert seedpatch.get_changed_ranges(source, target) == [
+        (0x100, 0x109), (0x8000, 0x9000), (0x20000, 0x20200)
+    ]
+
+
+@pytest.mark.parametrize('patch_format', list(PatchFormat))
+def test_patch_round_trip(patch_format):
+    source, target = make_roms()
+    patch = seedpatch.make_patch(source, target, patch_format)
+
+    assert len(patch) < 0x200
+    assert seedpatch.apply_patch(source, patch, patch_format) == target
+
+
+def test_ips_avoids_eof_address():
+    source = bytes(0x460000)
+    target = bytearray(source)
+    target[0x454F46:0x454F48] = b'\x01\x02'
+
+    patch = seedpatch.make_ips(source, bytes(target))
+    assert patch.count(b'EOF') == 1
+    assert seedpatch.apply_ips(source, patch) == target
+
+
+def test_bps_rejects_other_source():
+    source, target = make_roms()
+    patch = seedpatch.make_bps(source, target)
+
+    with pytest.raises(seedpatch.InvalidPatchException):
+        seedpatch.apply_bps(bytes(len(source)), patch)
@@ -8,7 +8,7 @@
 
 from __future__ import annotations
 
-from typing import Tuple
+from typing import Optional, Tuple
 import random
 
 from ctenums import TreasureID as TID, StrIntEnum, ItemID
@@ -408,15 +408,16 @@ class TreasureDist:
         # input()
         self.weight_item_pairs = weight_item_pairs
 
-    def get_random_item(self) -> ItemID:
-        target = random.randrange(0, self.__total_weight)
+    def get_random_item(self, rand: Optional[random.Random] = None) -> ItemID:
+        rng = random if rand is None else rand
+        target = rng.randrange(0, self.__total_weight)
 
         value = 0
         for x in self.__weight_item_pairs:
             value += x[0]
 
             if value > target:
-                return random.choice(x[1])
+                return rng.choice(x[1])
 
         raise ValueError("No selection")
 
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-import random as rand
+import random
 
 import ctenums
 import logictypes
@@ -18,7 +18,8 @@ ItemID = ctenums.ItemID
 # (robo ribbon, hero medal, grandleon) to the config.  Must be called after
 # key items and characters are placed.
 def add_lw_key_item_gear(settings: rset.Settings,
-                         config: cfg.RandoConfig):
+                         config: cfg.RandoConfig,
+                         rand: random.Random):
 
     if settings.game_mode != rset.GameMode.LOST_WORLDS:
         return
@@ -130,7 +131,8 @@ def get_treasure_tier_dict(settings: rset.Settings):
 
 
 def write_treasures_to_config(settings: rset.Settings,
-                              config: cfg.RandoConfig):
+                              config: cfg.RandoConfig,
+                              rand: random.Random):
 
     gil = td.get_item_list
     ITier = td.ItemTier
@@ -145,7 +147,7 @@ def write_treasures_to_config(settings: rset.Settings,
         dist = td.get_treasure_distribution(settings, tier)
 
         for treasure in treasures:
-            assign[treasure].reward = dist.get_random_item()
+            assign[treasure].reward = dist.get_random_item(rand)
 
     # Now, put treasures in key item spots.  These may get overwritten by
     # the logic.